@@ -0,0 +1,12 @@
+import os
+
+# Set config path to AppData (Windows) or home directory (other OS)
+if os.name == 'nt':
+    CONFIG_DIR = os.path.join(os.environ.get('APPDATA', os.path.expanduser('~')), 'PBW3 Tool')
+else:
+    CONFIG_DIR = os.path.join(os.path.expanduser('~'), '.pbw3_tool')
+CONFIG_PATH = os.path.join(CONFIG_DIR, "pbw3_config.json")
+DOCUMENTS_DIR = os.path.join(CONFIG_DIR, "documents")  # per-game snapshots of the PBW3 documents listing
+METRICS_PATH = os.path.join(CONFIG_DIR, "metrics.sqlite")  # turn-cycle timings, see metrics_store.py
+PROFILES_DIR = os.path.join(CONFIG_DIR, "profiles")  # saved command profiles, see profiler.py
+DEADLINES_PATH = os.path.join(CONFIG_DIR, "deadlines.json")  # cached turn due times, see deadlines.py
@@ -0,0 +1,220 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from bs4 import BeautifulSoup
+from app_paths import DEADLINES_PATH
+from documents_index import describe_diff
+
+# "Turn deadline: June 3, 2025 8:00 pm", "Next turn due - 2025-06-03 20:00", "Due: in 2 days 4 hours"
+DEFAULT_PATTERN = r"(?:turn\s+deadline|deadline|next\s+turn(?:\s+due)?|turn\s+due|due\s+date|due)\s*[:\-]\s*(?P<when>.+)"
+DATE_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d", "%B %d, %Y %I:%M %p", "%B %d, %Y %H:%M", "%B %d, %Y",
+                "%b %d, %Y %I:%M %p", "%b %d, %Y %H:%M", "%b %d, %Y", "%d %B %Y %H:%M", "%d %B %Y",
+                "%m/%d/%Y %I:%M %p", "%m/%d/%Y %H:%M", "%m/%d/%Y")
+RELATIVE = re.compile(r"in\s+((?:\d+\s*[a-z]+[\s,]*(?:and\s+)?)+)", re.I)
+UNITS = {"d": 86400, "day": 86400, "h": 3600, "hr": 3600, "hour": 3600, "m": 60, "min": 60, "minute": 60}
+
+REFRESH_HOURS = 6           # re-read a game's group page this often
+NEAR_REFRESH_HOURS = 1      # ... and this often once its turn is due within a day
+# (due within seconds, poll the documents listing every seconds), nearest first
+POLL_TIERS = ((6 * 3600, 600), (24 * 3600, 1800), (72 * 3600, 7200))
+FAR_POLL = 6 * 3600         # due later than the last tier
+UNKNOWN_POLL = 2 * 3600     # no deadline found on the group page
+TICK = 60
+FIRST_TICK = 120            # let login and the game list refresh go first
+
+
+def parse_when(text, now=None):
+    """Epoch seconds for a deadline written as a date or "in 2 days 4 hours"; None if unreadable."""
+    now = time.time() if now is None else now
+    relative = RELATIVE.search(text)
+    if relative:
+        seconds = 0
+        for amount, unit in re.findall(r"(\d+)\s*([a-z]+)", relative.group(1).lower()):
+            unit = unit.rstrip("s") if unit not in UNITS else unit
+            if unit not in UNITS:
+                return None
+            seconds += int(amount) * UNITS[unit]
+        return now + seconds if seconds else None
+    words = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", text).replace(" at ", " ").split()
+    # The date may be followed by a time zone or other text; try the longest leading run of words first
+    for length in range(min(len(words), 6), 0, -1):
+        candidate = " ".join(words[:length]).strip(",.")
+        for pattern in DATE_FORMATS:
+            try:
+                return datetime.strptime(candidate, pattern).timestamp()
+            except ValueError:
+                continue
+    return None
+
+
+def parse_deadline(html, pattern=None, now=None):
+    """The turn due time (epoch seconds) shown on a group page, or None.
+
+    pattern is a regex with a "when" group; a label on its own line is read
+    together with the line after it."""
+    lines = [line.strip() for line in BeautifulSoup(html, "html.parser").get_text("\n").splitlines() if line.strip()]
+    regex = re.compile(pattern or DEFAULT_PATTERN, re.I)
+    for index, line in enumerate(lines):
+        following = lines[index + 1] if index + 1 < len(lines) else ""
+        for text in (line, f"{line} {following}"):
+            match = regex.search(text)
+            if match and match.group("when").strip():
+                due = parse_when(match.group("when"), now)
+                if due:
+                    return due
+    return None
+
+
+def poll_interval(due, now=None):
+    """Seconds between background polls of a game's documents listing: more often the nearer its turn is due."""
+    if due is None:
+        return UNKNOWN_POLL
+    slack = due - (time.time() if now is None else now)
+    for within, interval in POLL_TIERS:
+        if slack <= within:
+            return interval
+    return FAR_POLL
+
+
+def describe_due(due, now=None):
+    """Short text for when a turn is due, e.g. "3h", "2d 4h", "overdue"; "" when unknown."""
+    if due is None:
+        return ""
+    slack = due - (time.time() if now is None else now)
+    if slack < 0:
+        return "overdue"
+    days, hours, minutes = int(slack // 86400), int(slack % 86400 // 3600), int(slack % 3600 // 60)
+    if days:
+        return f"{days}d {hours}h"
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+
+
+class DeadlineCache:
+    """Turn due times read from each game's group page, kept in DEADLINES_PATH between runs.
+
+    Shared by the sessions (their requests get a head start in the rate
+    limiter the nearer the game's turn is due), the scheduler and the UI;
+    safe to use from any thread."""
+
+    def __init__(self, path=DEADLINES_PATH, pattern=None):
+        self.path = path
+        self.pattern = pattern
+        self._lock = threading.Lock()
+        self.entries = {}
+        try:
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass  # first run or unreadable: deadlines are read again
+
+    def key(self, game):
+        return f"{game.get('account') or ''}/{game.get('name') or game.get('display_name')}"
+
+    def due(self, game):
+        return self.entries.get(self.key(game), {}).get("due")
+
+    def update(self, game, due):
+        """Record a fresh read; returns True if the due time changed."""
+        with self._lock:
+            entry = self.entries.setdefault(self.key(game), {})
+            changed = entry.get("due") != due
+            entry.update(due=due, checked=time.time())
+        return changed
+
+    def touch(self, game):
+        """Mark the game as being read now, so it isn't queued again while the read is in flight."""
+        with self._lock:
+            self.entries.setdefault(self.key(game), {"due": None})["checked"] = time.time()
+
+    def stale(self, game, now=None):
+        now = time.time() if now is None else now
+        entry = self.entries.get(self.key(game))
+        if not entry or not entry.get("checked"):
+            return True
+        due = entry.get("due")
+        near = due is not None and due - now < 86400
+        if due is not None and due < now:
+            near = True  # the turn has moved on; find the next deadline soon
+        return now - entry["checked"] >= (NEAR_REFRESH_HOURS if near else REFRESH_HOURS) * 3600
+
+    def by_urgency(self, games):
+        """games ordered nearest deadline first; games without one keep their order at the end."""
+        return sorted(games, key=lambda game: (self.due(game) is None, self.due(game) or 0))
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.entries, indent=2)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+class DeadlineScheduler(threading.Thread):
+    """Background thread keeping deadlines fresh and polling documents listings, nearest deadline first.
+
+    Each tick it queues a group page read for games whose cached deadline
+    is stale, then a documents poll (a check, no download) for every game
+    whose poll interval has passed: every 10 minutes when due within 6
+    hours, down to every 6 hours when far off. Both run at background
+    priority, so the rate limiter serves them after anything the user
+    starts. New files are logged. Settings come from the config's
+    "deadlines" entry: pattern (regex with a "when" group) and poll."""
+
+    def __init__(self, get_games, get_worker, cache, log, settings=None, label=None):
+        super().__init__(daemon=True)
+        settings = settings or {}
+        self.get_games = get_games
+        self.get_worker = get_worker
+        self.cache = cache
+        self.log = log
+        self.poll = settings.get("poll", True)
+        self.label = label or (lambda game: game.get("display_name") or game.get("name", ""))
+        self.polled = {}    # game key -> when its listing was last polled
+        self.reported = {}  # game key -> keys of the new documents last logged
+        self.stopped = threading.Event()
+
+    def run(self):
+        delay = FIRST_TICK
+        while not self.stopped.wait(delay):
+            try:
+                self.tick()
+            except Exception as e:
+                self.log(f"[!] Deadline scheduler: {e}")
+            delay = TICK
+
+    def tick(self, now=None):
+        now = time.time() if now is None else now
+        games = self.cache.by_urgency([g for g in self.get_games() if g.get("document_url")])
+        stale = {}
+        for game in games:
+            worker = self.get_worker(game)
+            if worker and self.cache.stale(game, now):
+                self.cache.touch(game)
+                stale.setdefault(id(worker), (worker, []))[1].append(game)
+        for worker, account_games in stale.values():
+            worker.check_deadlines(account_games)
+        if not self.poll:
+            return
+        for game in games:
+            key = self.cache.key(game)
+            worker = self.get_worker(game)
+            if worker and now - self.polled.get(key, 0) >= poll_interval(self.cache.due(game), now):
+                self.polled[key] = now
+                worker.poll_documents(game, lambda diff, game=game: self._report(game, diff))
+
+    def _report(self, game, diff):
+        added = {d["key"] for d in diff["added"]}
+        key = self.cache.key(game)
+        if not added or self.reported.get(key) == added:
+            return
+        self.reported[key] = added
+        due = describe_due(self.cache.due(game))
+        self.log(f"[+] {self.label(game)}: {describe_diff(diff)}{f' (turn due in {due})' if due and due != 'overdue' else ''}")
+
+    def stop(self):
+        self.stopped.set()
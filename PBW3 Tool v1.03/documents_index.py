@@ -0,0 +1,218 @@
+import json
+import os
+import re
+import time
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from app_paths import DOCUMENTS_DIR
+
+DOC_LINK = "a[href*='get_group_doc']"
+DELETE_LINK = "a.bp-group-documents-delete"
+UPLOADER_LINK = "a[href*='/members/']"
+NEXT_LINK = "a.next, a[rel='next']"
+MAX_PAGES = 500  # safety stop for a listing whose "next" link never ends
+
+
+def document_file(href):
+    """The file name PBW3 serves a document as, without its upload id prefix."""
+    return href.rstrip("/").split("/")[-1].split("-", 1)[-1]
+
+
+def document_id(doc):
+    """The upload id PBW3 prefixes stored files with; it grows with every upload, so it orders by upload date."""
+    match = re.match(r"(\d+)-", doc["key"])
+    return int(match.group(1)) if match else None
+
+
+def parse_listing(html):
+    """Read the documents listing into a list of {key, href, file, title, delete_href} dicts.
+
+    key is the stored file name (id prefix included), which survives a
+    retitle but not a re-upload."""
+    return _parse_documents(BeautifulSoup(html, "html.parser"))
+
+
+def parse_listing_page(html, page_url):
+    """One page of a paginated listing: (documents, absolute URL of the next page or None)."""
+    soup = BeautifulSoup(html, "html.parser")
+    link = soup.select_one(NEXT_LINK)
+    next_url = urljoin(page_url, link["href"]) if link is not None and link.get("href") else None
+    return _parse_documents(soup), next_url
+
+
+def _parse_documents(soup):
+    documents = {}
+    for link in soup.select(DOC_LINK):
+        href = link.get("href")
+        if not href:
+            continue
+        key = href.rstrip("/").split("/")[-1]
+        title = link.get_text(strip=True)
+        doc = documents.get(key)
+        if doc is None:
+            doc = documents[key] = {"key": key, "href": href, "file": document_file(href), "title": "",
+                                    "delete_href": None, "uploader": None}
+        if title and not doc["title"]:
+            doc["title"] = title
+        if doc["delete_href"] is None:
+            # The delete link sits in the same listing row as the document's own links
+            for row in link.parents:
+                delete = row.select_one(DELETE_LINK)
+                if delete is not None:
+                    if {a.get("href") for a in row.select(DOC_LINK)} == {href}:
+                        doc["delete_href"] = delete.get("href")
+                    break
+        if doc["uploader"] is None:
+            # So does the uploader's profile link; stop at the first ancestor holding other documents
+            for row in link.parents:
+                if {a.get("href") for a in row.select(DOC_LINK)} != {href}:
+                    break
+                profile = row.select_one(UPLOADER_LINK)
+                if profile is not None:
+                    doc["uploader"] = profile.get("href").rstrip("/").split("/members/")[-1].split("/")[0]
+                    break
+    return list(documents.values())
+
+
+def newest_first(documents):
+    """True when every document has an upload id and they run newest to oldest."""
+    ids = [document_id(d) for d in documents]
+    return None not in ids and all(a > b for a, b in zip(ids, ids[1:]))
+
+
+def by_upload_date(documents):
+    """Newest upload first; documents without an upload id keep their order at the end."""
+    return sorted(documents, key=lambda d: (document_id(d) is None, -(document_id(d) or 0)))
+
+
+def merge_partial(old, scanned):
+    """The full listing after a scan stopped early.
+
+    Pages read newest first cover every upload down to the oldest one on
+    them; older documents are taken from the previous snapshot. Anything in
+    that covered range the scan didn't see has been removed."""
+    ids = [document_id(d) for d in scanned if document_id(d) is not None]
+    if not ids:
+        return list(scanned)
+    floor = min(ids)
+    seen = {d["key"] for d in scanned}
+    return list(scanned) + [d for d in old or [] if d["key"] not in seen
+                            and document_id(d) is not None and document_id(d) < floor]
+
+
+def diff_documents(old, new):
+    """Compare two listings; returns {"added", "removed", "renamed"} (renamed holds (old, new) pairs).
+
+    Old entries marked pending (a download that failed) weren't handled yet,
+    so they count as added again for as long as they stay listed."""
+    old_by_key = {d["key"]: d for d in old or []}
+    new_by_key = {d["key"]: d for d in new}
+    handled = {k for k, d in old_by_key.items() if not d.get("pending")}
+    return {
+        "added": [d for k, d in new_by_key.items() if k not in handled],
+        "removed": [d for k, d in old_by_key.items() if k not in new_by_key],
+        "renamed": [(old_by_key[k], d) for k, d in new_by_key.items()
+                    if k in handled and old_by_key[k]["title"] != d["title"]],
+    }
+
+
+def describe_diff(diff):
+    """One line for the log/UI, e.g. '3 new player files, 1 new turn zip since last check'."""
+    if not any(diff.values()):
+        return "no changes since last check"
+    added = diff["added"]
+    parts = []
+    kinds = (("turn zip", ".zip"), ("player file", ".plr"), ("empire file", ".emp"))
+    for label, ext in kinds:
+        count = sum(1 for d in added if d["file"].lower().endswith(ext))
+        if count:
+            parts.append(f"{count} new {label}{'s' if count > 1 else ''}")
+    other = sum(1 for d in added if not d["file"].lower().endswith(tuple(ext for _, ext in kinds)))
+    if other:
+        parts.append(f"{other} other new file{'s' if other > 1 else ''}")
+    if diff["removed"]:
+        parts.append(f"{len(diff['removed'])} removed")
+    if diff["renamed"]:
+        parts.append(f"{len(diff['renamed'])} renamed")
+    return ", ".join(parts) + " since last check"
+
+
+def turn_from_documents(documents):
+    """Highest turn number among the listing's zip files, or None."""
+    turns = [int(m.group(1)) for d in documents for m in [re.search(r"(\d+)\.zip$", d["file"].lower())] if m]
+    return max(turns) if turns else None
+
+
+def _with_pending(document, pending):
+    document = {k: v for k, v in document.items() if k != "pending"}
+    if pending:
+        document["pending"] = True
+    return document
+
+
+class DocumentsIndex:
+    """Per-game snapshots of the documents listing, kept under DOCUMENTS_DIR.
+
+    A snapshot records what has already been handled, so each sync only acts
+    on the diff against it. Callers save a new snapshot once the diff has
+    been processed; a failed sync leaves the old one and retries next time.
+    Documents that failed on their own are saved with a pending flag instead
+    of being left out: a scan that stops early never reads their page again,
+    but merge_partial() carries them over and the diff reports them as added."""
+
+    def __init__(self, root=DOCUMENTS_DIR):
+        self.root = root
+
+    def path_for(self, game_config):
+        account = game_config.get("account") or "default"
+        name = game_config.get("name") or game_config["document_url"].rstrip("/").split("/")[-2]
+        safe = re.sub(r"[^\w.-]", "_", f"{account}_{name}")
+        return os.path.join(self.root, f"{safe}.json")
+
+    def load(self, game_config):
+        """The last saved listing for the game, or None if it was never synced."""
+        path = self.path_for(game_config)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f)["documents"]
+        except (ValueError, KeyError, OSError):
+            return None  # unreadable snapshot: treat everything as new
+
+    def save(self, game_config, documents, failed=None):
+        """Save the listing as handled. failed is the set of keys the caller tried and couldn't handle;
+        when None, documents pending in the old snapshot stay pending."""
+        if failed is None:
+            failed = {d["key"] for d in self.load(game_config) or [] if d.get("pending")}
+        documents = [_with_pending(d, d["key"] in failed) for d in documents]
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path_for(game_config)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"saved": time.time(), "document_url": game_config.get("document_url"),
+                       "documents": documents}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def host_upload_path(self, game_config):
+        return self.path_for(game_config)[:-len(".json")] + ".host.json"
+
+    def load_host_upload(self, game_config):
+        """The host's last turn upload as {"zip": key, "documents": [keys]}, or None if none was recorded."""
+        try:
+            with open(self.host_upload_path(game_config), "r") as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return None
+
+    def save_host_upload(self, game_config, zip_key, keys):
+        """Record which documents the host uploaded with the turn zip zip_key (see submission_status())."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self.host_upload_path(game_config)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"saved": time.time(), "zip": zip_key, "documents": sorted(keys)}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def diff(self, game_config, documents):
+        return diff_documents(self.load(game_config), documents)
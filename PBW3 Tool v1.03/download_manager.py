@@ -0,0 +1,242 @@
+import asyncio
+import http.client
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from urllib.parse import urlsplit
+
+PART_SUFFIX = ".part"
+CHUNK_SIZE = 64 * 1024
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+MAX_REDIRECTS = 5
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed or fails verification."""
+
+
+class HttpStatusError(Exception):
+    def __init__(self, code, headers):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+        self.headers = headers
+
+
+def cookie_header(cookies):
+    """Build a Cookie header value from Playwright context cookies."""
+    return "; ".join(f"{c['name']}={c['value']}" for c in cookies or [])
+
+
+class _RedirectHandler(urllib.request.HTTPRedirectHandler):
+    max_redirections = MAX_REDIRECTS
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        request = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if request is not None and urlsplit(newurl).hostname != urlsplit(req.full_url).hostname:
+            # Don't hand the PBW3 session cookie to another host (e.g. a CDN)
+            request.remove_header("Cookie")
+        return request
+
+
+# urllib handles proxies (environment and system settings), redirects, 1xx replies, chunking and trailers;
+# the replay server runs on this machine, so it is never reached through a proxy
+_opener = urllib.request.build_opener(_RedirectHandler)
+_local_opener = urllib.request.build_opener(_RedirectHandler, urllib.request.ProxyHandler({}))
+
+
+class HttpResponse:
+    """A urllib response read from the event loop; blocking reads run in a worker thread."""
+
+    def __init__(self, response, url=None):
+        self.response = response
+        self.status = response.status
+        self.url = url or response.url  # after redirects
+        self.headers = {k.lower(): v for k, v in response.headers.items()}
+
+    async def iter_chunks(self):
+        while True:
+            try:
+                data = await asyncio.to_thread(self.response.read, CHUNK_SIZE)
+            except http.client.HTTPException as e:
+                raise ConnectionError(f"connection closed inside body: {e!r}")
+            if not data:
+                return
+            yield data
+
+    def close(self):
+        self.response.close()
+
+
+def _open(url, headers, timeout):
+    request = urllib.request.Request(url, headers=headers)
+    opener = _local_opener if urlsplit(url).hostname in ("127.0.0.1", "localhost", "::1") else _opener
+    try:
+        return HttpResponse(opener.open(request, timeout=timeout))
+    except urllib.error.HTTPError as e:
+        e.close()
+        raise HttpStatusError(e.code, {k.lower(): v for k, v in e.headers.items()})
+
+
+async def open_url(url, headers, timeout):
+    """GET url (following redirects) and return an HttpResponse positioned at the body."""
+    return await asyncio.to_thread(_open, url, headers, timeout)
+
+
+def _parse_total(headers, offset):
+    # Content-Range: bytes 100-999/1000 (206) or plain Content-Length (200)
+    match = re.match(r"bytes\s+(\d+)-(\d+)/(\d+|\*)", headers.get("content-range", ""))
+    if match:
+        if int(match.group(1)) != offset:
+            raise DownloadError(f"Server resumed at byte {match.group(1)}, expected {offset}")
+        return int(match.group(3)) if match.group(3) != "*" else None
+    length = headers.get("content-length")
+    return int(length) if length is not None else None
+
+
+async def _fetch_to_part(url, part_path, headers, timeout, progress=None):
+    """Fetch url into part_path, resuming from any bytes already on disk.
+    Returns the total size announced by the server (or None if unknown)."""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request_headers = dict(headers)
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+    try:
+        response = await open_url(url, request_headers, timeout)
+    except HttpStatusError as e:
+        if e.code == 416 and offset:
+            # Range not satisfiable: the part file already holds the whole body
+            match = re.match(r"bytes\s+\*/(\d+)", e.headers.get("content-range", ""))
+            return int(match.group(1)) if match else offset
+        raise
+    try:
+        if response.status == 206:
+            total = _parse_total(response.headers, offset)
+            mode = "ab"
+        else:
+            # Server ignored the Range header, start over
+            total = _parse_total(response.headers, 0)
+            mode = "wb"
+        if progress:
+            progress.set_total(total)
+            progress.update(offset if mode == "ab" else 0)
+        with open(part_path, mode) as f:
+            async for chunk in response.iter_chunks():
+                f.write(chunk)
+                if progress:
+                    progress.advance(len(chunk))
+    finally:
+        response.close()
+    received = os.path.getsize(part_path)
+    if total is not None and received < total:
+        # Connection closed early; keep the part file so the retry can resume it
+        raise ConnectionError(f"connection closed at byte {received} of {total}")
+    return total
+
+
+def verify_download(path, expected_size=None, is_zip=None):
+    """Check a finished download against its expected size and, for zips, the central directory."""
+    size = os.path.getsize(path)
+    if expected_size is not None and size != expected_size:
+        raise DownloadError(f"Size mismatch: got {size} bytes, expected {expected_size}")
+    if is_zip is None:
+        is_zip = path.lower().endswith(".zip")
+    if is_zip:
+        try:
+            with zipfile.ZipFile(path, "r") as zf:
+                for info in zf.infolist():
+                    if info.header_offset + info.compress_size > size:
+                        raise DownloadError(f"Zip member {info.filename} extends past end of file")
+        except zipfile.BadZipFile as e:
+            raise DownloadError(f"Corrupt zip archive: {e}")
+
+
+async def download_file(url, dest_path, cookies=None, headers=None, log=print, expected_size=None,
+                        retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=60, progress=None, recorder=None,
+                        on_throttle=None):
+    """Download url to dest_path via a resumable .part file.
+
+    Interrupted transfers are resumed with HTTP Range requests and retried with
+    exponential backoff. The .part file is only promoted to dest_path once it
+    passes verify_download(). progress is an optional ProgressTracker;
+    recorder an optional traffic_replay.TrafficRecorder; on_throttle(code,
+    headers) is called when the server answers 429 or 503."""
+    part_path = dest_path + PART_SUFFIX
+    request_headers = dict(headers or {})
+    if cookies:
+        request_headers["Cookie"] = cookie_header(cookies)
+    attempt = 0
+    started = time.monotonic()
+    while True:
+        try:
+            total = await _fetch_to_part(url, part_path, request_headers, timeout, progress)
+            verify_download(part_path, expected_size if expected_size is not None else total,
+                            is_zip=dest_path.lower().endswith(".zip"))
+            os.replace(part_path, dest_path)
+            if progress:
+                progress.finish()
+            if recorder:
+                recorder.record_file(url, request_headers, dest_path, time.monotonic() - started)
+            return dest_path
+        except DownloadError as e:
+            # A verified-bad part file cannot be resumed, so throw it away
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            error = e
+        except HttpStatusError as e:
+            # Client errors (missing file, expired login) will not fix themselves
+            if e.code < 500 and e.code not in (408, 429):
+                if progress:
+                    progress.finish(ok=False)
+                raise DownloadError(f"HTTP {e.code} downloading {os.path.basename(dest_path)}")
+            if e.code in (429, 503) and on_throttle:
+                on_throttle(e.code, e.headers)
+            error = e
+        except (ConnectionError, asyncio.TimeoutError, OSError, ValueError, IndexError) as e:
+            error = e
+        attempt += 1
+        if attempt > retries:
+            if progress:
+                progress.finish(ok=False)
+            raise DownloadError(f"Giving up on {os.path.basename(dest_path)} after {retries} retries: {error}")
+        delay = min(backoff * (2 ** (attempt - 1)), MAX_BACKOFF)
+        done = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        log(f"[!] Download of {os.path.basename(dest_path)} interrupted ({error or type(error).__name__}); "
+            f"retry {attempt}/{retries} in {delay:.0f}s from byte {done}")
+        await asyncio.sleep(delay)
+
+
+def extract_zip(zip_path, dest_dir, progress=None):
+    """Extract zip_path into dest_dir like ZipFile.extractall, reporting uncompressed bytes to progress."""
+    root = os.path.realpath(dest_dir)
+    try:
+        with zipfile.ZipFile(zip_path, "r") as zf:
+            members = zf.infolist()
+            if progress:
+                progress.set_total(sum(info.file_size for info in members))
+            for info in members:
+                target = os.path.realpath(os.path.join(root, info.filename))
+                if os.path.commonpath([root, target]) != root:
+                    raise DownloadError(f"Zip member {info.filename} would extract outside {dest_dir}")
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zf.open(info) as src, open(target, "wb") as dst:
+                    while True:
+                        chunk = src.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        if progress:
+                            progress.advance(len(chunk))
+    except Exception:
+        if progress:
+            progress.finish(ok=False)
+        raise
+    if progress:
+        progress.finish()
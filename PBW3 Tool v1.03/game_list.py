@@ -0,0 +1,184 @@
+import os
+import tkinter as tk
+from tkinter import ttk
+from documents_index import DocumentsIndex, document_id
+from deadlines import describe_due
+
+RENDER_BATCH = 150          # rows inserted per idle slice, so a long list never blocks the window
+SEARCH_DELAY_MS = 200       # wait for typing to pause before filtering
+STATUS_REFRESH_MS = 15000   # re-read turn numbers and index snapshots this often
+FILTERS = ("All games", "Host", "Player", "Pending uploads")
+COLUMNS = (("game", "Game", 220), ("role", "Role", 60), ("turn", "Turn", 50),
+           ("pending", "Pending", 60), ("due", "Due", 70), ("account", "Account", 110))
+
+
+def pending_uploads(documents):
+    """Player files uploaded after the newest turn zip in a documents listing."""
+    zips = [document_id(d) for d in documents if d["file"].lower().endswith(".zip")]
+    newest = max((i for i in zips if i is not None), default=None)
+    return sum(1 for d in documents if d["file"].lower().endswith(".plr")
+               and (newest is None or (document_id(d) or 0) > newest))
+
+
+class StatusCache:
+    """Pending upload counts from each game's DocumentsIndex snapshot, re-read only when the file changes."""
+
+    def __init__(self, index=None):
+        self.index = index or DocumentsIndex()
+        self.entries = {}  # snapshot path -> (mtime, pending)
+
+    def pending(self, game):
+        """Pending uploads for the game, or None if it was never synced."""
+        path = self.index.path_for(game)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        cached = self.entries.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        documents = self.index.load(game)
+        pending = pending_uploads(documents) if documents is not None else None
+        self.entries[path] = (mtime, pending)
+        return pending
+
+
+class GameList(tk.Frame):
+    """Searchable, filterable game list with role, turn, pending upload and turn due columns.
+
+    Only the games matching the search and filter are inserted, in batches
+    on the Tk idle loop, so hundreds of games don't stall the window. Rows
+    can be multi-selected (Ctrl/Shift-click) to run an action on several
+    games at once."""
+
+    def __init__(self, parent, fonts, label=None, on_select=None, height=8, due=None):
+        super().__init__(parent)
+        self.label = label or (lambda game: game["display_name"])
+        self.due = due or (lambda game: None)  # epoch seconds the game's turn is due, or None
+        self.on_select = on_select
+        self.status = StatusCache()
+        self.games = []
+        self._generation = 0  # bumped on every re-render; stale batches stop
+        self._search_job = None
+        self._sort = ("game", False)
+
+        bar = tk.Frame(self)
+        bar.pack(fill=tk.X)
+        tk.Label(bar, text="Search:", font=fonts.get('default')).pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self._schedule_render())
+        tk.Entry(bar, textvariable=self.search_var, font=fonts.get('entry'), width=30).pack(side=tk.LEFT, padx=5)
+        self.filter = ttk.Combobox(bar, values=FILTERS, state="readonly", width=16, font=fonts.get('entry'))
+        self.filter.current(0)
+        self.filter.bind("<<ComboboxSelected>>", lambda e: self.render())
+        self.filter.pack(side=tk.LEFT, padx=5)
+        self.count_label = tk.Label(bar, text="", font=fonts.get('entry'))
+        self.count_label.pack(side=tk.LEFT, padx=5)
+
+        body = tk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=[c[0] for c in COLUMNS], show="headings",
+                                 selectmode="extended", height=height)
+        for name, heading, width in COLUMNS:
+            self.tree.heading(name, text=heading, command=lambda name=name: self.sort_by(name))
+            self.tree.column(name, width=width, stretch=name == "game")
+        scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<<TreeviewSelect>>", self._selected)
+        self.after(STATUS_REFRESH_MS, self._refresh_loop)
+
+    def set_games(self, games):
+        """Show a new game list, keeping the selection of games that are still in it."""
+        keep = {self._key(g) for g in self.selected()}
+        self.games = list(games)
+        self.render(select=keep)
+
+    def selected(self):
+        """The selected games, in list order."""
+        return [self.games[int(iid)] for iid in self.tree.selection() if int(iid) < len(self.games)]
+
+    def _key(self, game):
+        return game.get("account"), game.get("name") or game.get("display_name")
+
+    def _selected(self, event=None):
+        if self.on_select:
+            self.on_select(self.selected())
+
+    def _schedule_render(self):
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self.render)
+
+    def _values(self, index, game):
+        pending = self.status.pending(game)
+        return (self.label(game), game.get("role", ""), game.get("turn_number", ""),
+                "" if pending is None else pending, describe_due(self.due(game)), game.get("account", ""))
+
+    def _matches(self, game, words, view):
+        role = game.get("role", "")
+        if view == "Host" and role != "host" or view == "Player" and role != "player":
+            return False
+        if view == "Pending uploads" and not self.status.pending(game):
+            return False
+        text = f"{self.label(game)} {game.get('name', '')} {game.get('account', '')}".lower()
+        return all(word in text for word in words)
+
+    def _order(self, indexes):
+        column, descending = self._sort
+        position = [c[0] for c in COLUMNS].index(column)
+
+        def key(index):
+            if column == "due":
+                due = self.due(self.games[index])
+                return (0, due) if due is not None else (1, "")
+            value = self._values(index, self.games[index])[position]
+            return (0, value) if isinstance(value, int) else (1, str(value).lower())
+        return sorted(indexes, key=key, reverse=descending)
+
+    def sort_by(self, column):
+        column_now, descending = self._sort
+        self._sort = (column, not descending if column == column_now else False)
+        self.render()
+
+    def render(self, select=None):
+        """Rebuild the rows for the current search and filter; rows are inserted in idle-time batches."""
+        self._search_job = None
+        self._generation += 1
+        generation = self._generation
+        if select is None:
+            select = {self._key(g) for g in self.selected()}
+        self.tree.delete(*self.tree.get_children())
+        words = self.search_var.get().lower().split()
+        view = self.filter.get()
+        rows = self._order([i for i, g in enumerate(self.games) if self._matches(g, words, view)])
+        self.count_label.config(text=f"{len(rows)} of {len(self.games)} games")
+
+        def insert(start):
+            if generation != self._generation:
+                return  # the search changed; a newer render owns the tree
+            chosen = []
+            for index in rows[start:start + RENDER_BATCH]:
+                iid = self.tree.insert("", tk.END, iid=str(index), values=self._values(index, self.games[index]))
+                if self._key(self.games[index]) in select:
+                    chosen.append(iid)
+            if chosen:
+                self.tree.selection_add(chosen)
+            if start + RENDER_BATCH < len(rows):
+                self.after_idle(insert, start + RENDER_BATCH)
+            elif not self.tree.selection() and rows and not select:
+                self.tree.selection_set(str(rows[0]))
+
+        insert(0)
+
+    def refresh_status(self):
+        """Re-read the turn and pending columns of the rows on screen."""
+        for iid in self.tree.get_children():
+            index = int(iid)
+            if index < len(self.games):
+                self.tree.item(iid, values=self._values(index, self.games[index]))
+
+    def _refresh_loop(self):
+        self.refresh_status()
+        self.after(STATUS_REFRESH_MS, self._refresh_loop)
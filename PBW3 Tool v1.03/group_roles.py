@@ -0,0 +1,30 @@
+from bs4 import BeautifulSoup
+
+ROLES = ("host", "player")
+MANAGE_TAB = "#admin-groups-li"  # the group's "Manage" tab, shown only to its admins and moderators
+# The group's admin and moderator lists, in the legacy and Nouveau BuddyPress templates
+STAFF_LISTS = "#group-admins, #group-mods, .group-admins, .group-mods, .moderators-lists"
+MEMBER_BUTTONS = "a.leave-group, .leave-group"
+
+
+def group_url(game_config):
+    """The group's home page, which the documents URL sits under."""
+    url = game_config["document_url"].rstrip("/")
+    return (url[:-len("/documents")] if url.endswith("/documents") else url) + "/"
+
+
+def detect_role(html, username, url):
+    """"host" if the group page at url shows the account as an admin or moderator,
+    "player" if it shows a plain member, None when the page doesn't tell."""
+    soup = BeautifulSoup(html, "html.parser")
+    manage = url.lower() + "admin/"
+    if soup.select_one(MANAGE_TAB) is not None or \
+            any((a.get("href") or "").lower().startswith(manage) for a in soup.select("a[href]")):
+        return "host"
+    profile = f"/members/{username.lower()}/"
+    for staff in soup.select(STAFF_LISTS):
+        if any(profile in (a.get("href") or "").lower() for a in staff.select("a[href]")):
+            return "host"
+    if soup.select_one(MEMBER_BUTTONS) is not None:
+        return "player"
+    return None
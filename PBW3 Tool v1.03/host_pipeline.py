@@ -0,0 +1,226 @@
+import asyncio
+import contextlib
+import contextvars
+import fnmatch
+import os
+import shlex
+import sys
+import time
+
+TOOL_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGES = ("download", "process", "validate", "zip", "upload")
+DEFAULT_TIMEOUTS = {"download": 900, "process": 3600, "validate": 60, "zip": 900, "upload": 1800}  # seconds
+OUTPUT_TAIL_LINES = 5
+WAIT_CHECK = 1  # seconds between timeout checks while a stage waits on the user
+PROCESS_GRACE = 30  # seconds the process stage allows past the processor's own timeout, to kill it and save its output
+
+# The running stage's clock: {"waited": seconds spent on the user so far, "since": when the current wait began}
+_stage_clock = contextvars.ContextVar("stage_clock", default=None)
+
+
+class StageError(Exception):
+    """A pipeline stage failed; the game stops there and later stages are skipped."""
+
+
+@contextlib.contextmanager
+def waiting_on_user():
+    """Time in the block (a dialog the user has to answer) doesn't count towards the stage's timeout."""
+    clock = _stage_clock.get()
+    if clock is None:
+        yield
+        return
+    clock["since"] = time.monotonic()
+    try:
+        yield
+    finally:
+        clock["waited"] += time.monotonic() - clock["since"]
+        clock["since"] = None
+
+
+def processor_command(processor, game_config, turn_number):
+    """Expand the game's processor command (list or string).
+
+    Placeholders: {savegame_folder}, {game}, {turn}, {python} and {tool_dir}."""
+    command = processor["command"]
+    if isinstance(command, str):
+        command = shlex.split(command, posix=os.name != "nt")
+    values = {"savegame_folder": game_config["savegame_folder"], "game": game_config.get("name", ""),
+              "turn": turn_number if turn_number is not None else "", "python": sys.executable, "tool_dir": TOOL_DIR}
+    return [str(part).format(**values) for part in command]
+
+
+async def run_processor(command, cwd, timeout, log_path, log):
+    """Run command with stdout and stderr captured to log_path; returns the output lines.
+
+    Raises StageError on a non-zero exit or when timeout seconds pass (the
+    process is killed)."""
+    log(f"[+] Running processor: {' '.join(command)}")
+    process = await asyncio.create_subprocess_exec(*command, cwd=cwd, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.STDOUT)
+    chunks = []  # kept outside the read so whatever arrived before a kill still reaches the log
+    reader = asyncio.ensure_future(_read_all(process.stdout, chunks))
+    try:
+        await asyncio.wait_for(asyncio.shield(reader), timeout)
+        await process.wait()
+    except asyncio.TimeoutError:
+        await _kill(process, reader)
+        _write_output(log_path, b"".join(chunks))
+        raise StageError(f"processor timed out after {timeout}s (output in {log_path})")
+    except asyncio.CancelledError:
+        # the whole stage timed out or was cancelled; don't leave the processor running
+        await _kill(process, reader)
+        _write_output(log_path, b"".join(chunks))
+        raise
+    output = b"".join(chunks)
+    lines = _write_output(log_path, output)
+    for line in lines[-OUTPUT_TAIL_LINES:]:
+        log(f"    {line}")
+    if process.returncode != 0:
+        raise StageError(f"processor exited with code {process.returncode} (output in {log_path})")
+    return lines
+
+
+async def _read_all(stream, chunks):
+    while chunk := await stream.read(65536):
+        chunks.append(chunk)
+
+
+async def _kill(process, reader):
+    process.kill()
+    await process.wait()
+    await reader  # drain whatever the process wrote before it died
+
+
+def _write_output(log_path, output):
+    text = (output or b"").decode("utf-8", "replace")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return text.splitlines()
+
+
+def validate_outputs(game_config, since, expected=None):
+    """Check the processor left a fresh turn behind; returns a list of problems (empty when valid).
+
+    At least one of the game's turn files (name prefix, not .plr/.emp/.zip)
+    must have been written after since, and every pattern in expected must
+    match a file in the savegame folder."""
+    folder = game_config["savegame_folder"]
+    game = game_config.get("name", "").lower()
+    files = [f for f in os.listdir(folder) if os.path.isfile(os.path.join(folder, f))]
+    problems = []
+    turn_files = [f for f in files if f.lower().startswith(game) and not f.lower().endswith((".plr", ".emp", ".zip"))]
+    if not turn_files:
+        problems.append("no turn files in the savegame folder")
+    elif not any(os.path.getmtime(os.path.join(folder, f)) >= since for f in turn_files):
+        problems.append("no turn file was updated by the processor")
+    for pattern in expected or []:
+        if not fnmatch.filter(files, pattern):
+            problems.append(f"missing expected output '{pattern}'")
+    for f in turn_files:
+        if os.path.getsize(os.path.join(folder, f)) == 0:
+            problems.append(f"{f} is empty")
+    return problems
+
+
+def pipeline_job(game_config):
+    """Per-game state carried through the stages."""
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    timeouts.update(game_config.get("stage_timeouts", {}))
+    processor_timeout = (game_config.get("processor") or {}).get("timeout") or timeouts["process"]
+    # the processor's own timeout has to fire first so its output still gets written
+    timeouts["process"] = processor_timeout + PROCESS_GRACE
+    return {"game": game_config, "name": game_config.get("display_name", game_config.get("name", "")),
+            "timeouts": timeouts, "processor_timeout": processor_timeout, "status": "queued", "stage": None, "error": None, "stage_seconds": {}}
+
+
+class HostPipeline:
+    """Runs games through download -> process -> validate -> zip -> upload.
+
+    Each stage has one worker, so with several games queued the stages
+    overlap: one game uploads while the next is processed and a third
+    downloads. A stage is a coroutine taking the job dict; it raises
+    StageError (or anything else) to fail the game, or returns False to
+    stop it quietly (e.g. nothing new to process). Every stage runs under
+    its timeout from job["timeouts"], less any time spent in waiting_on_user()."""
+
+    def __init__(self, stages, log):
+        self.stages = stages  # [(name, coroutine function)] in order
+        self.log = log
+
+    async def _run_stage(self, name, stage, job):
+        job["stage"] = name
+        job["status"] = "running"
+        started = time.monotonic()
+        timeout = job["timeouts"].get(name)
+        clock = {"waited": 0.0, "since": None}
+        token = _stage_clock.set(clock)
+        task = asyncio.ensure_future(stage(job))  # the task keeps this context, and with it the clock
+        _stage_clock.reset(token)
+        try:
+            while True:
+                remaining = None
+                if timeout is not None:
+                    now = time.monotonic()
+                    waiting = now - clock["since"] if clock["since"] is not None else 0
+                    remaining = timeout - (now - started - clock["waited"] - waiting)
+                    if clock["since"] is not None:
+                        remaining = max(remaining, WAIT_CHECK)  # paused; look again once the user answers
+                    elif remaining <= 0:
+                        task.cancel()
+                        await asyncio.gather(task, return_exceptions=True)
+                        raise StageError(f"{name} timed out after {timeout}s")
+                done, _ = await asyncio.wait({task}, timeout=remaining)
+                if done:
+                    result = task.result()
+                    break
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            job["stage_seconds"][name] = time.monotonic() - started
+        return result is not False
+
+    async def _worker(self, index, queues):
+        name, stage = self.stages[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            job = await inbox.get()
+            if job is None:
+                if outbox:
+                    await outbox.put(None)
+                return
+            try:
+                proceed = await self._run_stage(name, stage, job)
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+                self.log(f"[!] {job['name']}: {name} failed: {e}")
+                continue
+            if not proceed:
+                job["status"] = "stopped"
+                self.log(f"[+] {job['name']}: stopped after {name}.")
+            elif outbox:
+                job["status"] = "queued"
+                await outbox.put(job)
+            else:
+                job["status"] = "done"
+                self.log(f"[+] {job['name']}: pipeline complete in {sum(job['stage_seconds'].values()):.0f}s.")
+
+    async def run(self, jobs):
+        """Push every job through the stages; returns the jobs with status, error and stage_seconds."""
+        queues = [asyncio.Queue() for _ in self.stages]
+        workers = [asyncio.ensure_future(self._worker(i, queues)) for i in range(len(self.stages))]
+        for job in jobs:
+            await queues[0].put(job)
+        await queues[0].put(None)
+        await asyncio.gather(*workers)
+        self._log_summary(jobs)
+        return jobs
+
+    def _log_summary(self, jobs):
+        for job in jobs:
+            timings = ", ".join(f"{stage} {seconds:.0f}s" for stage, seconds in job["stage_seconds"].items())
+            outcome = job["status"] if not job["error"] else f"{job['status']} at {job['stage']}: {job['error']}"
+            self.log(f"[+] Pipeline {job['name']}: {outcome} ({timings})")
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 4 * 1024 * 1024
+MAX_WORKERS = min(8, os.cpu_count() or 2)
+IGNORED_FILES = {MANIFEST_NAME, MANIFEST_NAME + ".tmp"}
+
+
+def sha256_file(path):
+    """SHA-256 of path, read in fixed chunks into one reused buffer so multi-GB files use no extra memory."""
+    digest = hashlib.sha256()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])  # hashlib drops the GIL here, so threads hash in parallel
+    return digest.hexdigest()
+
+
+def hash_files(paths, workers=MAX_WORKERS):
+    """{path: {"sha256", "size", "mtime"}} for every path, hashed on a thread pool."""
+    def one(path):
+        stat = os.stat(path)
+        return path, {"sha256": sha256_file(path), "size": stat.st_size, "mtime": stat.st_mtime}
+    paths = list(paths)
+    if len(paths) <= 1:
+        return dict(one(p) for p in paths)
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return dict(pool.map(one, paths))
+
+
+def manifest_path(folder):
+    return os.path.join(folder, MANIFEST_NAME)
+
+
+def load_manifest(folder):
+    path = manifest_path(folder)
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            pass  # damaged manifest: start a new one; verify will re-hash everything
+    return {"version": 1, "files": {}, "transfers": []}
+
+
+def save_manifest(folder, manifest):
+    path = manifest_path(folder)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def record_files(folder, sources=None, names=None):
+    """Hash files in folder into its manifest. sources maps file name -> URL it came from.
+
+    names limits it to those files (default: every file in the folder)."""
+    sources = sources or {}
+    if names is None:
+        names = [n for n in os.listdir(folder) if n not in IGNORED_FILES and os.path.isfile(os.path.join(folder, n))]
+    manifest = load_manifest(folder)
+    hashed = hash_files(os.path.join(folder, n) for n in names)
+    now = time.time()
+    for path, info in hashed.items():
+        name = os.path.basename(path)
+        previous = manifest["files"].get(name, {})
+        info["source"] = sources.get(name, previous.get("source"))
+        info["recorded"] = now
+        manifest["files"][name] = info
+    save_manifest(folder, manifest)
+    return manifest
+
+
+def record_transfers(folder, direction, files, sources=None):
+    """Log uploads or downloads of files kept elsewhere (e.g. the turn zip, deleted once uploaded).
+
+    files are full paths, hashed now; sources maps file name -> URL."""
+    sources = sources or {}
+    os.makedirs(folder, exist_ok=True)
+    manifest = load_manifest(folder)
+    now = time.time()
+    for path, info in hash_files(files).items():
+        name = os.path.basename(path)
+        manifest["transfers"].append({"direction": direction, "name": name, "sha256": info["sha256"],
+                                      "size": info["size"], "source": sources.get(name), "at": now})
+    save_manifest(folder, manifest)
+    return manifest
+
+
+def verify_folder(folder, full=False, update=True):
+    """Re-check folder against its manifest.
+
+    Only files whose size or mtime differ from the manifest are re-hashed,
+    unless full. Returns {"ok", "changed", "missing", "unlisted", "hashed",
+    "skipped"} (lists of file names, counts for hashed/skipped). With update,
+    files that still match get their new mtime stored so the next verify
+    skips them."""
+    manifest = load_manifest(folder)
+    files = manifest["files"]
+    present = {n for n in os.listdir(folder) if n not in IGNORED_FILES and os.path.isfile(os.path.join(folder, n))}
+    report = {"ok": [], "changed": [], "missing": sorted(set(files) - present),
+              "unlisted": sorted(present - set(files)), "hashed": 0, "skipped": 0}
+    suspects = []
+    for name in sorted(set(files) & present):
+        stat = os.stat(os.path.join(folder, name))
+        expected = files[name]
+        if stat.st_size != expected["size"]:
+            report["changed"].append(name)
+        elif full or stat.st_mtime != expected.get("mtime"):
+            suspects.append(name)
+        else:
+            report["ok"].append(name)
+            report["skipped"] += 1
+    touched = False
+    for path, info in hash_files(os.path.join(folder, n) for n in suspects).items():
+        name = os.path.basename(path)
+        report["hashed"] += 1
+        if info["sha256"] == files[name]["sha256"]:
+            report["ok"].append(name)
+            if files[name].get("mtime") != info["mtime"]:
+                files[name]["mtime"] = info["mtime"]
+                touched = True
+        else:
+            report["changed"].append(name)
+    if update and touched:
+        save_manifest(folder, manifest)
+    report["ok"].sort()
+    report["changed"].sort()
+    return report
+
+
+def describe_verify(folder, report):
+    status = "OK" if not report["changed"] and not report["missing"] else "PROBLEMS"
+    lines = [f"[+] {folder}: {status} - {len(report['ok'])} ok, {len(report['changed'])} changed, "
+             f"{len(report['missing'])} missing, {len(report['unlisted'])} unlisted "
+             f"({report['hashed']} hashed, {report['skipped']} unchanged)"]
+    for key, label in (("changed", "changed"), ("missing", "missing"), ("unlisted", "not in manifest")):
+        for name in report[key]:
+            lines.append(f"    {label}: {name}")
+    return lines
@@ -0,0 +1,254 @@
+import contextlib
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from app_paths import METRICS_PATH
+
+SLOW_FACTOR = 1.5      # a step is flagged when a time-of-day slot or the last week is this much slower than usual
+MIN_SAMPLES = 3        # fewest samples behind a percentile before it is compared
+TREND_DAYS = 7
+DAY_PARTS = (("night", 0, 6), ("morning", 6, 12), ("afternoon", 12, 18), ("evening", 18, 24))
+
+_current = contextvars.ContextVar("pbw3_metrics_operation", default=None)
+
+
+class Operation:
+    """Timing of one host or player operation: total duration, bytes transferred and a step breakdown.
+
+    Steps nest ("upload/zip"); bytes added while a step is open count for it
+    and for every step around it. Each step also notes the process CPU time
+    it took, for profiler.py."""
+
+    def __init__(self, kind, game, turn=None, account=None):
+        self.kind = kind
+        self.game = game
+        self.turn = turn
+        self.account = account
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.seconds = None
+        self.bytes = 0
+        self.ok = True
+        self.discarded = False
+        self.steps = []
+        self._open = []
+
+    @contextlib.contextmanager
+    def step(self, name):
+        if self._open:
+            name = f"{self._open[-1]['name']}/{name}"
+        entry = {"name": name, "bytes": 0, "start": time.monotonic(), "cpu": time.process_time()}
+        self._open.append(entry)
+        try:
+            yield entry
+        finally:
+            self._open.remove(entry)
+            entry["seconds"] = time.monotonic() - entry.pop("start")
+            entry["cpu"] = time.process_time() - entry["cpu"]
+            self.steps.append(entry)
+
+    def add_bytes(self, count):
+        self.bytes += count
+        for entry in self._open:
+            entry["bytes"] += count
+
+    def finish(self, ok=True):
+        self.ok = ok
+        self.seconds = time.monotonic() - self._start
+        return self
+
+
+def begin(operation):
+    """Make operation the current one for step()/add_bytes()/set_turn() in this task; returns a reset token."""
+    return _current.set(operation)
+
+
+def end(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def step(name):
+    """Time a step of the current operation; a no-op outside one."""
+    operation = _current.get()
+    return operation.step(name) if operation else contextlib.nullcontext()
+
+
+def add_bytes(count):
+    operation = _current.get()
+    if operation and count:
+        operation.add_bytes(count)
+
+
+def set_turn(turn):
+    operation = _current.get()
+    if operation and turn is not None:
+        operation.turn = int(turn)
+
+
+def discard():
+    """Don't store the current operation (e.g. it found nothing to do and would skew the percentiles)."""
+    operation = _current.get()
+    if operation:
+        operation.discarded = True
+
+
+def mark_failed():
+    operation = _current.get()
+    if operation:
+        operation.ok = False
+
+
+def percentile(values, p):
+    """p-th percentile (0-100) of values with linear interpolation, or None when empty."""
+    values = sorted(values)
+    if not values:
+        return None
+    k = (len(values) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def day_part(timestamp):
+    hour = time.localtime(timestamp).tm_hour
+    return next(name for name, start, stop in DAY_PARTS if start <= hour < stop)
+
+
+class MetricsStore:
+    """SQLite history of operations and their steps, keyed by game and turn."""
+
+    def __init__(self, path=METRICS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS operations (
+                id INTEGER PRIMARY KEY, game TEXT, turn INTEGER, kind TEXT, account TEXT,
+                started REAL, seconds REAL, bytes INTEGER, ok INTEGER)""")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS steps (
+                operation_id INTEGER REFERENCES operations(id) ON DELETE CASCADE,
+                name TEXT, seconds REAL, bytes INTEGER)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS operations_game ON operations (game, kind, started)")
+
+    def record(self, operation):
+        if operation.discarded or operation.seconds is None:
+            return None
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO operations (game, turn, kind, account, started, seconds, bytes, ok) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (operation.game, operation.turn, operation.kind, operation.account, operation.started,
+                 operation.seconds, operation.bytes, int(operation.ok)))
+            self._db.executemany("INSERT INTO steps (operation_id, name, seconds, bytes) VALUES (?, ?, ?, ?)",
+                                 [(cursor.lastrowid, s["name"], s["seconds"], s["bytes"]) for s in operation.steps])
+            return cursor.lastrowid
+
+    def operations(self, game=None, since=None):
+        """[{id, game, turn, kind, account, started, seconds, bytes, ok, steps: [{name, seconds, bytes}]}], oldest first."""
+        where = "WHERE 1=1"
+        params = []
+        if game:
+            where += " AND game = ?"
+            params.append(game)
+        if since:
+            where += " AND started >= ?"
+            params.append(since)
+        with self._lock:
+            rows = self._db.execute("SELECT id, game, turn, kind, account, started, seconds, bytes, ok "
+                                    f"FROM operations {where} ORDER BY started", params).fetchall()
+            steps = {}
+            for operation_id, name, seconds, count in self._db.execute(
+                    "SELECT operation_id, name, seconds, bytes FROM steps WHERE operation_id IN "
+                    f"(SELECT id FROM operations {where})", params):
+                steps.setdefault(operation_id, []).append({"name": name, "seconds": seconds, "bytes": count})
+        keys = ("id", "game", "turn", "kind", "account", "started", "seconds", "bytes", "ok")
+        return [dict(zip(keys, row), steps=steps.get(row[0], [])) for row in rows]
+
+    def report(self, game=None, days=90, now=None):
+        """Per game and operation kind: p50/p95 cycle time, the last-week trend and steps that stand out.
+
+        Returns [{game, kind, count, failed, p50, p95, recent_p50, earlier_p50,
+        bytes_p50, steps: [{name, p50, p95}], slow: [text]}]. A step is slow
+        when its p50 in one part of the day (night, morning, ...) is SLOW_FACTOR
+        times its overall p50, or its last TREND_DAYS p50 is that much above
+        the days before."""
+        now = now or time.time()
+        groups = {}
+        for op in self.operations(game, now - days * 86400):
+            groups.setdefault((op["game"], op["kind"]), []).append(op)
+        report = []
+        for (game_name, kind), ops in sorted(groups.items()):
+            done = [op for op in ops if op["ok"]]
+            cutoff = now - TREND_DAYS * 86400
+            recent = [op["seconds"] for op in done if op["started"] >= cutoff]
+            earlier = [op["seconds"] for op in done if op["started"] < cutoff]
+            entry = {"game": game_name, "kind": kind, "count": len(ops), "failed": len(ops) - len(done),
+                     "p50": percentile([op["seconds"] for op in done], 50),
+                     "p95": percentile([op["seconds"] for op in done], 95),
+                     "recent_p50": percentile(recent, 50), "earlier_p50": percentile(earlier, 50),
+                     "bytes_p50": percentile([op["bytes"] for op in done], 50), "steps": [], "slow": []}
+            # (started, seconds) per step; None is the whole cycle
+            samples = {None: [(op["started"], op["seconds"]) for op in done]}
+            for op in done:
+                for item in op["steps"]:
+                    samples.setdefault(item["name"], []).append((op["started"], item["seconds"]))
+            for name, points in samples.items():
+                overall = percentile([s for _, s in points], 50)
+                if name is not None:
+                    entry["steps"].append({"name": name, "p50": overall, "p95": percentile([s for _, s in points], 95)})
+                label = name or "whole cycle"
+                if len(points) < MIN_SAMPLES * 2 or not overall:
+                    continue
+                for part, _, _ in DAY_PARTS:
+                    slot = [s for started, s in points if day_part(started) == part]
+                    if len(slot) >= MIN_SAMPLES and percentile(slot, 50) >= overall * SLOW_FACTOR:
+                        entry["slow"].append(f"{label} is {percentile(slot, 50) / overall:.1f}x slower at {part}")
+                latest = [s for started, s in points if started >= cutoff]
+                older = [s for started, s in points if started < cutoff]
+                if len(latest) >= MIN_SAMPLES and len(older) >= MIN_SAMPLES and \
+                        percentile(latest, 50) >= percentile(older, 50) * SLOW_FACTOR:
+                    entry["slow"].append(f"{label} is {percentile(latest, 50) / percentile(older, 50):.1f}x "
+                                         f"slower over the last {TREND_DAYS} days")
+            entry["steps"].sort(key=lambda s: -s["p50"])
+            report.append(entry)
+        return report
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _seconds(value):
+    if value is None:
+        return "-"
+    if value >= 60:
+        return f"{value / 60:.1f}m"
+    return f"{value:.1f}s"
+
+
+def describe_metrics(report):
+    """Log lines for MetricsStore.report(); slow steps are marked with [!]."""
+    if not report:
+        return ["[+] No turn metrics recorded yet."]
+    lines = []
+    for entry in report:
+        trend = ""
+        if entry["recent_p50"] is not None and entry["earlier_p50"]:
+            change = (entry["recent_p50"] / entry["earlier_p50"] - 1) * 100
+            trend = f", last {TREND_DAYS}d p50 {_seconds(entry['recent_p50'])} ({change:+.0f}%)"
+        size = f", p50 {entry['bytes_p50'] / 1048576:.1f} MB" if entry["bytes_p50"] else ""
+        lines.append(f"[+] {entry['game']} {entry['kind']}: {entry['count']} run(s), {entry['failed']} failed; "
+                     f"p50 {_seconds(entry['p50'])}, p95 {_seconds(entry['p95'])}{trend}{size}")
+        for item in entry["steps"][:6]:
+            lines.append(f"    {item['name']}: p50 {_seconds(item['p50'])}, p95 {_seconds(item['p95'])}")
+        for text in entry["slow"]:
+            lines.append(f"[!]   {text}")
+    return lines
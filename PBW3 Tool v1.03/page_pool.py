@@ -0,0 +1,140 @@
+import asyncio
+import time
+from rate_limiter import RateLimiter, BACKGROUND, priority
+
+DEFAULT_MAX_PAGES = 4
+DEFAULT_MAX_AGE = 60        # seconds a warm page may be served without reloading
+DEFAULT_IDLE_TIMEOUT = 900  # seconds unused before a page is closed
+MAINTAIN_INTERVAL = 1.0     # seconds between background passes
+WARM_PROFILE = "upload"     # loads the upload form's scripts, so one warm page serves every command
+
+
+class PagePool:
+    """Keeps pages parked on each active game's documents URL.
+
+    A background task (run()) reloads pages before they go stale and closes
+    idle ones, so acquire() can normally hand a page out without navigating.
+    A page is never served older than max_age seconds, and pages a command
+    is holding are left alone until release()."""
+
+    def __init__(self, context, resource_policy, log, max_pages=DEFAULT_MAX_PAGES,
+                 max_age=DEFAULT_MAX_AGE, idle_timeout=DEFAULT_IDLE_TIMEOUT, limiter=None):
+        self.context = context
+        self.limiter = limiter or RateLimiter({"enabled": False})
+        self.resource_policy = resource_policy
+        self.log = log
+        self.max_pages = max(1, int(max_pages))
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.entries = {}  # url -> {"page", "loaded", "used", "busy", "lock"}
+        self.closed = False
+
+    async def _navigate(self, entry, url):
+        async with self.limiter.slot(url):
+            await entry["page"].goto(url, wait_until="domcontentloaded")
+        entry["loaded"] = time.monotonic()
+        entry["landed"] = entry["page"].url  # after redirects, to spot pages a command navigated away
+
+    async def _evict(self, url, reason):
+        entry = self.entries.pop(url, None)
+        if entry:
+            try:
+                await entry["page"].close()
+            except Exception:
+                pass
+            self.log(f"[Xintis] Closed warm page for {url} ({reason}).")
+
+    async def _entry(self, url):
+        entry = self.entries.get(url)
+        if entry and entry["page"].is_closed():
+            self.entries.pop(url)
+            entry = None
+        if entry is None:
+            idle = [u for u, e in self.entries.items() if not e["busy"]]
+            while len(self.entries) >= self.max_pages and idle:
+                oldest = min(idle, key=lambda u: self.entries[u]["used"])
+                idle.remove(oldest)
+                await self._evict(oldest, "pool full")
+            page = await self.context.new_page()
+            self.resource_policy.assign(page, WARM_PROFILE)
+            entry = {"page": page, "loaded": 0.0, "used": time.monotonic(), "busy": False, "lock": asyncio.Lock()}
+            self.entries[url] = entry
+        return entry
+
+    async def warm(self, urls):
+        """Open (or keep) a page for each url, up to max_pages, loading them concurrently."""
+        async def warm_one(url):
+            entry = await self._entry(url)
+            async with entry["lock"]:
+                if not entry["busy"] and time.monotonic() - entry["loaded"] > self.max_age:
+                    await self._navigate(entry, url)
+        await asyncio.gather(*(warm_one(url) for url in list(urls)[:self.max_pages]), return_exceptions=True)
+
+    async def acquire(self, url):
+        """Return a page showing url, loaded no more than max_age seconds ago. Call release() after."""
+        entry = await self._entry(url)
+        await entry["lock"].acquire()
+        if entry["page"].is_closed():
+            # Evicted while we waited (failed background refresh); start over with a new page
+            entry["lock"].release()
+            return await self.acquire(url)
+        entry["busy"] = True
+        entry["used"] = time.monotonic()
+        try:
+            if entry["page"].url != entry.get("landed") or time.monotonic() - entry["loaded"] > self.max_age:
+                await self._navigate(entry, url)
+        except Exception:
+            self.release(url)
+            raise
+        return entry["page"]
+
+    def release(self, url, modified=False):
+        """Hand a page back. modified=True when the command changed the listing or navigated away."""
+        entry = self.entries.get(url)
+        if entry and entry["busy"]:
+            entry["busy"] = False
+            entry["used"] = time.monotonic()
+            if modified:
+                entry["loaded"] = 0.0
+            entry["lock"].release()
+
+    def invalidate(self, url):
+        """The listing at url changed behind the pool's back (e.g. over HTTP); reload before serving it again."""
+        entry = self.entries.get(url)
+        if entry:
+            entry["loaded"] = 0.0
+
+    async def maintain(self):
+        """One housekeeping pass: drop unused pages and refresh the stalest idle one."""
+        now = time.monotonic()
+        for url in [u for u, e in self.entries.items() if not e["busy"] and now - e["used"] > self.idle_timeout]:
+            await self._evict(url, "idle")
+        # Refresh a bit before the bound so acquire() rarely has to wait
+        stale = [u for u, e in self.entries.items() if not e["busy"] and now - e["loaded"] > self.max_age * 0.75]
+        if stale:
+            url = min(stale, key=lambda u: self.entries[u]["loaded"])
+            entry = self.entries[url]
+            async with entry["lock"]:
+                try:
+                    await self._navigate(entry, url)
+                except Exception as e:
+                    await self._evict(url, f"refresh failed: {e}")
+
+    async def run(self, is_active):
+        """Background loop; is_active() gates refreshes (e.g. until logged in)."""
+        with priority(BACKGROUND):
+            await self._maintain_loop(is_active)
+
+    async def _maintain_loop(self, is_active):
+        while not self.closed:
+            await asyncio.sleep(MAINTAIN_INTERVAL)
+            if is_active():
+                try:
+                    await self.maintain()
+                except Exception as e:
+                    self.log(f"[Xintis] Warm page maintenance failed: {e}")
+
+    async def close(self):
+        self.closed = True
+        for url in list(self.entries):
+            await self._evict(url, "shutdown")
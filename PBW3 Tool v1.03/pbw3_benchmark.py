@@ -0,0 +1,379 @@
+# PBW3 Tool benchmarks. Run from the tool folder, e.g.:
+#   python pbw3_benchmark.py pages --game eoefm --runs 5
+#   python pbw3_benchmark.py record --game eoefm --command player_download --archive eoefm.har
+#   python pbw3_benchmark.py replay --game eoefm --command player_download --archive eoefm.har --latency-scale 0
+#   python pbw3_benchmark.py replay --game eoefm --command host_download --archive eoefm.har --backend mock
+#   python pbw3_benchmark.py parse --archive eoefm.har
+#   python pbw3_benchmark.py zip --game eoefm --runs 3
+#   python pbw3_benchmark.py startup --runs 5
+import argparse
+import asyncio
+import copy
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from playwright.async_api import async_playwright
+from app_paths import CONFIG_PATH
+from resource_policy import PROFILES, ResourcePolicy
+from traffic_replay import TrafficRecorder, TrafficReplayer, load_archive, entry_body
+from documents_index import DocumentsIndex, parse_listing
+from download_manager import download_file
+from pbw3_host_mode import turn_zip_members
+from zip_engine import ENGINES, DEFAULT_LEVEL, DEFAULT_WORKERS, DEFAULT_CHUNK_MB, write_zip
+from startup import StartupGraph, read_config, cached_games, warm_browser
+
+LOGIN_URL = "https://www.pbw3.net/wp-login.php"
+
+
+def load_config(path=CONFIG_PATH):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def find_game(config, name):
+    for game in config.get("games", []):
+        if name in (game.get("name"), game.get("display_name")):
+            return game
+    raise SystemExit(f"Game '{name}' not found in {CONFIG_PATH}")
+
+
+async def login_state(browser, username, password):
+    """Log in once and return the storage state so each profile starts authenticated."""
+    context = await browser.new_context()
+    page = await context.new_page()
+    await page.goto(LOGIN_URL)
+    await page.fill("input#user_login", username)
+    await page.fill("input#user_pass", password)
+    await page.click("input[type='submit']")
+    await page.wait_for_load_state("networkidle")
+    state = await context.storage_state()
+    await context.close()
+    return state
+
+
+async def measure_profile(browser, state, url, profile, runs):
+    """Load url runs times in a fresh context under profile; return per-run seconds and bytes."""
+    context = await browser.new_context(storage_state=state)
+    policy = ResourcePolicy({"benchmark": profile})
+    await policy.install(context)
+    page = await context.new_page()
+    policy.use("benchmark", page)
+    transferred = {"bytes": 0}
+
+    async def on_finished(request):
+        try:
+            sizes = await request.sizes()
+            transferred["bytes"] += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        except Exception:
+            pass
+
+    page.on("requestfinished", on_finished)
+    seconds = []
+    byte_counts = []
+    for _ in range(runs):
+        transferred["bytes"] = 0
+        start = time.perf_counter()
+        await page.goto(url, wait_until="load")
+        seconds.append(time.perf_counter() - start)
+        byte_counts.append(transferred["bytes"])
+    stats = policy.stats()
+    await context.close()
+    return seconds, byte_counts, stats
+
+
+async def run_profiles(args, creds, url, profiles):
+    async with async_playwright() as p:
+        launch = {"headless": True}
+        if args.browser_path:
+            launch["executable_path"] = args.browser_path
+        browser = await p.chromium.launch(**launch)
+        state = await login_state(browser, creds["username"], creds["password"])
+        results = {}
+        for profile in profiles:
+            results[profile] = await measure_profile(browser, state, url, profile, args.runs)
+        await browser.close()
+    return results
+
+
+def bench_pages(args):
+    config = load_config()
+    creds = (config.get("accounts") or [config.get("credentials", {})])[0]
+    url = find_game(config, args.game)["document_url"] if args.game else args.url
+    profiles = args.profiles.split(",")
+    for profile in profiles:
+        if profile not in PROFILES:
+            raise SystemExit(f"Unknown profile '{profile}'. Choose from: {', '.join(PROFILES)}")
+    results = asyncio.run(run_profiles(args, creds, url, profiles))
+
+    baseline = statistics.mean(results["full"][1]) if "full" in results else None
+    print(f"Page load benchmark: {url} ({args.runs} runs per profile)")
+    print(f"{'profile':<10} {'p50 ms':>8} {'mean ms':>8} {'mean KB':>9} {'blocked':>8} {'KB saved':>9}")
+    for profile, (seconds, byte_counts, stats) in results.items():
+        mean_kb = statistics.mean(byte_counts) / 1024
+        saved = f"{(baseline - statistics.mean(byte_counts)) / 1024:9.1f}" if baseline is not None else f"{'n/a':>9}"
+        print(f"{profile:<10} {statistics.median(seconds) * 1000:8.0f} {statistics.mean(seconds) * 1000:8.0f} "
+              f"{mean_kb:9.1f} {stats['blocked']:8d} {saved}")
+
+
+SESSION_COMMANDS = ("host_download", "host_upload", "player_download", "player_upload",
+                    "refresh_game_list", "check_documents")
+
+
+def run_session(args, config, recorder=None, replayer=None, backend=None):
+    """Log in and run args.command once through a Xintis session; returns the command's seconds.
+
+    The game's savegame folder and documents snapshot are swapped for scratch
+    copies, so neither recording nor replaying touches the user's real files."""
+    from session_engine import SessionEngine
+    from session_worker import Xintis
+    creds = (config.get("accounts") or [config.get("credentials", {})])[0]
+    game = copy.deepcopy(find_game(config, args.game))
+    scratch = tempfile.mkdtemp(prefix="pbw3_bench_")
+    game["savegame_folder"] = args.savegame_folder or os.path.join(scratch, "savegame")
+    os.makedirs(game["savegame_folder"], exist_ok=True)
+    engine = SessionEngine(args.browser, args.browser_path, print, rate_limit=config.get("rate_limit"),
+                           launch_browser=not (backend and backend.browserless))
+    worker = Xintis(print, args.browser, args.browser_path,
+                    resource_profiles=config.get("resource_profiles"), page_pool_settings=config.get("page_pool"),
+                    engine=engine, recorder=recorder, replayer=replayer, backend=backend)
+    worker.documents_index = DocumentsIndex(os.path.join(scratch, "documents"))
+    worker.set_confirm_delete_callback(lambda files, on_confirm: on_confirm(args.delete))
+    try:
+        worker.start()
+        worker.login(creds["username"], creds["password"]).result()
+        start = time.perf_counter()
+        if args.command == "refresh_game_list":
+            worker.refresh_game_list(lambda games: None).result()
+        else:
+            getattr(worker, args.command)(game).result()
+        return time.perf_counter() - start
+    finally:
+        worker.stop().result()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def bench_record(args):
+    run_session(args, load_config(), recorder=TrafficRecorder(args.archive))
+
+
+def bench_replay(args):
+    from turn_engine import make_backend
+    config = load_config()
+    seconds = []
+    for run in range(args.runs):
+        replayer = TrafficReplayer(args.archive, latency_scale=args.latency_scale)
+        seconds.append(run_session(args, config, replayer=replayer, backend=make_backend(args.backend)))
+        stats = replayer.stats()
+        print(f"run {run + 1}: {seconds[-1] * 1000:.0f} ms, {stats['served']} served, {stats['misses']} misses")
+        for miss in replayer.misses[:5]:
+            print(f"  not in archive: {miss}")
+    print(f"Replay of {args.command} x{args.runs} (latency x{args.latency_scale}): "
+          f"p50 {statistics.median(seconds) * 1000:.0f} ms, mean {statistics.mean(seconds) * 1000:.0f} ms")
+
+
+def bench_parse(args):
+    """Time parse_listing() on every documents page in the archive; no browser or network needed."""
+    pages = [e for e in load_archive(args.archive)
+             if e["request"]["method"] == "GET" and "/documents" in e["request"]["url"]
+             and "html" in e["response"].get("content", {}).get("mimeType", "")]
+    if not pages:
+        raise SystemExit(f"No documents pages in {args.archive}")
+    print(f"{'page':<60} {'docs':>5} {'p50 ms':>8} {'mean ms':>8}")
+    for entry in pages:
+        html = entry_body(entry).decode("utf-8", "replace")
+        seconds = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            documents = parse_listing(html)
+            seconds.append(time.perf_counter() - start)
+        print(f"{entry['request']['url'][-60:]:<60} {len(documents):5d} {statistics.median(seconds) * 1000:8.2f} "
+              f"{statistics.mean(seconds) * 1000:8.2f}")
+
+
+def bench_transport(args):
+    """Re-download every archived file through download_manager from a local replay server."""
+    async def run():
+        replayer = TrafficReplayer(args.archive, latency_scale=args.latency_scale)
+        await replayer.serve()
+        downloads = [e for e in load_archive(args.archive) if e.get("_source") == "http"]
+        if not downloads:
+            raise SystemExit(f"No downloads in {args.archive}")
+        scratch = tempfile.mkdtemp(prefix="pbw3_bench_")
+        try:
+            for run in range(args.runs):
+                replayer.cursors.clear()
+                start = time.perf_counter()
+                await asyncio.gather(*(download_file(replayer.local_url(e["request"]["url"]),
+                                                     os.path.join(scratch, f"{run}_{i}"), log=lambda m: None)
+                                       for i, e in enumerate(downloads)))
+                seconds = time.perf_counter() - start
+                size = sum(len(entry_body(e)) for e in downloads)
+                print(f"run {run + 1}: {len(downloads)} files, {size / 1024:.0f} KB in {seconds * 1000:.0f} ms "
+                      f"({size / 1024 / 1024 / seconds:.1f} MB/s)")
+        finally:
+            await replayer.close()
+            shutil.rmtree(scratch, ignore_errors=True)
+    asyncio.run(run())
+
+
+def bench_zip(args):
+    """Build the game's turn zip with each engine into a scratch folder; compare size and time."""
+    game = find_game(load_config(), args.game)
+    if args.savegame_folder:
+        game = dict(game, savegame_folder=args.savegame_folder)
+    members = turn_zip_members(game)
+    if not members:
+        raise SystemExit(f"No turn files for {args.game} in {game['savegame_folder']}")
+    total = sum(os.path.getsize(path) for path, _ in members)
+    print(f"{len(members)} turn files, {total / 1048576:.1f} MB")
+    print(f"{'engine':<10} {'MB':>8} {'ratio':>6} {'p50 s':>7} {'min s':>7} {'MB/s':>7}")
+    scratch = tempfile.mkdtemp(prefix="pbw3_bench_")
+    try:
+        for engine in args.engines.split(","):
+            settings = {"engine": engine, "level": args.level, "workers": args.workers, "chunk_mb": args.chunk_mb}
+            zip_path = os.path.join(scratch, f"{engine}.zip")
+            seconds = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                write_zip(zip_path, members, settings)
+                seconds.append(time.perf_counter() - start)
+            with zipfile.ZipFile(zip_path) as zf:
+                if zf.testzip() is not None:
+                    raise SystemExit(f"{engine} produced a corrupt zip")
+            size = os.path.getsize(zip_path)
+            print(f"{engine:<10} {size / 1048576:8.1f} {size / total:6.2f} {statistics.median(seconds):7.2f} "
+                  f"{min(seconds):7.2f} {total / 1048576 / statistics.median(seconds):7.1f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def startup_run(args, workers):
+    """One headless pass over the app's background start-up steps; returns the finished StartupGraph."""
+    from metrics_store import MetricsStore
+    from turn_engine import TurnEngine
+    state = {}
+    graph = StartupGraph(log=print, workers=workers)
+    graph.add("Reading settings", lambda: state.update(config=read_config()))
+    graph.add("Opening turn metrics", lambda: state.update(metrics=MetricsStore()))
+    graph.add("Reading saved games", lambda: cached_games(state["config"]), requires=("Reading settings",),
+              essential=True)
+    if args.browser_launch:
+        graph.add("Launching browser", lambda: warm_browser(state.setdefault("engine", TurnEngine(
+            state["config"], lambda message: None, browser_type=args.browser, browser_path=args.browser_path,
+            metrics=state["metrics"]))), requires=("Reading settings", "Opening turn metrics"))
+    try:
+        return graph.run()
+    finally:
+        if "engine" in state:
+            state["engine"].close()
+        if state.get("metrics"):
+            state["metrics"].close()
+
+
+def bench_startup(args):
+    """Time the app's cold start: importing the UI module, then the background start-up steps,
+    run as a graph and one at a time."""
+    if read_config() is None:
+        raise SystemExit(f"No config at {CONFIG_PATH}; start the tool once first")
+    imports = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import pbw_interface"], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        imports.append(time.perf_counter() - start)
+    print(f"import pbw_interface (new interpreter): p50 {statistics.median(imports):.2f}s, min {min(imports):.2f}s")
+    for label, workers in (("graph", args.workers), ("one at a time", 1)):
+        ready, done, steps = [], [], {}
+        for _ in range(args.runs):
+            graph = startup_run(args, workers)
+            ready.append(graph.ready_at - graph.started)
+            done.append(graph.done_at - graph.started)
+            for name, _, seconds, _ in graph.timings():
+                steps.setdefault(name, []).append(seconds)
+        print(f"{label}: game list ready p50 {statistics.median(ready):.2f}s, "
+              f"all steps p50 {statistics.median(done):.2f}s")
+        for name, seconds in steps.items():
+            print(f"    {name:<24} p50 {statistics.median(seconds):.3f}s")
+
+
+def add_session_args(parser):
+    parser.add_argument("--game", required=True, help="game name from the config")
+    parser.add_argument("--command", choices=SESSION_COMMANDS, required=True)
+    parser.add_argument("--archive", required=True, help="HAR archive path")
+    parser.add_argument("--browser", choices=("chrome", "edge", "firefox"), default="chrome")
+    parser.add_argument("--browser-path", help="browser executable (defaults to Playwright's own)")
+    parser.add_argument("--savegame-folder", help="folder to use as the game's savegame folder (default: scratch)")
+    parser.add_argument("--delete", action="store_true", help="answer yes to deleting files from the server")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PBW3 Tool benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pages = sub.add_parser("pages", help="page-load time and bytes per resource profile")
+    target = pages.add_mutually_exclusive_group(required=True)
+    target.add_argument("--game", help="game name from the config; benchmarks its documents page")
+    target.add_argument("--url", help="page to load")
+    pages.add_argument("--runs", type=int, default=5)
+    pages.add_argument("--profiles", default="full,upload,listing",
+                       help="comma separated resource profiles; include 'full' to report bytes saved")
+    pages.add_argument("--browser-path", help="Chrome/Edge executable (defaults to Playwright's Chromium)")
+    pages.set_defaults(func=bench_pages)
+
+    record = sub.add_parser("record", help="run one command against the live site and save its traffic, "
+                                           "credentials scrubbed (uploads and deletes are real)")
+    add_session_args(record)
+    record.set_defaults(func=bench_record)
+
+    replay = sub.add_parser("replay", help="time a command against a recorded archive instead of the live site")
+    add_session_args(replay)
+    replay.add_argument("--runs", type=int, default=5)
+    replay.add_argument("--latency-scale", type=float, default=1.0,
+                        help="multiply recorded response times (0 = no delay)")
+    replay.add_argument("--backend", choices=("playwright", "http", "mock"), default="playwright",
+                        help="mock replays without launching a browser")
+    replay.set_defaults(func=bench_replay)
+
+    parse = sub.add_parser("parse", help="time documents listing parsing on archived pages")
+    parse.add_argument("--archive", required=True)
+    parse.add_argument("--runs", type=int, default=50)
+    parse.set_defaults(func=bench_parse)
+
+    transport = sub.add_parser("transport", help="time download_manager against archived downloads served locally")
+    transport.add_argument("--archive", required=True)
+    transport.add_argument("--runs", type=int, default=5)
+    transport.add_argument("--latency-scale", type=float, default=0.0)
+    transport.set_defaults(func=bench_transport)
+
+    zip_bench = sub.add_parser("zip", help="compare turn zip engines on a game's savegame folder")
+    zip_bench.add_argument("--game", required=True, help="game name from the config")
+    zip_bench.add_argument("--savegame-folder", help="zip this folder instead of the game's own")
+    zip_bench.add_argument("--runs", type=int, default=3)
+    zip_bench.add_argument("--engines", default=",".join(ENGINES), help="comma separated engines")
+    zip_bench.add_argument("--level", type=int, default=DEFAULT_LEVEL)
+    zip_bench.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    zip_bench.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_MB)
+    zip_bench.set_defaults(func=bench_zip)
+
+    startup = sub.add_parser("startup", help="time the app's start-up: module import, then the background "
+                                             "start-up steps as a graph and one at a time")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--workers", type=int, default=4, help="threads for the graph run")
+    startup.add_argument("--no-browser", dest="browser_launch", action="store_false",
+                         help="leave the browser launch out")
+    startup.add_argument("--browser", choices=("chrome", "edge", "firefox"), default="chrome")
+    startup.add_argument("--browser-path", help="browser executable (defaults to Playwright's own)")
+    startup.set_defaults(func=bench_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
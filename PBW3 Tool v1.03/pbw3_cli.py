@@ -0,0 +1,177 @@
+# PBW3 Tool maintenance commands. Run from the tool folder, e.g.:
+#   python pbw3_cli.py prune              (dry run: report what would be deleted)
+#   python pbw3_cli.py prune --game eoefm --apply
+#   python pbw3_cli.py verify --game eoefm --turn 12
+#   python pbw3_cli.py metrics --days 30
+#   python pbw3_cli.py run --game eoefm --command host_download --backend http --profile
+#   python pbw3_cli.py profile            (hotspots of the newest command profile)
+import argparse
+import json
+import os
+from app_paths import CONFIG_PATH
+from retention import plan_prune, retention_policy, describe_report, apply_prune, turn_dirs
+from manifest import manifest_path, record_files, verify_folder, describe_verify
+from metrics_store import MetricsStore, describe_metrics
+from profiler import list_profiles, describe_profile, describe_profiles
+
+
+def load_config(path=CONFIG_PATH):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_config(config, path=CONFIG_PATH):
+    with open(path, "w") as f:
+        json.dump(config, f, indent=4)
+
+
+def selected_games(config, name):
+    games = [g for g in config.get("games", []) if g.get("savegame_folder")]
+    if name:
+        games = [g for g in games if name in (g.get("name"), g.get("display_name"))]
+        if not games:
+            raise SystemExit(f"Game '{name}' not found in {CONFIG_PATH}")
+    return games
+
+
+def cmd_prune(args):
+    config = load_config()
+    total = 0
+    for game in selected_games(config, args.game):
+        policy = retention_policy(game, config)
+        if args.keep_last is not None or args.keep_every is not None or args.max_size_mb is not None:
+            policy = dict(policy or {})
+            for key in ("keep_last", "keep_every", "max_size_mb"):
+                if getattr(args, key) is not None:
+                    policy[key] = getattr(args, key)
+        report = plan_prune(game, policy)
+        for line in describe_report(report, dry_run=not args.apply):
+            print(line)
+        if args.apply and report["prune"]:
+            total += apply_prune(report, print, throttle=0)
+        else:
+            total += report["pruned_bytes"]
+    print(f"[+] {'Freed' if args.apply else 'Would free'} {total / 1048576:.1f} MB in total.")
+
+
+def cmd_verify(args):
+    config = load_config()
+    problems = 0
+    for game in selected_games(config, args.game):
+        for turn, folder in turn_dirs(game):
+            if args.turn is not None and turn != args.turn:
+                continue
+            if not os.path.exists(manifest_path(folder)):
+                if not args.record:
+                    print(f"[!] {folder}: no manifest (use --record to create one from the current files)")
+                    continue
+                record_files(folder)
+                print(f"[+] {folder}: manifest created.")
+                continue
+            report = verify_folder(folder, full=args.full)
+            for line in describe_verify(folder, report):
+                print(line)
+            problems += len(report["changed"]) + len(report["missing"])
+    if problems:
+        raise SystemExit(f"[!] {problems} file(s) changed or missing.")
+
+
+def cmd_metrics(args):
+    store = MetricsStore()
+    try:
+        for line in describe_metrics(store.report(args.game, days=args.days)):
+            print(line)
+    finally:
+        store.close()
+
+
+RUN_COMMANDS = ("host_download", "host_upload", "player_download", "player_upload", "run_host_mode",
+                "run_player_mode", "check_documents")
+
+
+def cmd_run(args):
+    from turn_engine import TurnEngine  # needs Playwright; the other commands don't
+    config = load_config()
+    game = selected_games(config, args.game)[0]
+    accounts = config.get("accounts") or [config.get("credentials", {})]
+    account = next((a for a in accounts if a.get("username") == game.get("account")), accounts[0])
+    if not account.get("username"):
+        raise SystemExit(f"No PBW3 account in {CONFIG_PATH}")
+    store = MetricsStore()
+    engine = TurnEngine(config, print, args.browser, args.browser_path, backend=args.backend, metrics=store)
+    if args.profile:
+        engine.profiler.enabled = True
+    try:
+        session = engine.session(account["username"], account["password"])
+        session.set_confirm_delete_callback(lambda files, on_confirm: on_confirm(args.delete))
+        session.set_save_config_callback(lambda: save_config(config))
+        engine.run(account["username"], account["password"], args.command, game)
+    finally:
+        engine.close()
+        store.close()
+
+
+def cmd_profile(args):
+    profiles = list_profiles()
+    if args.command_name:
+        profiles = [p for p in profiles if f"_{args.command_name}_" in os.path.basename(p)]
+    if args.list:
+        for line in describe_profiles(profiles):
+            print(line)
+        return
+    path = args.file or (profiles[0] if profiles else None)
+    if path is None:
+        raise SystemExit("[!] No profiles saved yet (run a command with --profile or PBW3_PROFILE=1).")
+    for line in describe_profile(path, sort=args.sort, limit=args.limit):
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PBW3 Tool maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    prune = sub.add_parser("prune", help="apply turn archive retention rules (dry run unless --apply)")
+    prune.add_argument("--game", help="game name from the config (default: all games)")
+    prune.add_argument("--apply", action="store_true", help="delete instead of only reporting")
+    prune.add_argument("--keep-last", type=int, help="override: keep the newest N turns")
+    prune.add_argument("--keep-every", type=int, help="override: also keep every Kth turn")
+    prune.add_argument("--max-size-mb", type=int, help="override: cap each game's Turns folder")
+    prune.set_defaults(func=cmd_prune)
+
+    verify = sub.add_parser("verify", help="check turn folders against their manifests")
+    verify.add_argument("--game", help="game name from the config (default: all games)")
+    verify.add_argument("--turn", type=int, help="only this turn's folder")
+    verify.add_argument("--full", action="store_true", help="re-hash every file, not just ones whose mtime changed")
+    verify.add_argument("--record", action="store_true", help="create manifests for folders that have none")
+    verify.set_defaults(func=cmd_verify)
+
+    metrics = sub.add_parser("metrics", help="p50/p95 turn-cycle times per game and steps that have become slow")
+    metrics.add_argument("--game", help="game display name as shown in the log (default: all games)")
+    metrics.add_argument("--days", type=int, default=90, help="history to include (default: 90)")
+    metrics.set_defaults(func=cmd_metrics)
+
+    run = sub.add_parser("run", help="run one turn command headless through the shared turn engine")
+    run.add_argument("--game", required=True, help="game name from the config")
+    run.add_argument("--command", choices=RUN_COMMANDS, required=True)
+    run.add_argument("--backend", choices=("playwright", "http", "mock"),
+                     help="override the config's transport backend (mock needs \"transport\": {\"archive\": ...})")
+    run.add_argument("--browser", choices=("chrome", "edge", "firefox"), default="chrome")
+    run.add_argument("--browser-path", help="browser executable (defaults to Playwright's own)")
+    run.add_argument("--delete", action="store_true", help="answer yes to deleting downloaded files from the server")
+    run.add_argument("--profile", action="store_true", help="save a CPU, span and memory profile of the command")
+    run.set_defaults(func=cmd_run)
+
+    profile = sub.add_parser("profile", help="show a saved command profile's hotspots (default: the newest)")
+    profile.add_argument("file", nargs="?", help="profile .json to show")
+    profile.add_argument("--list", action="store_true", help="list saved profiles instead")
+    profile.add_argument("--command", dest="command_name", help="only profiles of this command")
+    profile.add_argument("--sort", choices=("tottime", "cumulative", "calls"), default="tottime")
+    profile.add_argument("--limit", type=int, default=15, help="hotspots to show (default: 15)")
+    profile.set_defaults(func=cmd_profile)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,241 +1,162 @@
 import os
-import zipfile
-import shutil
 import re
-from playwright.sync_api import sync_playwright
+import threading
+from upload_batch import upload_item
+from turn_engine import account_session
+from zip_engine import write_zip, zip_settings
 
 def extract_turn_number(filename):
     match = re.search(r"(\d+)\.zip$", filename.lower())
     return int(match.group(1)) if match else None
 
+def _confirmer(confirm_fn):
+    """Adapt a blocking yes/no function to the session's confirm callback; it is asked off the engine loop."""
+    def confirm(files, on_confirm):
+        threading.Thread(target=lambda: on_confirm(bool(confirm_fn())), daemon=True).start()
+    return confirm
+
+
+def new_turn_files(session, game_config):
+    """Titles of the turn files added to the game's documents since the last sync."""
+    diff = session.check_documents(game_config).result()
+    if not diff:
+        return []
+    return [d["title"] or d["file"] for d in diff["added"]
+            if d["file"].lower().endswith((".zip", ".plr", ".emp", ".txt"))]
+
+
 def host_download(game_config, username, password, log, confirm_download_fn, confirm_delete_fn, save_config_callback=None):
+    """Download the game's new turn files through the shared turn engine (turn_engine.py).
+
+    Returns (turn number, None, None); the page and browser this used to hand
+    on to host_upload() now stay with the account's shared session."""
+    try:
+        session = account_session(username, password, log)
+        files = new_turn_files(session, game_config)
+        if not files:
+            log("[!] No downloadable files found.")
+            return None, None, None
+        if not confirm_download_fn(files):
+            log("[+] Download cancelled by user.")
+            return None, None, None
+        session.set_confirm_delete_callback(_confirmer(confirm_delete_fn))
+        if save_config_callback:
+            session.set_save_config_callback(save_config_callback)
+        zip_turn_number = session.host_download(game_config).result()
+        if zip_turn_number is None:
+            log("[!] Could not extract turn number from .zip filename.")
+            return None, None, None
+        return zip_turn_number, None, None
+    except Exception as e:
+        log(f"[!] Host Download Error: {e}")
+        return None, None, None
+
+
+def current_turn_number(game_config, zip_turn_number=None):
+    """Turn number of the last downloaded zip, falling back to the config (or 1)."""
+    if zip_turn_number is not None:
+        return zip_turn_number
+    if "turn_number" in game_config and game_config["turn_number"]:
+        try:
+            return int(game_config["turn_number"])
+        except Exception:
+            return 1
+    return 1
+
+
+def turn_zip_members(game_config):
+    """[(path, name)] of the turn files that go into the turn zip: the game's files minus .plr/.emp/.zip."""
     BASE_TURN_DIR = game_config["savegame_folder"]
-    DOC_URL = game_config["document_url"]
     GAME_NAME = game_config.get("name", "")  # Get the game name prefix
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(accept_downloads=True)
-        page = context.new_page()
-        try:
-            log("[+] Logging in to PBW...")
-            page.goto("https://www.pbw3.net/wp-login.php")
-            page.fill("input#user_login", username)
-            page.fill("input#user_pass", password)
-            page.click("input[type='submit']")
-            log("[+] Navigating to Documents Page...")
-            page.goto(DOC_URL)
-            page.wait_for_timeout(2000)
-            log("[+] Scraping and identifying downloadable files...")
-            links = page.query_selector_all("a[href*='get_group_doc']")
-            downloadables = []
-            for link in links:
-                href = link.get_attribute("href")
-                text = link.inner_text().strip()
-                if any(ext in href.lower() for ext in [".zip", ".plr", ".emp", ".txt"]):
-                    downloadables.append((href, text))
-            if not downloadables:
-                log("[!] No downloadable files found.")
-                return None, None, None
-            if not confirm_download_fn([text for _, text in downloadables]):
-                log("[+] Download cancelled by user.")
-                return None, None, None
-            downloaded_files = []
-            zip_turn_number = None
-            for href, text in downloadables:
-                if not href.startswith("http"):
-                    if not href.startswith("/"):
-                        href = "/" + href
-                    href = "https://www.pbw3.net" + href
-                filename = href.split("/")[-1]
-                cleaned_filename = filename.split("-", 1)[-1]
-                download_path = os.path.join(BASE_TURN_DIR, cleaned_filename)
-                log(f"[+] Downloading {cleaned_filename} ({text})...")
-                try:
-                    link = page.locator(f"a[href*='{filename}']")
-                    with page.expect_download() as dl_info:
-                        link.click()
-                    download = dl_info.value
-                    download.save_as(download_path)
-                    # Wait for the file to exist before proceeding
-                    max_wait = 10  # Maximum wait time in seconds
-                    wait_time = 0
-                    while not os.path.exists(download_path) and wait_time < max_wait:
-                        page.wait_for_timeout(500)  # Wait 500ms between checks
-                        wait_time += 0.5
-                    if not os.path.exists(download_path):
-                        raise Exception(f"Download failed: {cleaned_filename} not found after {max_wait} seconds")
-                    downloaded_files.append(download_path)
-                    if cleaned_filename.lower().endswith(".zip") and zip_turn_number is None:
-                        zip_turn_number = extract_turn_number(cleaned_filename)
-                except Exception as e:
-                    log(f"[!] Failed to download {filename}:\n{e}")
-            if zip_turn_number is None:
-                log("[!] Could not extract turn number from .zip filename.")
-                return None, None, None
-            if confirm_delete_fn():
-                log("[+] Attempting to delete files from PBW3 server...")
-                try:
-                    while True:
-                        page.goto(DOC_URL)
-                        page.wait_for_timeout(2000)
-                        delete_links = page.locator("a.bp-group-documents-delete")
-                        count = delete_links.count()
-                        if count == 0:
-                            break
-                        link = delete_links.first
-                        link.scroll_into_view_if_needed()
-                        href = link.get_attribute("href")
-                        if href and "delete" in href:
-                            log(f"[+] Deleting file at: {href}")
-                            page.evaluate(f"window.location.href='{href}'")
-                            page.wait_for_timeout(2000)
-                        else:
-                            break
-                    log("[+] All deletions completed.")
-                except Exception as e:
-                    log(f"[!] Error during deletion: {e}")
-            TURNS_DIR = os.path.join(BASE_TURN_DIR, "Turns")
-            os.makedirs(TURNS_DIR, exist_ok=True)
-            turn_folder = os.path.join(TURNS_DIR, f"Turn_{zip_turn_number}")
-            os.makedirs(turn_folder, exist_ok=True)
-            for file in downloaded_files:
-                if os.path.exists(file):  # Double check file exists before moving
-                    shutil.move(file, os.path.join(turn_folder, os.path.basename(file)))
-                else:
-                    log(f"[!] Warning: File not found for moving: {file}")
-            log(f"[+] Saved turn files to: {turn_folder}")
-            for file in os.listdir(turn_folder):
-                if file.lower().endswith(".plr") and file.lower().startswith(GAME_NAME.lower()):
-                    shutil.copy(os.path.join(turn_folder, file), BASE_TURN_DIR)
-            # Return context for upload
-            return zip_turn_number, page, browser
-        except Exception as e:
-            log(f"[!] Host Download Error: {e}")
-            browser.close()
-            return None, None, None
+    members = []
+    for filename in os.listdir(BASE_TURN_DIR):
+        filepath = os.path.join(BASE_TURN_DIR, filename)
+        if not os.path.isfile(filepath):
+            continue
+        # Only include files that start with the game name prefix
+        if filename.lower().startswith(GAME_NAME.lower()):
+            if filename.lower().endswith(('.plr', '.emp', '.zip')):
+                continue
+            members.append((filepath, filename))
+    return members
 
 
-def host_upload(game_config, username, password, log, confirm_upload_fn, confirm_upload_player_fn, zip_turn_number=None, page=None, browser=None, save_config_callback=None):
+def build_turn_zip(game_config, next_turn_number, log, progress=None):
+    """Zip the game's turn files from the savegame folder; returns the zip path.
+    progress is an optional ProgressTracker fed with bytes read from the turn files.
+    The game's "zip" settings pick the engine (see zip_engine.py)."""
     BASE_TURN_DIR = game_config["savegame_folder"]
-    DOC_URL = game_config["document_url"]
     ZIP_PREFIX = game_config["file_naming"]["zip_prefix"]
+    zip_name = f"{ZIP_PREFIX}{str(next_turn_number).zfill(2)}.zip"
+    zip_path = os.path.join(BASE_TURN_DIR, zip_name)
+    settings = zip_settings(game_config)
+    write_zip(zip_path, turn_zip_members(game_config), settings, progress)
+    log(f"[+] Created ZIP file: {zip_path} ({settings['engine']}, {os.path.getsize(zip_path) / 1048576:.1f} MB)")
+    return zip_path
+
+
+def turn_upload_items(game_config, zip_path, zip_turn_number, next_turn_number, include_players=True):
+    """The turn zip (featured) followed by the game's .plr files, ready for upload_documents_async()."""
+    BASE_TURN_DIR = game_config["savegame_folder"]
     UPLOAD_DISPLAY_NAME = game_config["file_naming"]["upload_display_name"]
-    GAME_NAME = game_config.get("name", "")  # Get the game name prefix
-    import zipfile
-    import time
+    GAME_NAME = game_config.get("name", "")
+    display_name_with_turn = f"{UPLOAD_DISPLAY_NAME} Turn {next_turn_number}"
+    uploads = [upload_item(zip_path, display_name_with_turn, featured=True)]
+    if include_players:
+        plr_display_base = game_config.get("file_naming", {}).get("upload_display_name_player", "")
+        for file in sorted(os.listdir(BASE_TURN_DIR)):
+            if file.lower().endswith(".plr") and file.lower().startswith(GAME_NAME.lower()):
+                plr_display_name = f"{plr_display_base or file}{zip_turn_number}"
+                uploads.append(upload_item(os.path.join(BASE_TURN_DIR, file), plr_display_name))
+    return uploads
+
+
+def finish_turn_upload(game_config, zip_path, next_turn_number, results, log):
+    """Remove the uploaded zip and older turn zips, unless the zip upload failed."""
+    BASE_TURN_DIR = game_config["savegame_folder"]
+    GAME_NAME = game_config.get("name", "")
+    zip_name = os.path.basename(zip_path)
+    if not any(r["ok"] for r in results if r["path"] == zip_path):
+        log(f"[!] Turn ZIP was not uploaded; keeping {zip_name} for a retry.")
+        return False
+    # Remove the uploaded zip file
+    try:
+        os.remove(zip_path)
+        log(f"[+] Removed uploaded zip file: {zip_name}")
+    except Exception as e:
+        log(f"[!] Warning: Failed to remove uploaded zip file: {e}")
+
+    # Clean up previous turn zip files after successful upload
+    try:
+        for file in os.listdir(BASE_TURN_DIR):
+            if file.lower().endswith('.zip') and file.lower().startswith(GAME_NAME.lower()):
+                # Try to extract turn number from filename
+                match = re.search(r'(\d+)\.zip$', file)
+                if match:
+                    file_turn = int(match.group(1))
+                    if file_turn < next_turn_number:
+                        file_path = os.path.join(BASE_TURN_DIR, file)
+                        os.remove(file_path)
+                        log(f"[+] Removed previous turn zip file: {file}")
+    except Exception as e:
+        log(f"[!] Warning: Failed to clean up previous turn zip files: {e}")
+    return True
+
+
+def host_upload(game_config, username, password, log, confirm_upload_fn, confirm_upload_player_fn, zip_turn_number=None, page=None, browser=None, save_config_callback=None):
+    """Zip and upload the turn through the shared turn engine; page and browser are accepted for compatibility."""
     try:
-        if page is None or browser is None:
-            # If not provided, create a new session
-            from playwright.sync_api import sync_playwright
-            p = sync_playwright().start()
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(accept_downloads=True)
-            page = context.new_page()
-            log("[+] Logging in to PBW for upload...")
-            page.goto("https://www.pbw3.net/wp-login.php")
-            page.fill("input#user_login", username)
-            page.fill("input#user_pass", password)
-            page.click("input[type='submit']")
-            page.goto(DOC_URL)
-            page.wait_for_timeout(2000)
         if not confirm_upload_fn():
             log("[+] Upload cancelled by user.")
-            browser.close()
             return
-        if zip_turn_number is None:
-            # Try to infer from game_config
-            if "turn_number" in game_config and game_config["turn_number"]:
-                try:
-                    zip_turn_number = int(game_config["turn_number"])
-                except Exception:
-                    zip_turn_number = 1
-            else:
-                zip_turn_number = 1
-        next_turn_number = zip_turn_number + 1
-        # Update turn number in config BEFORE creating zip
-        game_config["turn_number"] = next_turn_number
+        if zip_turn_number is not None:
+            game_config["turn_number"] = zip_turn_number
+        session = account_session(username, password, log)
         if save_config_callback:
-            save_config_callback()
-        zip_name = f"{ZIP_PREFIX}{str(next_turn_number).zfill(2)}.zip"
-        zip_path = os.path.join(BASE_TURN_DIR, zip_name)
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for filename in os.listdir(BASE_TURN_DIR):
-                filepath = os.path.join(BASE_TURN_DIR, filename)
-                if not os.path.isfile(filepath):
-                    continue
-                # Only include files that start with the game name prefix
-                if filename.lower().startswith(GAME_NAME.lower()):
-                    if filename.lower().endswith(('.plr', '.emp', '.zip')):
-                        continue
-                    zipf.write(filepath, filename)
-        log(f"[+] Created ZIP file: {zip_path}")
-        log("[+] Uploading ZIP to PBW...")
-        page.goto(DOC_URL)
-        page.wait_for_timeout(2000)
-        page.wait_for_selector("#bp-group-documents-upload-button", timeout=10000)
-        page.click("#bp-group-documents-upload-button")
-        page.wait_for_selector("input[name='bp_group_documents_name']", timeout=10000)
-        input_file = page.query_selector("input[type='file']")
-        input_file.set_input_files(zip_path)
-        display_name_with_turn = f"{UPLOAD_DISPLAY_NAME} Turn {next_turn_number}"
-        page.fill("input[name='bp_group_documents_name']", display_name_with_turn)
-        try:
-            page.check("input[name='bp_group_documents_featured']")
-        except:
-            log("[!] Could not check 'Featured Document' box.")
-        submit_btn = page.locator("input[type='submit'][value='Save']")
-        submit_btn.scroll_into_view_if_needed()
-        submit_btn.click()
-        page.wait_for_timeout(3000)
-        log("[+] Upload completed.")
-
-        # Remove the uploaded zip file
-        try:
-            os.remove(zip_path)
-            log(f"[+] Removed uploaded zip file: {zip_name}")
-        except Exception as e:
-            log(f"[!] Warning: Failed to remove uploaded zip file: {e}")
-
-        # Clean up previous turn zip files after successful upload
-        try:
-            for file in os.listdir(BASE_TURN_DIR):
-                if file.lower().endswith('.zip') and file.lower().startswith(GAME_NAME.lower()):
-                    # Try to extract turn number from filename
-                    match = re.search(r'(\d+)\.zip$', file)
-                    if match:
-                        file_turn = int(match.group(1))
-                        if file_turn < next_turn_number:
-                            file_path = os.path.join(BASE_TURN_DIR, file)
-                            os.remove(file_path)
-                            log(f"[+] Removed previous turn zip file: {file}")
-        except Exception as e:
-            log(f"[!] Warning: Failed to clean up previous turn zip files: {e}")
-
-        if confirm_upload_player_fn():
-            for file in os.listdir(BASE_TURN_DIR):
-                if file.lower().endswith(".plr") and file.lower().startswith(GAME_NAME.lower()):
-                    plr_path = os.path.join(BASE_TURN_DIR, file)
-                    log("[+] Uploading .plr file...")
-                    page.goto(DOC_URL)
-                    page.wait_for_timeout(2000)
-                    page.wait_for_selector("#bp-group-documents-upload-button", timeout=10000)
-                    page.click("#bp-group-documents-upload-button")
-                    page.wait_for_selector("input[name='bp_group_documents_name']", timeout=10000)
-                    input_file = page.query_selector("input[type='file']")
-                    input_file.set_input_files(plr_path)
-                    plr_display_base = game_config.get("file_naming", {}).get("upload_display_name_player", file)
-                    plr_display_name = f"{plr_display_base}{zip_turn_number}"
-                    page.fill("input[name='bp_group_documents_name']", plr_display_name)
-                    submit_btn = page.locator("input[type='submit'][value='Save']")
-                    submit_btn.scroll_into_view_if_needed()
-                    submit_btn.click()
-                    page.wait_for_timeout(2000)
-                    log(f"[+] .plr file uploaded as: {plr_display_name}")
-        browser.close()
+            session.set_save_config_callback(save_config_callback)
+        session.host_upload(game_config, include_players=confirm_upload_player_fn()).result()
     except Exception as e:
         log(f"[!] Host Upload Error: {e}")
-        if browser:
-            browser.close()
 
 
 def run_host_mode(game_config, username, password, log, confirm_upload_fn, confirm_download_fn, confirm_delete_fn, confirm_upload_player_fn, save_config_callback=None):
@@ -5,24 +5,27 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog, font as tkfont, PhotoImage
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
-from pbw3_host_mode import run_host_mode, host_download, host_upload
-from pbw3_player_mode import run_player_mode, upload_plr_file_sync
 from settings_editor import launch_settings_editor
 import sys
 import threading
-import time
-from session_worker import Xintis
+from turn_engine import shared_engine
+from progress import format_bytes, format_eta
+from app_paths import CONFIG_PATH
+from documents_index import describe_diff
+from game_list import GameList
+from startup import StartupGraph, read_config, cached_games, warm_browser
+from group_roles import ROLES
+from deadlines import DeadlineScheduler
+from submissions import SubmissionTracker
+from retention import BackgroundPruner, plan_prune, retention_policy, describe_report, DEFAULT_INTERVAL_HOURS
+from metrics_store import MetricsStore, describe_metrics
+from profiler import env_setting, list_profiles, describe_profile, describe_profiles
+from rate_limiter import describe_stats
 import shutil
 
 APP_VERSION = "1.03"
 APP_COPYRIGHT = "© PellDomPress, Graphics: Mark Sedwick (Blackkynight) R.I.P."
 
-# Set config path to AppData (Windows) or home directory (other OS)
-if os.name == 'nt':
-    CONFIG_DIR = os.path.join(os.environ.get('APPDATA', os.path.expanduser('~')), 'PBW3 Tool')
-else:
-    CONFIG_DIR = os.path.join(os.path.expanduser('~'), '.pbw3_tool')
-CONFIG_PATH = os.path.join(CONFIG_DIR, "pbw3_config.json")
 FONTS_PATH = os.path.join(os.getcwd(), "fonts")
 GAMES_URL = "https://www.pbw3.net/members/{username}/groups/my-groups/"
 
@@ -107,14 +110,15 @@ class SplashScreen(tk.Toplevel):
         self.img = PhotoImage(file=image_path)
         img_width = self.img.width()
         img_height = self.img.height()
-        bar_height = 40
+        bar_height = 60
         self.geometry(f"{img_width}x{img_height + bar_height}")
         self.configure(bg='white')
         self.label = tk.Label(self, image=self.img, bg='white')
         self.label.pack(pady=(0, 0))
-        self.progress = ttk.Progressbar(self, mode='indeterminate', length=img_width-40)
-        self.progress.pack(pady=(10, 10))
-        self.progress.start(10)
+        self.progress = ttk.Progressbar(self, mode='determinate', maximum=100, length=img_width-40)
+        self.progress.pack(pady=(10, 0))
+        self.status = tk.Label(self, text="Starting...", bg='white', anchor="w")
+        self.status.pack(fill=tk.X, padx=20)
         # Center the splash
         self.update_idletasks()
         w = self.winfo_screenwidth()
@@ -124,28 +128,261 @@ class SplashScreen(tk.Toplevel):
         y = h // 2 - size[1] // 2
         self.geometry(f"{size[0]}x{size[1]}+{x}+{y}")
 
+    def set_progress(self, done, total, step):
+        """Show start-up progress: done of total steps settled, step the one that just finished."""
+        self.progress["value"] = done * 100 / total if total else 100
+        self.status.config(text=f"{step} ({done}/{total})")
+
+    def close(self):
+        self.destroy()
+
+class ProgressPanel(tk.Frame):
+    """Progress bars for running transfers: one per game, with one per file beneath it."""
+
+    LINGER_MS = 4000  # keep a finished file on screen briefly so the user sees it complete
+
+    def __init__(self, parent, fonts):
+        super().__init__(parent)
+        self.fonts = fonts
+        self.games = {}  # game -> {"frame", "label", "bar", "files": {name -> row}}
+
+    def _game_row(self, game):
+        row = self.games.get(game)
+        if row is None:
+            frame = tk.Frame(self)
+            frame.pack(fill=tk.X, pady=(2, 0))
+            label = tk.Label(frame, text=game, font=self.fonts.get('default'), anchor="w")
+            label.pack(fill=tk.X)
+            bar = ttk.Progressbar(frame, mode='determinate', maximum=100)
+            bar.pack(fill=tk.X)
+            row = self.games[game] = {"frame": frame, "label": label, "bar": bar, "files": {}}
+        return row
+
+    def _file_row(self, game_row, event):
+        row = game_row["files"].get(event["name"])
+        if row is None:
+            frame = tk.Frame(game_row["frame"])
+            frame.pack(fill=tk.X, padx=(15, 0))
+            label = tk.Label(frame, font=self.fonts.get('entry'), anchor="w", width=60)
+            label.pack(side=tk.LEFT)
+            bar = ttk.Progressbar(frame, mode='determinate', maximum=100, length=200)
+            bar.pack(side=tk.RIGHT, fill=tk.X, expand=True)
+            row = game_row["files"][event["name"]] = {"frame": frame, "label": label, "bar": bar}
+        row["event"] = event
+        return row
+
+    def update_progress(self, event):
+        """Show one progress event (see progress.ProgressTracker); call on the Tk thread."""
+        game_row = self._game_row(event["game"])
+        row = self._file_row(game_row, event)
+        done, total = event["done"], event["total"]
+        if event["finished"]:
+            status = "done" if event["ok"] else "failed"
+            text = f"{event['kind']}: {event['name']}  {format_bytes(done)}  {status}"
+            self.after(self.LINGER_MS, lambda: self._remove_file(event["game"], event["name"], row))
+        elif total:
+            text = (f"{event['kind']}: {event['name']}  {format_bytes(done)} / {format_bytes(total)}  "
+                    f"{format_bytes(event['rate'])}/s  ETA {format_eta(event['eta'])}")
+        else:
+            text = f"{event['kind']}: {event['name']}  {format_bytes(done)}"
+        row["label"].config(text=text)
+        row["bar"]["value"] = 100 if event["finished"] else (done * 100 / total if total else 0)
+        self._refresh_game(event["game"])
+
+    def _refresh_game(self, game):
+        game_row = self.games[game]
+        events = [r["event"] for r in game_row["files"].values()]
+        done = sum(e["done"] for e in events)
+        total = sum(e["total"] or e["done"] for e in events)
+        rate = sum(e["rate"] for e in events if not e["finished"])
+        eta = max((e["eta"] for e in events if not e["finished"] and e["eta"] is not None), default=None)
+        active = sum(1 for e in events if not e["finished"])
+        game_row["bar"]["value"] = done * 100 / total if total else 0
+        game_row["label"].config(text=f"{game}: {active} active, {format_bytes(done)} / {format_bytes(total)}  "
+                                      f"{format_bytes(rate)}/s  ETA {format_eta(eta)}")
+
+    def _remove_file(self, game, name, row):
+        game_row = self.games.get(game)
+        # A newer transfer of the same file may have replaced this row
+        if not game_row or game_row["files"].get(name) is not row or not row["event"]["finished"]:
+            return
+        row["frame"].destroy()
+        del game_row["files"][name]
+        if game_row["files"]:
+            self._refresh_game(game)
+        else:
+            game_row["frame"].destroy()
+            del self.games[game]
+
+class RoleDialog(tk.Toplevel):
+    """One dialog for every game whose role could not be detected: select rows and mark them Host or Player.
+
+    Games left unmarked, or all of them if the dialog is closed, are Player."""
+
+    def __init__(self, parent, games, label, fonts):
+        super().__init__(parent)
+        self.title("Game Roles")
+        self.games = games
+        for game in games:
+            game["role"] = "player"
+        tk.Label(self, text=f"Could not tell whether you host these {len(games)} game(s).\n"
+                            "Select games (Ctrl/Shift-click for several) and mark them:",
+                 font=fonts.get('default'), justify="left").pack(padx=10, pady=(10, 5), anchor="w")
+        body = tk.Frame(self)
+        body.pack(padx=10, fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=("game", "role"), show="headings", selectmode="extended",
+                                 height=min(len(games), 15))
+        self.tree.heading("game", text="Game")
+        self.tree.heading("role", text="Role")
+        self.tree.column("game", width=280)
+        self.tree.column("role", width=70, stretch=False)
+        for index, game in enumerate(games):
+            self.tree.insert("", tk.END, iid=str(index), values=(label(game), "Player"))
+        scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", lambda e: self.mark(None))
+        buttons = tk.Frame(self)
+        buttons.pack(padx=10, pady=10, fill=tk.X)
+        for text, role in (("Host", "host"), ("Player", "player")):
+            tk.Button(buttons, text=text, command=lambda role=role: self.mark(role),
+                      font=fonts.get('button')).pack(side=tk.LEFT, padx=(0, 5))
+        tk.Button(buttons, text="Select All", command=lambda: self.tree.selection_set(self.tree.get_children()),
+                  font=fonts.get('button')).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Done", command=self.destroy, font=fonts.get('button')).pack(side=tk.RIGHT)
+        self.transient(parent)
+        self.grab_set()
+
+    def mark(self, role):
+        """Set the selected games to role; None toggles each of them."""
+        for iid in self.tree.selection():
+            game = self.games[int(iid)]
+            game["role"] = role or ("player" if game["role"] == "host" else "host")
+            self.tree.set(iid, "role", game["role"].title())
+
+
+class SubmissionsWindow(tk.Toplevel):
+    """Live submitted/missing table for one hosted game, updated by each submission tracker poll."""
+
+    def __init__(self, parent, game, label, fonts, on_auto, on_close):
+        super().__init__(parent)
+        self.title(f"Submissions - {label(game)}")
+        self.on_close = on_close
+        self.summary = tk.Label(self, text="Reading the documents listing...", font=fonts.get('default'))
+        self.summary.pack(padx=10, pady=(10, 5), anchor="w")
+        body = tk.Frame(self)
+        body.pack(padx=10, fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=("empire", "status", "by", "title"), show="headings", height=12)
+        for name, heading, width in (("empire", "Empire", 180), ("status", "Status", 80), ("by", "By", 110),
+                                     ("title", "Upload", 200)):
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, stretch=name == "title")
+        scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.auto_var = tk.BooleanVar(value=bool((game.get("submissions") or {}).get("auto_process")))
+        tk.Checkbutton(self, text="Process the turn when every empire is in", variable=self.auto_var,
+                       command=lambda: on_auto(self.auto_var.get()),
+                       font=fonts.get('button')).pack(padx=10, pady=10, anchor="w")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def show(self, status):
+        if not status["expected"]:
+            self.summary.config(text="No empires known: set the savegame folder or \"submissions\": {\"empires\": [...]}.")
+        else:
+            self.summary.config(text=f"{status['submitted']} / {status['expected']} submitted"
+                                     + (" - all in" if status["complete"] else ""))
+        self.tree.delete(*self.tree.get_children())
+        for row in status["empires"]:
+            self.tree.insert("", tk.END, values=(row["empire"], "Submitted" if row["submitted"] else "Missing",
+                                                 row["by"], row["title"]))
+        for upload in status["unmatched"]:
+            self.tree.insert("", tk.END, values=(upload["file"], "Unmatched", upload["by"], upload["title"]))
+
     def close(self):
-        self.progress.stop()
+        self.on_close()
         self.destroy()
 
+
 class PBWToolUI:
-    def __init__(self, root, browser_type, browser_path):
+    def __init__(self, root, browser_type, browser_path, splash=None):
         self.root = root
         self.root.title("PBW3 Turn Tool")
         self.config = None
         self.games = []
+        self.session_workers = {}  # username -> Xintis
+        self.turn_engine = None  # one event loop and browser shared by every account (turn_engine.py)
+        self.metrics = None  # MetricsStore, opened by metrics_store()
         self.log_console = None
-        self.custom_fonts = self.load_custom_fonts()
+        self.early_log = []  # messages logged before the log console exists
+        self.custom_fonts = {}
         self.browser_type = browser_type
         self.browser_path = browser_path
-        self.build_interface()  # Ensure log_console is initialized
-        if not os.path.exists(CONFIG_PATH):
+        self.splash = splash
+        self.submission_tracker = None
+        self.submission_windows = {}  # (account, game name) -> SubmissionsWindow
+        self.startup = self.startup_graph()
+        self.startup.start(root, on_progress=self.startup_progress, on_ready=self.startup_ready,
+                           on_done=lambda: self.gui_log(self.startup.describe()))
+
+    def startup_graph(self):
+        """Start-up as a dependency graph (startup.py): the window is shown once the cached game list is in it.
+
+        Sessions, the game list refresh, folder prompts and the pruner follow
+        behind the window; the browser launches while the window is built."""
+        graph = StartupGraph(log=self.gui_log)
+        graph.add("Reading settings", self.startup_config)
+        graph.add("Loading fonts", lambda: self.custom_fonts.update(self.load_custom_fonts()), on_tk=True, essential=True)
+        graph.add("Opening turn metrics", self.metrics_store)
+        graph.add("Reading saved games", lambda: cached_games(self.config), requires=("Reading settings",),
+                  essential=True)
+        graph.add("Building window", self.build_interface, requires=("Loading fonts",), on_tk=True, essential=True)
+        graph.add("Showing games", self.show_cached_games, requires=("Building window", "Reading saved games"),
+                  on_tk=True, essential=True)
+        graph.add("Starting browser engine", self.start_turn_engine,
+                  requires=("Reading settings", "Opening turn metrics"))
+        graph.add("Launching browser", lambda: self.turn_engine and warm_browser(self.turn_engine),
+                  requires=("Starting browser engine",))
+        graph.add("Logging in", self.startup_sessions, requires=("Showing games", "Starting browser engine"),
+                  on_tk=True)
+        graph.add("Refreshing games", lambda: self.config and self.refresh_game_list(), requires=("Logging in",),
+                  on_tk=True)
+        graph.add("Checking savegame folders", lambda: self.config and self.ensure_game_folders(),
+                  requires=("Refreshing games",), on_tk=True)
+        graph.add("Starting deadline scheduler", lambda: self.config and self.start_scheduler(),
+                  requires=("Logging in",), on_tk=True)
+        graph.add("Starting submission tracker", lambda: self.config and self.start_submission_tracker(),
+                  requires=("Logging in",), on_tk=True)
+        graph.add("Starting pruner", lambda: self.config and self.start_pruner(), requires=("Showing games",),
+                  on_tk=True)
+        return graph
+
+    def startup_config(self):
+        self.config = read_config(CONFIG_PATH)
+
+    def show_cached_games(self):
+        games, status = self.startup.results["Reading saved games"]
+        self.games = games
+        self.game_list.status = status
+        self.game_list.set_games(self.games)
+
+    def startup_progress(self, done, total, step):
+        if self.splash:
+            self.splash.set_progress(done, total, step)
+
+    def startup_ready(self):
+        if self.splash:
+            self.splash.close()
+            self.splash = None
+        self.root.deiconify()
+
+    def startup_sessions(self):
+        if self.config is None:
             self.first_time_setup()
             return
-        self.load_config()
         self.start_session_worker()
-        self.refresh_game_list()
-        self.ensure_game_folders()
 
     def load_custom_fonts(self):
         fonts = {}
@@ -187,11 +424,15 @@ class PBWToolUI:
                 messagebox.showerror("Error", "Username and password required.")
                 return
 
+            if self.config is None:
+                self.load_config()
             self.config["credentials"] = {
                 "username": cred_user,
                 "password": cred_pass
             }
-            self.refresh_game_list()
+            self.config["accounts"] = [{"username": cred_user, "password": cred_pass}]
+            if self.session_workers:
+                self.refresh_game_list()
             self.save_config()
             messagebox.showinfo("Success", "Initial config saved with discovered games. Please restart the tool.")
             self.root.destroy()
@@ -210,16 +451,51 @@ class PBWToolUI:
         save_btn = tk.Button(frame, text="Save & Exit", command=save_initial, font=self.custom_fonts.get('button'))
         save_btn.grid(row=2, column=0, columnspan=2, pady=10)
 
+    def get_accounts(self):
+        """Return the configured PBW3 accounts, migrating the single v1.03 credentials block if needed."""
+        accounts = self.config.setdefault("accounts", [])
+        creds = self.config.get("credentials", {})
+        if not accounts and creds.get("username") and creds.get("password"):
+            accounts.append({"username": creds["username"], "password": creds["password"]})
+        return accounts
+
+    def primary_account(self):
+        accounts = self.get_accounts()
+        return accounts[0]["username"] if accounts else ""
+
+    def game_label(self, game):
+        if len(self.session_workers) > 1:
+            return f"{game['display_name']} ({game.get('account') or self.primary_account()})"
+        return game["display_name"]
+
+    def worker_for(self, game):
+        """Return the session worker logged in as the account that owns this game."""
+        account = game.get("account") or self.primary_account()
+        worker = self.session_workers.get(account)
+        if worker is None:
+            self.gui_log(f"[!] No session for account '{account}'. Add the account and try again.")
+        return worker
+
     def refresh_game_list(self):
-        def on_games_discovered(discovered):
-            def update_games():
-                if not discovered:
-                    messagebox.showerror("Login Failed", "Could not log into PBW3 or parse games.")
-                    return
-                known = {g["name"]: g for g in self.config.get("games", [])}
-                games_with_roles = []
-                for game_entry in discovered:
-                    existing = known.get(game_entry["name"])
+        workers = dict(self.session_workers)
+        results = {}
+
+        def update_games():
+            discovered = [g for games in results.values() for g in games]
+            if not discovered:
+                messagebox.showerror("Login Failed", "Could not log into PBW3 or parse games.")
+                return
+            primary = self.primary_account()
+            known = {(g.get("account") or primary, g["name"]): g for g in self.config.get("games", [])}
+            games_with_roles = []
+            for account, games in results.items():
+                if not games:
+                    # Login or scrape failed for this account; keep its games rather than dropping them
+                    games_with_roles.extend(g for key, g in known.items() if key[0] == account)
+                    continue
+                for game_entry in games:
+                    game_entry["account"] = account
+                    existing = known.get((account, game_entry["name"]))
                     if existing:
                         game_entry.update({
                             "savegame_folder": existing.get("savegame_folder", game_entry.get("savegame_folder", "")),
@@ -231,23 +507,97 @@ class PBWToolUI:
                         })
                     else:
                         game_entry.setdefault("file_naming", {"upload_display_name_player": "{username}'s Turn "})
-                        game_entry["savegame_folder"] = filedialog.askdirectory(title=f"Select Savegame Folder for {game_entry['display_name']}")
+                        game_entry["savegame_folder"] = filedialog.askdirectory(title=f"Select Savegame Folder for {self.game_label(game_entry)}")
                         if not game_entry["savegame_folder"]:
                             messagebox.showerror("Error", "Savegame folder selection is required.")
                             return
                         self.save_config()  # Save after setting the folder
-                        role = messagebox.askquestion("Game Role", f"Are you the Host for '{game_entry['display_name']}'? Click 'Yes' for Host, 'No' for Player.")
-                        game_entry["role"] = "host" if role == "yes" else "player"
                     games_with_roles.append(game_entry)
-                self.config["games"] = games_with_roles
-                self.save_config()
-                self.games = games_with_roles
-                if hasattr(self, 'game_selector'):
-                    self.game_selector['values'] = [g["display_name"] for g in self.games]
-                    if self.games:
-                        self.game_selector.current(0)
-            self.root.after(0, update_games)
-        self.session_worker.refresh_game_list(on_games_discovered)
+            unknown = [g for g in games_with_roles if g.get("role") not in ROLES]
+            if unknown:
+                self.assign_roles(unknown, lambda: finish(games_with_roles))
+            else:
+                finish(games_with_roles)
+
+        def finish(games_with_roles):
+            self.config["games"] = games_with_roles
+            self.save_config()
+            self.games = games_with_roles
+            if hasattr(self, 'game_list'):
+                self.game_list.set_games(self.games)
+            self.warm_game_pages()
+
+        def on_games_discovered(account, discovered):
+            def collect():
+                results[account] = discovered
+                if len(results) == len(workers):
+                    update_games()
+            self.root.after(0, collect)
+
+        # Every account's worker scrapes its own group list in parallel
+        for account, worker in workers.items():
+            worker.refresh_game_list(lambda discovered, account=account: on_games_discovered(account, discovered))
+
+    def assign_roles(self, games, on_done):
+        """Work out whether we host each game from its group page, then ask about the rest in one dialog."""
+        by_account = {}
+        for game in games:
+            by_account.setdefault(game.get("account") or self.primary_account(), []).append(game)
+        pending = set(by_account)
+
+        def ask_remaining():
+            ambiguous = [g for g in games if g.get("role") not in ROLES]
+            if ambiguous:
+                RoleDialog(self.root, ambiguous, self.game_label, self.custom_fonts).wait_window()
+            on_done()
+
+        def on_roles(account, roles):
+            for game in by_account[account]:
+                if roles.get(game["name"]):
+                    game["role"] = roles[game["name"]]
+                    self.gui_log(f"[+] {self.game_label(game)}: detected {game['role']}.")
+            pending.discard(account)
+            if not pending:
+                ask_remaining()
+
+        self.gui_log(f"[+] Detecting host/player role for {len(games)} game(s)...")
+        for account, account_games in by_account.items():
+            worker = self.session_workers.get(account)
+            if worker:
+                worker.detect_roles(account_games, lambda roles, account=account: self.root.after(0, on_roles, account, roles))
+            else:
+                pending.discard(account)
+        if not pending:
+            ask_remaining()
+
+    def warm_game_pages(self, games=None):
+        """Ask each account's worker to park pages on its games' documents URLs."""
+        by_account = {}
+        for game in (self.games if games is None else games):
+            by_account.setdefault(game.get("account") or self.primary_account(), []).append(game["document_url"])
+        for account, urls in by_account.items():
+            worker = self.session_workers.get(account)
+            if worker:
+                worker.warm_pages(urls)
+
+    def on_game_selected(self, games):
+        if games:
+            self.warm_game_pages(games)
+
+    def selected_games(self):
+        """The games selected in the game list; shows an error and returns [] when there are none."""
+        games = self.game_list.selected()
+        if not games:
+            messagebox.showerror("Error", "No game selected.")
+        return games
+
+    def run_on_selected(self, action, command):
+        """Queue command(worker, game) for every selected game; each account's worker runs its games side by side."""
+        for game in self.by_urgency(self.selected_games()):
+            worker = self.worker_for(game)
+            if worker:
+                self.gui_log(f"[+] Requesting {action} for {self.game_label(game)} from session worker...")
+                command(worker, game)
 
     def ensure_game_folders(self):
         changed = False
@@ -261,15 +611,14 @@ class PBWToolUI:
             self.save_config()
 
     def build_interface(self):
+        self.game_list = GameList(self.root, self.custom_fonts, label=self.game_label, on_select=self.on_game_selected,
+                                  due=self.game_due)
+        self.game_list.pack(padx=20, pady=(10, 0), fill=tk.X)
+        self.game_list.set_games(self.games)
+
         frame = tk.Frame(self.root)
         frame.pack(padx=20, pady=10)
 
-        tk.Label(frame, text="Select Game:", font=self.custom_fonts.get('default')).grid(row=0, column=0, sticky="w")
-        self.game_selector = ttk.Combobox(frame, values=[g["display_name"] for g in self.games], state="readonly", font=self.custom_fonts.get('entry'))
-        self.game_selector.grid(row=0, column=1)
-        if self.games:
-            self.game_selector.current(0)
-
         # Tooltip label in footer (left-justified)
         self.tooltip_label = tk.Label(self.root, text="", font=self.custom_fonts.get('copyright'), anchor="w", justify="left")
         self.tooltip_label.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 0), anchor="w")
@@ -283,10 +632,22 @@ class PBWToolUI:
             widget.bind("<Enter>", lambda e: set_tooltip(text))
             widget.bind("<Leave>", clear_tooltip)
 
+        submissions_btn = tk.Button(frame, text="Submissions", command=self.submissions, font=self.custom_fonts.get('button'))
+        submissions_btn.grid(row=0, column=1, padx=5)
+        bind_tooltip(submissions_btn, "shows which empires have uploaded this turn; can start the host run when the last one is in")
+
         settings_btn = tk.Button(frame, text="⚙ Game Settings", command=self.edit_selected_game, font=self.custom_fonts.get('button'))
         settings_btn.grid(row=0, column=2, padx=5)
         bind_tooltip(settings_btn, "manually change settings for PBW3 games and upload files")
 
+        add_account_btn = tk.Button(frame, text="Add Account", command=self.add_account, font=self.custom_fonts.get('button'))
+        add_account_btn.grid(row=0, column=3, padx=5)
+        bind_tooltip(add_account_btn, "log in with another PBW3 account; its games are added to the list and run in their own session")
+
+        check_btn = tk.Button(frame, text="Check New Files", command=self.check_new_files, font=self.custom_fonts.get('button'))
+        check_btn.grid(row=0, column=4, padx=5)
+        bind_tooltip(check_btn, "compares the game's PBW3 documents with the last sync and lists what is new, without downloading")
+
         run_host_btn = tk.Button(frame, text="Run Host Mode", command=self.run_host, font=self.custom_fonts.get('button'))
         run_host_btn.grid(row=1, column=0, columnspan=2, pady=10, sticky="ew")
         bind_tooltip(run_host_btn, "downloads all game files, deletes from PBW3, then zips and uploads new turn files")
@@ -295,6 +656,17 @@ class PBWToolUI:
         run_player_btn.grid(row=1, column=2, columnspan=2, pady=10, sticky="ew")
         bind_tooltip(run_player_btn, "downloads game files and unzips to the games savegame folder")
 
+        profile_frame = tk.Frame(frame)
+        profile_frame.grid(row=1, column=4, padx=5, pady=10)
+        self.profile_var = tk.BooleanVar(value=bool(env_setting()))
+        profile_check = tk.Checkbutton(profile_frame, text="Profile", variable=self.profile_var,
+                                       command=self.toggle_profiling, font=self.custom_fonts.get('button'))
+        profile_check.pack(side=tk.LEFT)
+        bind_tooltip(profile_check, "profile every command from now on: CPU hotspots, step times and peak memory")
+        profiles_btn = tk.Button(profile_frame, text="Profiles", command=self.profile_report, font=self.custom_fonts.get('button'))
+        profiles_btn.pack(side=tk.LEFT)
+        bind_tooltip(profiles_btn, "shows the hotspots of the most recent command profile and lists older ones")
+
         host_download_btn = tk.Button(frame, text="Host Download", command=self.host_download, font=self.custom_fonts.get('button'))
         host_download_btn.grid(row=2, column=0, pady=10, sticky="ew")
         bind_tooltip(host_download_btn, "downloads all game files to be run and asks to delete from PBW3")
@@ -311,8 +683,26 @@ class PBWToolUI:
         player_upload_btn.grid(row=2, column=3, pady=10, sticky="ew")
         bind_tooltip(player_upload_btn, "uploads plr file to PBW3")
 
+        metrics_btn = tk.Button(frame, text="Turn Metrics", command=self.metrics_report, font=self.custom_fonts.get('button'))
+        metrics_btn.grid(row=2, column=4, padx=5, pady=10)
+        bind_tooltip(metrics_btn, "median and 95th percentile turn times per game, with steps that have become slow")
+
+        host_all_btn = tk.Button(frame, text="Run All Host Games", command=self.run_all_hosts, font=self.custom_fonts.get('button'))
+        host_all_btn.grid(row=3, column=0, columnspan=4, pady=(0, 10), sticky="ew")
+        bind_tooltip(host_all_btn, "runs every game you host through download, turn processor, checks, zip and upload; games overlap")
+
+        prune_btn = tk.Button(frame, text="Prune Report", command=self.prune_report, font=self.custom_fonts.get('button'))
+        prune_btn.grid(row=3, column=4, padx=5, pady=(0, 10))
+        bind_tooltip(prune_btn, "lists old turn folders and leftover zips the retention rules would delete (dry run)")
+
+        self.progress_panel = ProgressPanel(self.root, self.custom_fonts)
+        self.progress_panel.pack(padx=10, fill=tk.X)
+
         self.log_console = tk.Text(self.root, height=20, width=100, wrap=tk.WORD, font=self.custom_fonts.get('log'))
         self.log_console.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        for message in self.early_log:
+            self.gui_log(message)
+        self.early_log = []
 
         # Footer with version and copyright
         footer = tk.Label(
@@ -325,17 +715,29 @@ class PBWToolUI:
         footer.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 5))
 
     def gui_log(self, message):
+        if self.log_console is None:
+            self.early_log.append(message)
+            return
         self.log_console.insert(tk.END, message + "\n")
         self.log_console.see(tk.END)
 
+    def gui_progress(self, event):
+        # Progress events arrive from the session engine (or a zip thread); draw them on the Tk thread
+        self.root.after(0, self.progress_panel.update_progress, event)
+
     def gui_confirm_upload(self):
         return messagebox.askyesno("Upload Turn?", "Would you like to zip and upload the next turn now?")
 
     def gui_confirm_upload_player(self):
         return messagebox.askyesno("Upload Player File?", "Would you like to upload your .plr file now?")
 
-    def gui_confirm_delete(self):
-        return messagebox.askyesno("Delete Remote Files?", "Do you want to delete the downloaded files from the PBW3 server?")
+    def gui_confirm_delete(self, files, on_confirm):
+        # Called from the session engine; ask on the Tk thread and hand the answer back
+        def ask():
+            display = "\n".join(f" - {f}" for f in files)
+            on_confirm(messagebox.askyesno("Delete Remote Files?",
+                                           f"Do you want to delete the downloaded files from the PBW3 server?\n\n{display}"))
+        self.root.after(0, ask)
 
     def gui_confirm_download(self, files):
         display = "\n".join(f" - {f}" for f in files)
@@ -345,86 +747,244 @@ class PBWToolUI:
         return messagebox.askyesno("Download Turn?", f"Found turn: {display_name}\n\nDo you want to download it?")
 
     def run_host(self):
-        selected_index = self.game_selector.current()
-        if selected_index < 0:
-            messagebox.showerror("Error", "No game selected.")
-            return
-        game = self.games[selected_index]
-        self.gui_log("[+] Requesting Run Host Mode from Xintis...")
-        self.session_worker.run_host_mode(game)
+        self.run_on_selected("Run Host Mode", lambda worker, game: worker.run_host_mode(game))
 
     def run_player(self):
-        selected_index = self.game_selector.current()
-        if selected_index < 0:
-            messagebox.showerror("Error", "No game selected.")
+        self.run_on_selected("Run Player Mode", lambda worker, game: worker.run_player_mode(game))
+
+    def run_all_hosts(self):
+        by_account = {}
+        for game in self.games:
+            if game.get("role") == "host":
+                by_account.setdefault(game.get("account") or self.primary_account(), []).append(game)
+        if not by_account:
+            messagebox.showinfo("Run All Host Games", "You are not the host of any game.")
             return
-        game = self.games[selected_index]
-        self.gui_log("[+] Requesting Run Player Mode from Xintis...")
-        self.session_worker.run_player_mode(game)
+        for account, games in by_account.items():
+            worker = self.session_workers.get(account)
+            if worker:
+                self.gui_log(f"[+] Queuing host pipeline for {len(games)} game(s): {', '.join(self.game_label(g) for g in games)}")
+                worker.run_host_pipeline(games)
 
     def edit_selected_game(self):
-        index = self.game_selector.current()
-        if index < 0:
+        games = self.game_list.selected()
+        if not games:
             messagebox.showerror("No Game Selected", "Please select a game first.")
             return
-        selected_game = self.games[index]
+        selected_game = games[0]
         launch_settings_editor(self.root, selected_game, self.save_config)
         self.save_config()  # Ensure changes are saved after editing
 
     def start_session_worker(self):
-        self.session_worker = Xintis(self.gui_log, self.browser_type, self.browser_path)
-        self.session_worker.set_confirm_delete_callback(self.gui_confirm_delete)
-        self.session_worker.set_save_config_callback(self.save_config)
-        self.session_worker.start()
-        creds = self.config.get("credentials", {})
-        username = creds.get("username", "")
-        password = creds.get("password", "")
-        if not username or not password:
+        accounts = self.get_accounts()
+        if not accounts:
             username = simpledialog.askstring("PBW3 Login", "Enter your PBW3 username:")
             password = simpledialog.askstring("PBW3 Login", "Enter your PBW3 password:", show='*')
             if username and password:
                 self.config["credentials"] = {"username": username, "password": password}
+                accounts.append({"username": username, "password": password})
                 self.save_config()
             else:
                 self.gui_log("[!] No credentials provided for session worker login.")
                 return
-        self.session_worker.login(username, password)
+        for account in accounts:
+            self.start_account_worker(account)
+
+    def start_account_worker(self, account):
+        """Start a session worker (own browser context on the shared engine) logged in as account."""
+        username = account["username"]
+
+        def account_log(message):
+            if len(self.session_workers) > 1:
+                message = message.replace("[Xintis]", f"[Xintis:{username}]", 1)
+            self.gui_log(message)
+
+        def account_progress(event):
+            if len(self.session_workers) > 1:
+                event = dict(event, game=f"{event['game']} ({username})")
+            self.gui_progress(event)
+
+        if self.start_turn_engine() is None:
+            return None
+        worker = self.turn_engine.session(username, account["password"], log=account_log)
+        worker.set_confirm_delete_callback(self.gui_confirm_delete)
+        worker.set_save_config_callback(self.save_config)
+        worker.set_progress_callback(account_progress)
+        self.session_workers[username] = worker
+        return worker
+
+    @property
+    def session_worker(self):
+        return self.session_workers.get(self.primary_account())
+
+    def start_turn_engine(self):
+        """The shared turn engine, created on first call; None when the config's transport is invalid."""
+        if self.turn_engine is None and self.config is not None:
+            try:
+                self.turn_engine = shared_engine(self.config, self.gui_log, browser_type=self.browser_type,
+                                                 browser_path=self.browser_path, metrics=self.metrics_store())
+            except ValueError as e:
+                self.gui_log(f"[!] {e}")
+        return self.turn_engine
+
+    def game_due(self, game):
+        return self.turn_engine.deadlines.due(game) if self.turn_engine else None
+
+    def by_urgency(self, games):
+        """games ordered nearest turn deadline first."""
+        return self.turn_engine.deadlines.by_urgency(games) if self.turn_engine else list(games)
+
+    def start_scheduler(self):
+        """Keep turn deadlines fresh and poll documents listings, nearest deadline first (see deadlines.py)."""
+        if self.turn_engine is None:
+            return
+        self.scheduler = DeadlineScheduler(
+            lambda: list(self.games),
+            lambda game: self.session_workers.get(game.get("account") or self.primary_account()),
+            self.turn_engine.deadlines, lambda message: self.root.after(0, self.gui_log, message),
+            settings=self.config.get("deadlines"), label=self.game_label)
+        self.scheduler.start()
+
+    def start_submission_tracker(self):
+        """Poll hosted games for player submissions while watched or set to auto-process (see submissions.py)."""
+        self.submission_tracker = SubmissionTracker(
+            lambda: list(self.games),
+            lambda game: self.session_workers.get(game.get("account") or self.primary_account()),
+            lambda game, status: self.root.after(0, self.show_submissions, game, status),
+            lambda message: self.root.after(0, self.gui_log, message), label=self.game_label)
+        self.submission_tracker.start()
+
+    def submissions(self):
+        """Open the submitted/missing table for the selected hosted games."""
+        if self.submission_tracker is None:
+            self.gui_log("[!] Not logged in yet; try again once the session has started.")
+            return
+        for game in self.selected_games():
+            if game.get("role") != "host":
+                self.gui_log(f"[!] {self.game_label(game)}: submissions are tracked for games you host.")
+                continue
+            key = (game.get("account"), game.get("name"))
+            window = self.submission_windows.get(key)
+            if window is None:
+                window = self.submission_windows[key] = SubmissionsWindow(
+                    self.root, game, self.game_label, self.custom_fonts,
+                    lambda auto, game=game: self.set_auto_process(game, auto),
+                    lambda game=game, key=key: self.close_submissions(game, key))
+                status = self.submission_tracker.statuses.get(key)
+                if status:
+                    window.show(status)
+            window.lift()
+            self.submission_tracker.watch(game)
+
+    def close_submissions(self, game, key):
+        self.submission_windows.pop(key, None)
+        self.submission_tracker.unwatch(game)
+
+    def show_submissions(self, game, status):
+        window = self.submission_windows.get((game.get("account"), game.get("name")))
+        if window is not None:
+            window.show(status)
+
+    def set_auto_process(self, game, auto):
+        game.setdefault("submissions", {})["auto_process"] = auto
+        self.save_config()
+        self.gui_log(f"[+] {self.game_label(game)}: "
+                     f"{'the turn is processed once every empire is in' if auto else 'turn processing left to you'}.")
+
+    def start_pruner(self):
+        """Apply each game's retention rules in the background (see retention.py)."""
+        schedule = self.config.get("prune", {})
+        self.pruner = BackgroundPruner(
+            lambda: list(self.games), lambda: self.config,
+            lambda message: self.root.after(0, self.gui_log, message),
+            is_busy=lambda: any(w.busy() for w in list(self.session_workers.values())),
+            interval_hours=schedule.get("interval_hours", DEFAULT_INTERVAL_HOURS),
+            dry_run=schedule.get("dry_run", False))
+        self.pruner.start()
+
+    def metrics_store(self):
+        """The shared turn metrics store, opened on first use; None when it can't be opened."""
+        if self.metrics is None:
+            try:
+                self.metrics = MetricsStore()
+            except Exception as e:
+                self.gui_log(f"[!] Turn metrics disabled: {e}")
+                return None
+        return self.metrics
+
+    def toggle_profiling(self):
+        if self.turn_engine:
+            self.turn_engine.profiler.enabled = self.profile_var.get()
+        self.gui_log(f"[+] Command profiling {'on' if self.profile_var.get() else 'off'}.")
+
+    def profile_report(self):
+        """Log the newest profile's hotspots and list the ones before it."""
+        profiles = list_profiles()
+        if not profiles:
+            self.gui_log("[+] No profiles saved yet. Tick \"Profile\" and run a command.")
+            return
+        for line in describe_profile(profiles[0]):
+            self.gui_log(line)
+        if len(profiles) > 1:
+            self.gui_log("[+] Earlier profiles (python pbw3_cli.py profile <file> for details):")
+            for line in describe_profiles(profiles[1:10]):
+                self.gui_log(line)
+
+    def metrics_report(self):
+        """Log p50/p95 turn-cycle times per game and the steps that stand out."""
+        store = self.metrics_store()
+        if store:
+            for line in describe_metrics(store.report()):
+                self.gui_log(line)
+        if self.turn_engine and self.turn_engine.engine:
+            for line in describe_stats(self.turn_engine.engine.limiter.stats()):
+                self.gui_log(line)
+
+    def prune_report(self):
+        """Log what retention would delete for every game, without deleting anything."""
+        for game in self.games:
+            if game.get("savegame_folder"):
+                for line in describe_report(plan_prune(game, retention_policy(game, self.config)), dry_run=True):
+                    self.gui_log(line)
+
+    def add_account(self):
+        username = simpledialog.askstring("Add PBW3 Account", "Enter the PBW3 username:")
+        if not username:
+            return
+        if username in self.session_workers:
+            messagebox.showinfo("Add PBW3 Account", f"Account '{username}' is already logged in.")
+            return
+        password = simpledialog.askstring("Add PBW3 Account", f"Enter the PBW3 password for {username}:", show='*')
+        if not password:
+            return
+        account = {"username": username, "password": password}
+        self.get_accounts().append(account)
+        self.save_config()
+        self.start_account_worker(account)
+        self.refresh_game_list()
 
     def host_download(self):
-        selected_index = self.game_selector.current()
-        if selected_index < 0:
-            messagebox.showerror("Error", "No game selected.")
-            return
-        game = self.games[selected_index]
-        self.gui_log("[+] Requesting Host Download from session worker...")
-        self.session_worker.host_download(game)
+        self.run_on_selected("Host Download", lambda worker, game: worker.host_download(game))
 
     def host_upload(self):
-        selected_index = self.game_selector.current()
-        if selected_index < 0:
-            messagebox.showerror("Error", "No game selected.")
-            return
-        game = self.games[selected_index]
-        self.gui_log("[+] Requesting Host Upload from session worker...")
-        self.session_worker.host_upload(game)
+        self.run_on_selected("Host Upload", lambda worker, game: worker.host_upload(game))
 
     def player_download(self):
-        selected_index = self.game_selector.current()
-        if selected_index < 0:
-            messagebox.showerror("Error", "No game selected.")
-            return
-        game = self.games[selected_index]
-        self.gui_log("[+] Requesting Player Download from session worker...")
-        self.session_worker.player_download(game)
+        self.run_on_selected("Player Download", lambda worker, game: worker.player_download(game))
+
+    def check_new_files(self):
+        for game in self.selected_games():
+            worker = self.worker_for(game)
+            if worker:
+                worker.check_documents(game, lambda diff, game=game: self.root.after(0, self.show_documents_diff, game, diff))
+
+    def show_documents_diff(self, game, diff):
+        self.gui_log(f"[+] {self.game_label(game)}: {describe_diff(diff)}")
+        for doc in diff["added"]:
+            self.gui_log(f"    new: {doc['title'] or doc['file']} ({doc['file']})")
 
     def player_upload(self):
-        selected_index = self.game_selector.current()
-        if selected_index < 0:
-            messagebox.showerror("Error", "No game selected.")
-            return
-        game = self.games[selected_index]
-        self.gui_log("[+] Requesting Player Upload from session worker...")
-        self.session_worker.player_upload(game)
+        self.run_on_selected("Player Upload", lambda worker, game: worker.player_upload(game))
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -458,21 +1018,5 @@ if __name__ == "__main__":
         messagebox.showerror("Browser Not Found", "A supported browser (Chrome, Edge, or Firefox) is required.")
         sys.exit(1)
 
-    app = PBWToolUI(root, browser_type, browser_path)
-    splash.close()
-    root.deiconify()
+    app = PBWToolUI(root, browser_type, browser_path, splash=splash)  # shows the window once it is ready
     root.mainloop()
-
-    def continue_startup():
-        app = PBWToolUI(root, browser_type, browser_path)
-        splash.close()
-        root.deiconify()
-
-    root.after(2000, continue_startup)
-
-    def splash_wait():
-        splash.update()
-        time.sleep(0.1)
-
-    while splash.winfo_exists():
-        splash_wait()
@@ -0,0 +1,211 @@
+import asyncio
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from app_paths import PROFILES_DIR
+import metrics_store
+
+ENV_VAR = "PBW3_PROFILE"       # "1" profiles every command, "host_download,player_upload" only those
+MAX_PROFILES = 200             # newest kept in the profiles folder
+TOP_ALLOCATIONS = 10
+# Where the event loop sits while it waits for the browser or the network
+IDLE_FUNCTIONS = re.compile(r"method '(poll|select|control|_poll)' of|GetQueuedCompletionStatus")
+
+
+def env_setting():
+    """What PBW3_PROFILE asks for: True (every command), a set of command names, or None."""
+    value = os.environ.get(ENV_VAR, "").strip()
+    if not value or value.lower() in ("0", "false", "no", "off"):
+        return None
+    if value.lower() in ("1", "true", "yes", "on", "all"):
+        return True
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(text)).strip("-")[:40] or "none"
+
+
+class Profiler:
+    """Profiles session commands: CPU hotspots (cProfile), wall-clock spans and peak memory (tracemalloc).
+
+    Spans are the metrics steps the command already records (scan, download,
+    upload, ...) with the CPU time spent inside each, so a step whose wall
+    time far exceeds its CPU time was waiting on the browser or the network.
+    cProfile only sees the engine's event loop thread and only one command at
+    a time; work handed to threads (zipping, hashing) counts in the CPU total
+    but not in the hotspots. tracemalloc's peak is process-wide, so a
+    profile marked overlapping reports the peak of every command that ran
+    alongside it, an upper bound on its own. Each profile is saved as <name>.json, plus
+    <name>.prof for pstats, in PROFILES_DIR."""
+
+    def __init__(self, enabled=None, folder=PROFILES_DIR, log=print):
+        self.enabled = env_setting() if enabled is None else enabled
+        self.folder = folder
+        self.log = log
+        self._cpu_busy = False
+        self._tracing = 0
+        self._started = 0  # commands profiled so far, to notice one starting while another runs
+        self._owns_tracing = False  # tracemalloc was started here, so it is stopped when the last command ends
+
+    def wants(self, name):
+        if self.enabled is True:
+            return True
+        return bool(self.enabled) and not isinstance(self.enabled, bool) and name in self.enabled
+
+    @contextlib.asynccontextmanager
+    async def command(self, name, game=None, account=None):
+        """Profile the block as command name when profiling is on for it; a no-op otherwise."""
+        if not self.wants(name):
+            yield None
+            return
+        operation = metrics_store.current()
+        token = None
+        if operation is None:
+            # Not measured for the metrics store; time its steps anyway
+            operation = metrics_store.Operation(name, game, account=account)
+            token = metrics_store.begin(operation)
+        profile = None
+        if not self._cpu_busy:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self._cpu_busy = True
+            except ValueError:
+                profile = None  # another profiler (a debugger, python -m cProfile) owns the thread
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        elif self._tracing == 0:
+            tracemalloc.reset_peak()  # never while another command runs: it would lose that command's peak
+        self._tracing += 1
+        self._started += 1
+        started_before = self._started
+        overlapping = self._tracing > 1
+        started = time.time()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield operation
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if profile is not None:
+                profile.disable()
+                self._cpu_busy = False
+            memory_end, memory_peak = tracemalloc.get_traced_memory()
+            # The peak is process-wide: with another command running it only bounds this one's from above
+            overlapping = overlapping or self._started != started_before
+            snapshot = tracemalloc.take_snapshot() if self._tracing == 1 else None
+            self._tracing -= 1
+            if self._owns_tracing and self._tracing == 0:
+                tracemalloc.stop()
+                self._owns_tracing = False
+            if token:
+                metrics_store.end(token)
+            meta = {"command": name, "game": game, "turn": operation.turn, "account": account,
+                    "started": started, "wall": wall, "cpu": cpu, "memory_peak": memory_peak,
+                    "memory_end": memory_end, "overlapping": overlapping, "cpu_profiled": profile is not None,
+                    "spans": [{"name": s["name"], "seconds": s["seconds"], "cpu": s.get("cpu")}
+                              for s in operation.steps]}
+            try:
+                path = await asyncio.to_thread(self._save, meta, profile, snapshot)
+                self.log(f"[Xintis] Profile of {name}: {wall:.1f}s wall, {cpu:.1f}s CPU, "
+                         f"peak {memory_peak / 1048576:.1f} MB -> {path}")
+            except Exception as e:
+                self.log(f"[Xintis] Could not save profile of {name}: {e}")
+
+    def _save(self, meta, profile, snapshot):
+        os.makedirs(self.folder, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(meta["started"]))
+        base = os.path.join(self.folder, f"{stamp}_{meta['command']}_{_slug(meta['game'])}_"
+                                         f"{meta['turn'] if meta['turn'] is not None else 'na'}")
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                               tracemalloc.Filter(False, __file__),
+                                               tracemalloc.Filter(False, "<frozen importlib._bootstrap>")])
+            meta["allocations"] = [{"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                                    "size": s.size, "count": s.count}
+                                   for s in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]]
+        if profile is not None:
+            profile.dump_stats(base + ".prof")
+            meta["stats"] = os.path.basename(base) + ".prof"
+        with open(base + ".json", "w") as f:
+            json.dump(meta, f, indent=2)
+        self._prune()
+        return base + ".json"
+
+    def _prune(self):
+        profiles = list_profiles(self.folder)
+        for path in profiles[MAX_PROFILES:]:
+            for name in (path, path[:-len(".json")] + ".prof"):
+                if os.path.exists(name):
+                    os.remove(name)
+
+
+def list_profiles(folder=PROFILES_DIR):
+    """Saved profile .json paths, newest first."""
+    if not os.path.isdir(folder):
+        return []
+    return sorted((os.path.join(folder, n) for n in os.listdir(folder) if n.endswith(".json")), reverse=True)
+
+
+def load_profile(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def hotspots(stats_path, sort="tottime", limit=15):
+    """[(self seconds, total seconds, calls, "function (file:line)")] from a .prof file, biggest first."""
+    stats = pstats.Stats(stats_path)
+    index = {"tottime": 2, "cumulative": 3, "calls": 1}[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][index])
+    return [(tt, ct, nc, f"{func} ({os.path.basename(file)}:{line})" if file != "~" else func)
+            for (file, line, func), (cc, nc, tt, ct, callers) in rows[:limit]]
+
+
+def idle_seconds(stats_path):
+    """Seconds the event loop spent blocked waiting for I/O (browser, network) during the profile."""
+    stats = pstats.Stats(stats_path)
+    return sum(tt for (file, line, func), (cc, nc, tt, ct, callers) in stats.stats.items()
+               if IDLE_FUNCTIONS.search(func))
+
+
+def describe_profiles(paths):
+    lines = []
+    for path in paths:
+        meta = load_profile(path)
+        turn = f" turn {meta['turn']}" if meta.get("turn") is not None else ""
+        lines.append(f"    {time.strftime('%Y-%m-%d %H:%M', time.localtime(meta['started']))} {meta['command']} "
+                     f"{meta.get('game') or ''}{turn}: {meta['wall']:.1f}s wall, {meta['cpu']:.1f}s CPU "
+                     f"({os.path.basename(path)})")
+    return lines or ["[+] No profiles saved yet."]
+
+
+def describe_profile(path, sort="tottime", limit=15):
+    """Log lines for one saved profile: totals, spans, top hotspots and allocations."""
+    meta = load_profile(path)
+    turn = f" turn {meta['turn']}" if meta.get("turn") is not None else ""
+    lines = [f"[+] Profile {meta['command']} {meta.get('game') or ''}{turn}: {meta['wall']:.2f}s wall, "
+             f"{meta['cpu']:.2f}s CPU, peak memory {meta['memory_peak'] / 1048576:.1f} MB"]
+    if meta.get("overlapping"):
+        lines.append("[!]   Other commands ran at the same time; their work is mixed into this profile.")
+    for span in meta["spans"]:
+        cpu = f", {span['cpu']:.2f}s CPU" if span.get("cpu") is not None else ""
+        lines.append(f"    span {span['name']}: {span['seconds']:.2f}s{cpu}")
+    stats_path = os.path.join(os.path.dirname(path), meta["stats"]) if meta.get("stats") else None
+    if stats_path and os.path.exists(stats_path):
+        lines.append(f"    event loop waiting on browser/network: {idle_seconds(stats_path):.2f}s")
+        lines.append(f"    top {limit} by {sort}:")
+        for tt, ct, nc, where in hotspots(stats_path, sort, limit):
+            lines.append(f"    {tt:8.3f}s self {ct:8.3f}s total {nc:7d} calls  {where}")
+    elif not meta.get("cpu_profiled"):
+        lines.append("    no CPU profile (another command or profiler held it)")
+    if meta.get("allocations"):
+        lines.append("    still allocated when the command ended:")
+    for allocation in meta.get("allocations", []):
+        lines.append(f"    {allocation['size'] / 1024:8.1f} KB in {allocation['count']} blocks at {allocation['where']}")
+    return lines
@@ -0,0 +1,96 @@
+import time
+
+DEFAULT_INTERVAL = 0.25  # seconds between events for one transfer, so the UI isn't flooded
+RATE_SMOOTHING = 0.3     # weight of the newest sample in the moving average rate
+
+
+class ProgressTracker:
+    """Byte progress for one transfer (download, upload, zip build or extraction).
+
+    Calls callback(event) with a dict of game, name, kind, done, total, rate
+    (bytes/s), eta (seconds or None), finished and ok. Updates are throttled
+    to one event per interval; start and finish are always reported."""
+
+    def __init__(self, callback, game, name, kind, total=None, interval=DEFAULT_INTERVAL):
+        self.callback = callback
+        self.game = game
+        self.name = name
+        self.kind = kind
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.rate = 0.0
+        self.finished = False
+        self.ok = None
+        self._last_emit = 0.0
+        self._last_time = time.monotonic()
+        self._last_done = 0
+        self._emit()
+
+    def event(self):
+        eta = None
+        if self.total and self.rate > 0:
+            eta = max(self.total - self.done, 0) / self.rate
+        return {"game": self.game, "name": self.name, "kind": self.kind, "done": self.done,
+                "total": self.total, "rate": self.rate, "eta": eta,
+                "finished": self.finished, "ok": self.ok}
+
+    def _emit(self):
+        self._last_emit = time.monotonic()
+        if self.callback:
+            try:
+                self.callback(self.event())
+            except Exception:
+                pass  # a broken progress display must never fail the transfer
+
+    def set_total(self, total):
+        self.total = total
+
+    def update(self, done):
+        """Set bytes done (e.g. the offset a resumed download starts from)."""
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        if done < self._last_done:
+            # Restarted from scratch; the old rate no longer applies
+            self.rate = 0.0
+            self._last_time, self._last_done = now, done
+        elif elapsed >= self.interval:
+            sample = (done - self._last_done) / elapsed
+            self.rate = sample if self.rate == 0 else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * self.rate
+            self._last_time, self._last_done = now, done
+        self.done = done
+        if now - self._last_emit >= self.interval:
+            self._emit()
+
+    def advance(self, count):
+        self.update(self.done + count)
+
+    def finish(self, ok=True):
+        if self.finished:
+            return
+        self.finished = True
+        self.ok = ok
+        if ok and self.total is not None:
+            self.done = self.total
+        self._emit()
+
+
+def tracker_factory(callback, game, interval=DEFAULT_INTERVAL):
+    """Return make(name, kind, total) creating trackers for one game, or None without a callback."""
+    if callback is None:
+        return None
+    return lambda name, kind, total=None: ProgressTracker(callback, game, name, kind, total, interval)
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}" if seconds < 3600 else f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
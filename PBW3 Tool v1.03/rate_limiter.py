@@ -0,0 +1,203 @@
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import time
+from urllib.parse import urlsplit
+
+# Priority classes, most urgent first
+INTERACTIVE = 0  # commands the user just clicked
+TRANSFER = 1     # file downloads and uploads
+BACKGROUND = 2   # warm page refreshes, polling
+PRIORITY_NAMES = {INTERACTIVE: "interactive", TRANSFER: "transfer", BACKGROUND: "background"}
+
+DEFAULT_RATE = 2.0           # requests per second to one site, sustained
+DEFAULT_BURST = 6            # requests that may go out back to back after a quiet spell
+DEFAULT_MAX_PER_HOST = 6     # requests in flight per host; above the engine's 4 download slots so listings get through
+DEFAULT_AGING = 10.0         # head start, in seconds of queueing, that each priority class gets over the next
+DEFAULT_DEADLINE_BOOST = 10.0   # head start, in seconds of queueing, for a request whose game is due now
+DEFAULT_DEADLINE_HORIZON = 48.0  # hours; games due later than this get no head start
+THROTTLE_STATUSES = (429, 503)
+THROTTLE_PAUSE = 30.0        # seconds to hold all requests after one of those, unless Retry-After says otherwise
+
+_priority = contextvars.ContextVar("pbw3_request_priority", default=INTERACTIVE)
+_deadline = contextvars.ContextVar("pbw3_request_deadline", default=None)
+
+
+@contextlib.contextmanager
+def priority(level):
+    """Requests made inside this block (and tasks started from it) default to level."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+@contextlib.contextmanager
+def deadline(due):
+    """Requests made inside this block are for a game whose turn is due at due (epoch seconds, or None)."""
+    token = _deadline.set(due)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def retry_after(headers):
+    """Seconds from a Retry-After header, or the default pause."""
+    value = (headers or {}).get("retry-after", "")
+    return float(value) if value.strip().isdigit() else THROTTLE_PAUSE
+
+
+class RateLimiter:
+    """Shapes every request the tool sends: a token bucket plus a cap on requests in flight per host.
+
+    Waiting requests are served most urgent class first (INTERACTIVE,
+    TRANSFER, BACKGROUND), but each class only counts for aging seconds: a
+    download goes ahead of any listing queued more than aging seconds after
+    it, so a stream of listings can't starve it. A request for a game whose
+    turn is due soon (see deadline()) gets up to deadline_boost_seconds of
+    extra head start, scaled down linearly to none at deadline_horizon_hours
+    away. Settings come from the config's "rate_limit" entry:
+    requests_per_second, burst, max_concurrent_per_host, aging_seconds,
+    deadline_boost_seconds, deadline_horizon_hours and enabled."""
+
+    def __init__(self, settings=None, log=print):
+        settings = settings or {}
+        self.enabled = settings.get("enabled", True)
+        self.rate = float(settings.get("requests_per_second", DEFAULT_RATE))
+        self.burst = float(settings.get("burst", DEFAULT_BURST))
+        self.max_per_host = int(settings.get("max_concurrent_per_host", DEFAULT_MAX_PER_HOST))
+        self.aging = settings.get("aging_seconds", DEFAULT_AGING)
+        self.deadline_boost = settings.get("deadline_boost_seconds", DEFAULT_DEADLINE_BOOST)
+        self.deadline_horizon = settings.get("deadline_horizon_hours", DEFAULT_DEADLINE_HORIZON) * 3600
+        self.log = log
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.waiters = []
+        self.active = {}  # host -> requests in flight
+        self._order = itertools.count()
+        self._timer = None
+        self.paused_until = 0.0
+        self.counters = {name: {"granted": 0, "waited": 0, "wait_total": 0.0, "wait_max": 0.0}
+                         for name in PRIORITY_NAMES.values()}
+        self.backoffs = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _head_start(self, due):
+        """Seconds of queueing credit for a request whose game's turn is due at due."""
+        if due is None or not self.deadline_horizon:
+            return 0.0
+        slack = min(max(due - time.time(), 0.0), self.deadline_horizon)
+        return self.deadline_boost * (1 - slack / self.deadline_horizon)
+
+    def _rank(self, waiter):
+        # Each class below INTERACTIVE counts as having queued aging seconds later
+        if self.aging:
+            return waiter["queued"] + waiter["priority"] * self.aging - self._head_start(waiter["due"]), waiter["order"]
+        return waiter["priority"], -self._head_start(waiter["due"]), waiter["order"]
+
+    def _count(self, level, waited):
+        counter = self.counters[PRIORITY_NAMES[level]]
+        counter["granted"] += 1
+        if waited > 0:
+            counter["waited"] += 1
+            counter["wait_total"] += waited
+            counter["wait_max"] = max(counter["wait_max"], waited)
+
+    def _dispatch(self):
+        """Grant waiting requests while tokens and host capacity allow; re-arm a timer otherwise."""
+        self._timer = None
+        self._refill()
+        now = time.monotonic()
+        self.waiters = [w for w in self.waiters if not w["future"].done()]
+        while self.waiters and self.tokens >= 1 and now >= self.paused_until:
+            ready = [w for w in self.waiters if self.active.get(w["host"], 0) < self.max_per_host]
+            if not ready:
+                return  # a release() will dispatch again
+            waiter = min(ready, key=self._rank)
+            self.waiters.remove(waiter)
+            self.tokens -= 1
+            self.active[waiter["host"]] = self.active.get(waiter["host"], 0) + 1
+            self._count(waiter["priority"], now - waiter["queued"])
+            waiter["future"].set_result(None)
+        if self.waiters and self._timer is None:
+            delay = max((1 - self.tokens) / self.rate, self.paused_until - now, 0.01)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    async def acquire(self, url, level=None):
+        """Wait for a turn to send a request to url; pair with release(url)."""
+        level = current_priority() if level is None else level
+        host = urlsplit(url).hostname or ""
+        if not self.enabled:
+            self.active[host] = self.active.get(host, 0) + 1
+            self._count(level, 0)
+            return
+        self._refill()
+        if not self.waiters and self.tokens >= 1 and self.active.get(host, 0) < self.max_per_host \
+                and time.monotonic() >= self.paused_until:
+            self.tokens -= 1
+            self.active[host] = self.active.get(host, 0) + 1
+            self._count(level, 0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append({"priority": level, "order": next(self._order), "queued": time.monotonic(),
+                             "host": host, "due": _deadline.get(), "future": future})
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(url)  # granted just as we were cancelled
+            raise
+
+    def release(self, url):
+        host = urlsplit(url).hostname or ""
+        self.active[host] = max(self.active.get(host, 0) - 1, 0)
+        if self.waiters:
+            self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url, level=None):
+        """async with limiter.slot(url): one request to url, counted against the budget and host cap."""
+        await self.acquire(url, level)
+        try:
+            yield
+        finally:
+            self.release(url)
+
+    def backoff(self, seconds, reason=""):
+        """The site pushed back (429/503): hold every new request for seconds."""
+        self.backoffs += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.log(f"[Xintis] Server is throttling{f' ({reason})' if reason else ''}; pausing requests for {seconds:.0f}s.")
+
+    def stats(self):
+        """Budget, queue and per-class wait figures for the metrics report; safe to call from the UI thread."""
+        tokens = min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return {"enabled": self.enabled, "rate": self.rate, "burst": self.burst, "tokens": tokens,
+                "queued": len(self.waiters), "active": dict(self.active), "backoffs": self.backoffs,
+                "classes": {name: dict(counter) for name, counter in self.counters.items()}}
+
+
+def describe_stats(stats):
+    if not stats["enabled"]:
+        return ["[+] Request limiter: disabled."]
+    in_flight = ", ".join(f"{host} {count}" for host, count in stats["active"].items() if count) or "none"
+    lines = [f"[+] Request limiter: {stats['rate']:g}/s (burst {stats['burst']:g}), {stats['queued']} queued, "
+             f"in flight: {in_flight}, {stats['backoffs']} server backoff(s)"]
+    for name, counter in stats["classes"].items():
+        if counter["granted"]:
+            average = counter["wait_total"] / counter["waited"] if counter["waited"] else 0.0
+            lines.append(f"    {name}: {counter['granted']} request(s), {counter['waited']} delayed, "
+                         f"avg wait {average:.1f}s, max {counter['wait_max']:.1f}s")
+    return lines
@@ -0,0 +1,98 @@
+from urllib.parse import urlparse
+
+# Hosts the tool actually needs; everything else (CDNs, analytics, gravatar...) is third party
+FIRST_PARTY_SUFFIXES = ("pbw3.net",)
+
+# Resource types each profile refuses to load. Documents are always allowed.
+PROFILES = {
+    # Nothing blocked: what a normal browser would load
+    "full": {"block_types": set(), "block_third_party": False},
+    # Reading links and submitting plain forms (login, documents listing, delete links)
+    "listing": {
+        "block_types": {"image", "media", "font", "stylesheet", "script", "xhr", "fetch",
+                        "eventsource", "websocket", "manifest", "texttrack", "other"},
+        "block_third_party": True,
+    },
+    # The upload form is shown by a script and styled by the theme, so keep both
+    "upload": {
+        "block_types": {"image", "media", "font", "manifest", "texttrack", "other"},
+        "block_third_party": True,
+    },
+}
+
+DEFAULT_COMMAND_PROFILES = {
+    "login": "listing",
+    "refresh_game_list": "listing",
+    "host_download": "listing",
+    "player_download": "listing",
+    "host_upload": "upload",
+    "player_upload": "upload",
+}
+
+
+def is_first_party(url):
+    host = urlparse(url).hostname or ""
+    return any(host == suffix or host.endswith("." + suffix) for suffix in FIRST_PARTY_SUFFIXES)
+
+
+class ResourcePolicy:
+    """Request-routing policy for a Playwright browser context.
+
+    Commands run concurrently in one context, so the profile is tracked per
+    page: use() assigns a command's profile to the page it drives, and pages
+    nobody assigned (upload pages, warm pages) get default_profile. One route
+    on the context covers every page."""
+
+    def __init__(self, command_profiles=None, log=print, default_profile="upload"):
+        self.command_profiles = dict(DEFAULT_COMMAND_PROFILES)
+        self.command_profiles.update(command_profiles or {})
+        self.default_profile = default_profile
+        self.page_profiles = {}
+        self.log = log
+        self.blocked = {}
+        self.allowed = 0
+
+    async def install(self, context):
+        await context.route("**/*", self._route)
+
+    def assign(self, page, name):
+        if name not in PROFILES:
+            self.log(f"[!] Unknown resource profile '{name}'; loading everything.")
+            name = "full"
+        if page not in self.page_profiles:
+            page.on("close", lambda *_: self.page_profiles.pop(page, None))
+        self.page_profiles[page] = name
+
+    def use(self, command, page):
+        """Apply the profile configured for command to page."""
+        self.assign(page, self.command_profiles.get(command, self.default_profile))
+
+    def profile_for(self, request):
+        try:
+            page = request.frame.page
+        except Exception:
+            # Service worker and other frameless requests
+            return self.default_profile
+        return self.page_profiles.get(page, self.default_profile)
+
+    def should_block(self, url, resource_type, profile_name):
+        profile = PROFILES[profile_name]
+        if resource_type == "document":
+            return profile["block_third_party"] and not is_first_party(url)
+        if resource_type in profile["block_types"]:
+            return True
+        return profile["block_third_party"] and not is_first_party(url)
+
+    async def _route(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type, self.profile_for(request)):
+            self.blocked[request.resource_type] = self.blocked.get(request.resource_type, 0) + 1
+            await route.abort()
+        else:
+            self.allowed += 1
+            # Hand over to any earlier route (e.g. the traffic replayer), else the network
+            await route.fallback()
+
+    def stats(self):
+        return {"allowed": self.allowed, "blocked": sum(self.blocked.values()),
+                "blocked_by_type": dict(self.blocked)}
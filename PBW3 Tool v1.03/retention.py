@@ -0,0 +1,218 @@
+import os
+import re
+import threading
+import time
+
+DEFAULT_INTERVAL_HOURS = 6
+PART_MAX_AGE_DAYS = 7      # interrupted downloads older than this won't be resumed
+THROTTLE_SECONDS = 0.02    # pause between deletions so pruning never competes with turn operations
+BUSY_RETRY_SECONDS = 30
+
+
+def retention_policy(game_config, config=None):
+    """The game's "retention" rules, falling back to the config-wide ones; None when neither is set.
+
+    Rules: keep_last (newest N turns), keep_every (every Kth turn, e.g. 10,
+    20, 30) and max_size_mb (cap on the game's Turns folder)."""
+    policy = game_config.get("retention")
+    if policy is None and config:
+        policy = config.get("retention")
+    return policy or None
+
+
+def turn_dirs(game_config):
+    """[(turn number, path)] for the game's Turns/Turn_N folders, oldest first."""
+    turns_dir = os.path.join(game_config["savegame_folder"], "Turns")
+    if not os.path.isdir(turns_dir):
+        return []
+    found = []
+    for name in os.listdir(turns_dir):
+        match = re.fullmatch(r"Turn_(\d+)", name)
+        if match and os.path.isdir(os.path.join(turns_dir, name)):
+            found.append((int(match.group(1)), os.path.join(turns_dir, name)))
+    return sorted(found)
+
+
+def path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def plan_prune(game_config, policy=None, now=None):
+    """Work out what retention would delete for one game, without deleting anything.
+
+    Returns {"game", "prune": [{path, size, reason}], "keep": [...],
+    "pruned_bytes", "kept_bytes"}. Turn folders are only touched when a
+    policy is set; stale turn zips and old .part files (in the savegame
+    folder or a kept turn folder) always are. The newest turn is never pruned."""
+    now = now or time.time()
+    folder = game_config["savegame_folder"]
+    game = game_config.get("name", "").lower()
+    prune, keep = [], []
+
+    turns = [(turn, path, path_size(path)) for turn, path in turn_dirs(game_config)]
+    if policy and turns:
+        keep_last = policy.get("keep_last")
+        keep_every = policy.get("keep_every")
+        newest = turns[-1][0]
+        if keep_last:
+            recent = {t for t, _, _ in turns[-keep_last:]}
+        elif keep_every:
+            recent = {newest}  # keep_every alone: every Kth turn plus the newest
+        else:
+            recent = {t for t, _, _ in turns}
+        kept = []
+        for turn, path, size in turns:
+            if turn in recent or turn == newest:
+                kept.append((turn, path, size, "recent"))
+            elif keep_every and turn % keep_every == 0:
+                kept.append((turn, path, size, f"every {keep_every}th"))
+            else:
+                reason = f"older than last {keep_last} turns" if keep_last else f"not an every {keep_every}th turn"
+                prune.append({"path": path, "size": size, "reason": reason})
+        cap = policy.get("max_size_mb")
+        if cap:
+            # Over the cap: drop milestone turns first, then the oldest recent ones, never the newest
+            total = sum(size for _, _, size, _ in kept)
+            order = sorted(kept, key=lambda k: (k[3] == "recent", k[0]))
+            for entry in order:
+                turn, path, size, _ = entry
+                if total <= cap * 1024 * 1024 or turn == newest:
+                    break
+                kept.remove(entry)
+                prune.append({"path": path, "size": size, "reason": f"Turns folder over {cap} MB"})
+                total -= size
+        keep.extend({"path": path, "size": size, "reason": reason} for _, path, size, reason in kept)
+    else:
+        keep.extend({"path": path, "size": size, "reason": "no retention rules"} for _, path, size in turns)
+
+    current_turn = int(game_config.get("turn_number") or 0)
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            if not os.path.isfile(path):
+                continue
+            lower = name.lower()
+            match = re.search(r"(\d+)\.zip$", lower)
+            if match and lower.startswith(game) and int(match.group(1)) < current_turn:
+                # Same rule as after a successful upload; the current turn's zip is kept for a retry
+                prune.append({"path": path, "size": os.path.getsize(path), "reason": "stale turn zip"})
+            elif _stale_part(path, now):
+                prune.append(_part_entry(path))
+    # Host downloads go straight into Turns/Turn_N, so interrupted ones are left there too
+    for kept in keep:
+        if os.path.isdir(kept["path"]):
+            for name in os.listdir(kept["path"]):
+                path = os.path.join(kept["path"], name)
+                if os.path.isfile(path) and _stale_part(path, now):
+                    prune.append(_part_entry(path))
+                    kept["size"] -= prune[-1]["size"]
+
+    return {"game": game_config.get("display_name", game_config.get("name", "")), "prune": prune, "keep": keep,
+            "pruned_bytes": sum(p["size"] for p in prune), "kept_bytes": sum(k["size"] for k in keep)}
+
+
+def _stale_part(path, now):
+    return path.lower().endswith(".part") and now - os.path.getmtime(path) > PART_MAX_AGE_DAYS * 86400
+
+
+def _part_entry(path):
+    return {"path": path, "size": os.path.getsize(path),
+            "reason": f"interrupted download older than {PART_MAX_AGE_DAYS} days"}
+
+
+def describe_report(report, dry_run=True):
+    verb = "Would free" if dry_run else "Freed"
+    lines = [f"[+] Retention {report['game']}: {verb} {report['pruned_bytes'] / 1048576:.1f} MB "
+             f"({len(report['prune'])} item(s)); keeping {report['kept_bytes'] / 1048576:.1f} MB"]
+    for item in report["prune"]:
+        lines.append(f"    {'would delete' if dry_run else 'deleted'} {item['path']} "
+                     f"({item['size'] / 1048576:.1f} MB, {item['reason']})")
+    return lines
+
+
+def apply_prune(report, log, is_busy=None, throttle=THROTTLE_SECONDS):
+    """Delete what plan_prune() selected, one file at a time, waiting while is_busy() is true."""
+    freed = 0
+    for item in report["prune"]:
+        path = item["path"]
+        try:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path, topdown=False):
+                    for name in files:
+                        _wait_idle(is_busy)
+                        os.remove(os.path.join(root, name))
+                        time.sleep(throttle)
+                    for name in dirs:
+                        os.rmdir(os.path.join(root, name))
+                os.rmdir(path)
+            elif os.path.exists(path):
+                _wait_idle(is_busy)
+                os.remove(path)
+                time.sleep(throttle)
+            freed += item["size"]
+        except OSError as e:
+            log(f"[!] Could not delete {path}: {e}")
+    return freed
+
+
+def _wait_idle(is_busy):
+    while is_busy and is_busy():
+        time.sleep(BUSY_RETRY_SECONDS)
+
+
+class BackgroundPruner(threading.Thread):
+    """Low-priority thread applying retention to every game every interval hours.
+
+    It only deletes while no session command is running, pausing mid-prune
+    otherwise. With dry_run it just logs what it would delete."""
+
+    def __init__(self, get_games, get_config, log, is_busy=None, interval_hours=DEFAULT_INTERVAL_HOURS,
+                 dry_run=False, first_run_delay=300):
+        super().__init__(daemon=True)
+        self.get_games = get_games
+        self.get_config = get_config
+        self.log = log
+        self.is_busy = is_busy
+        self.interval = interval_hours * 3600
+        self.dry_run = dry_run
+        self.first_run_delay = first_run_delay
+        self.stopped = threading.Event()
+
+    def run(self):
+        # Start after the app has settled (login, warm pages) rather than competing with it
+        delay = self.first_run_delay
+        while not self.stopped.wait(delay):
+            self.prune_all()
+            delay = self.interval
+
+    def prune_all(self):
+        for game in list(self.get_games()):
+            if self.stopped.is_set():
+                return
+            if not game.get("savegame_folder"):
+                continue
+            try:
+                report = plan_prune(game, retention_policy(game, self.get_config()))
+                if not report["prune"]:
+                    continue
+                if self.dry_run:
+                    for line in describe_report(report, dry_run=True):
+                        self.log(line)
+                    continue
+                freed = apply_prune(report, self.log, self.is_busy)
+                self.log(f"[+] Retention {report['game']}: freed {freed / 1048576:.1f} MB "
+                         f"({len(report['prune'])} item(s)).")
+            except Exception as e:
+                self.log(f"[!] Retention failed for {game.get('display_name', game.get('name'))}: {e}")
+
+    def stop(self):
+        self.stopped.set()
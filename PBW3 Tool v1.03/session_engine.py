@@ -0,0 +1,145 @@
+import asyncio
+import threading
+from session_lifecycle import DEFAULT_BROWSER_RECYCLE_EVERY
+from rate_limiter import RateLimiter
+
+DEFAULT_MAX_DOWNLOADS = 4
+
+
+class SessionEngine(threading.Thread):
+    """Runs a single asyncio event loop and Playwright browser shared by every session.
+
+    All game operations are coroutines on this loop. Other threads (the Tk UI)
+    hand work over with submit(), which is thread-safe and returns a
+    concurrent.futures.Future. Every session's requests to the site go
+    through the one shared limiter. With launch_browser=False (the mock
+    transport) the loop runs without Playwright and browser stays None."""
+
+    def __init__(self, browser_type, browser_path, log_callback=None, max_downloads=DEFAULT_MAX_DOWNLOADS,
+                 browser_recycle_every=DEFAULT_BROWSER_RECYCLE_EVERY, rate_limit=None, launch_browser=True):
+        super().__init__(daemon=True)
+        self.browser_type = browser_type
+        self.browser_path = browser_path
+        self.launch_browser = launch_browser
+        self.log_callback = log_callback
+        self.max_downloads = max_downloads
+        self.loop = asyncio.new_event_loop()
+        self.playwright = None
+        self.browser = None
+        self.startup_error = None
+        self.browser_recycle_every = browser_recycle_every
+        self.context_recycles = 0
+        self.sessions = []  # Xintis sessions with a context in this browser
+        self.recycle_lock = None
+        self.limiter = RateLimiter(rate_limit, log=self.log)
+        self._ready = None
+        self._download_slots = None
+        self._started = threading.Event()
+
+    def log(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self._ready = asyncio.Event()
+        self._download_slots = asyncio.Semaphore(self.max_downloads)
+        self.recycle_lock = asyncio.Lock()
+        self._started.set()
+        self.loop.create_task(self._launch())
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self._shutdown())
+            self.loop.close()
+
+    async def _launch_browser(self):
+        if self.browser_type == "chrome" or self.browser_type == "edge":
+            self.browser = await self.playwright.chromium.launch(executable_path=self.browser_path, headless=True)
+        elif self.browser_type == "firefox":
+            self.browser = await self.playwright.firefox.launch(executable_path=self.browser_path, headless=True)
+        else:
+            raise RuntimeError(f"Unsupported browser type: {self.browser_type}")
+
+    async def _launch(self):
+        if not self.launch_browser:
+            self._ready.set()
+            return
+        try:
+            from playwright.async_api import async_playwright  # not needed without a browser
+            self.playwright = await async_playwright().start()
+            await self._launch_browser()
+        except Exception as e:
+            self.startup_error = e
+            self.log(f"[Xintis] Could not start browser: {e}")
+        self._ready.set()
+
+    async def _shutdown(self):
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+        if self.playwright:
+            await self.playwright.stop()
+
+    def ensure_started(self):
+        if not self.is_alive():
+            self.start()
+        self._started.wait()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the engine loop from any thread."""
+        self.ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        if self.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def wait_ready(self):
+        """Wait for the browser launch; raises if it failed."""
+        await self._ready.wait()
+        if self.startup_error:
+            raise RuntimeError(f"Browser unavailable: {self.startup_error}")
+        return self.browser
+
+    def register(self, session):
+        if session not in self.sessions:
+            self.sessions.append(session)
+
+    def unregister(self, session):
+        if session in self.sessions:
+            self.sessions.remove(session)
+
+    async def context_recycled(self):
+        """Count a context rebuild; relaunches the browser every browser_recycle_every of them."""
+        self.context_recycles += 1
+        if self.browser_recycle_every and self.context_recycles >= self.browser_recycle_every:
+            await self.recycle_browser(f"{self.context_recycles} context rebuilds")
+
+    async def recycle_browser(self, reason):
+        """Relaunch the browser, parking every session's logged-in state across the restart."""
+        async with self.recycle_lock:
+            self.log(f"[Xintis] Relaunching browser ({reason})...")
+            sessions = list(self.sessions)
+            for session in sessions:
+                await session.suspend()
+            try:
+                await self.browser.close()
+            except Exception:
+                pass  # already crashed
+            await self._launch_browser()
+            self.context_recycles = 0
+            for session in sessions:
+                await session.resume()
+            self.log("[Xintis] Browser relaunched.")
+
+    def browser_alive(self):
+        if not self.launch_browser:
+            return True  # nothing to crash
+        return self.browser is not None and self.browser.is_connected()
+
+    def download_slot(self):
+        """Semaphore bounding concurrent HTTP downloads across all sessions."""
+        return self._download_slots
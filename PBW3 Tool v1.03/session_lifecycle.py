@@ -0,0 +1,81 @@
+import time
+
+DEFAULT_MAX_COMMANDS = 200         # commands served by one browser context before it is rebuilt
+DEFAULT_MAX_MEMORY_MB = 512        # JS heap across the context's pages before it is rebuilt
+DEFAULT_MAX_AGE_HOURS = 12         # rebuild even an idle context this often (the warm pool keeps navigating)
+DEFAULT_BROWSER_RECYCLE_EVERY = 4  # context rebuilds (all accounts) between browser relaunches
+CHECK_INTERVAL = 60.0              # seconds between idle memory checks
+DEAD_PAGE_MARKERS = ("target closed", "has been closed", "page crashed", "target crashed",
+                     "browser has disconnected", "connection closed")
+
+
+def is_dead_page_error(error):
+    """True for Playwright errors meaning the page, context or browser is gone, rather than a site problem."""
+    message = str(error).lower()
+    return any(marker in message for marker in DEAD_PAGE_MARKERS)
+
+
+class SessionLifecycle:
+    """Decides when a session's browser context has grown too old or too big and should be rebuilt.
+
+    Tracks commands served and context age, and samples JS heap size over
+    CDP (Chromium only; other browsers fall back to the count and age)."""
+
+    def __init__(self, settings=None, log=print):
+        settings = settings or {}
+        self.max_commands = settings.get("max_commands", DEFAULT_MAX_COMMANDS)
+        self.max_memory_mb = settings.get("max_memory_mb", DEFAULT_MAX_MEMORY_MB)
+        self.max_age = settings.get("max_age_hours", DEFAULT_MAX_AGE_HOURS) * 3600
+        self.log = log
+        self.commands = 0
+        self.started = time.monotonic()
+        self.last_memory_mb = None
+        self.memory_supported = True
+
+    def reset(self):
+        self.commands = 0
+        self.started = time.monotonic()
+        self.last_memory_mb = None
+
+    def command_done(self):
+        self.commands += 1
+
+    async def memory_mb(self, context):
+        """Total JS heap (MB) of the context's open pages, or None where CDP isn't available."""
+        if not self.memory_supported:
+            return None
+        total = 0
+        for page in list(context.pages):
+            if page.is_closed():
+                continue
+            try:
+                cdp = await context.new_cdp_session(page)
+            except Exception:
+                # Firefox has no CDP; stop asking
+                self.memory_supported = False
+                return None
+            try:
+                await cdp.send("Performance.enable")
+                metrics = await cdp.send("Performance.getMetrics")
+                total += next((m["value"] for m in metrics["metrics"] if m["name"] == "JSHeapTotalSize"), 0)
+            except Exception:
+                pass  # page navigated or closed while sampling
+            finally:
+                try:
+                    await cdp.detach()
+                except Exception:
+                    pass
+        self.last_memory_mb = total / (1024 * 1024)
+        return self.last_memory_mb
+
+    async def recycle_reason(self, context):
+        """Why the context should be rebuilt now, or None."""
+        if self.max_commands and self.commands >= self.max_commands:
+            return f"{self.commands} commands served"
+        if self.max_age and time.monotonic() - self.started >= self.max_age:
+            return f"context open {(time.monotonic() - self.started) / 3600:.0f}h"
+        if self.max_memory_mb:
+            memory = await self.memory_mb(context)
+            if memory is not None and memory >= self.max_memory_mb:
+                return f"{memory:.0f} MB JS heap"
+        return None
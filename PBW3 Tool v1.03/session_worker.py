@@ -1,96 +1,373 @@
-import threading
-import queue
-from playwright.sync_api import sync_playwright
+import asyncio
+import contextlib
+import time
 from bs4 import BeautifulSoup
-import os, shutil
-from pbw3_host_mode import host_upload
+import os, re
+from pbw3_host_mode import current_turn_number, build_turn_zip, turn_upload_items, finish_turn_upload
+from download_manager import download_file, extract_zip
+from progress import tracker_factory
+from documents_index import (DocumentsIndex, parse_listing_page, describe_diff, turn_from_documents, document_id,
+                             newest_first, by_upload_date, merge_partial, MAX_PAGES)
+from resource_policy import ResourcePolicy
+from page_pool import PagePool
+from session_engine import SessionEngine
+from session_lifecycle import SessionLifecycle, is_dead_page_error, CHECK_INTERVAL
+from host_pipeline import (HostPipeline, StageError, pipeline_job, processor_command, run_processor, validate_outputs,
+                           waiting_on_user)
+from upload_batch import DEFAULT_MAX_SESSIONS
+from manifest import record_files, record_transfers
+from turn_archive import ArchiveStats, turn_folder, place, stage, DEFAULT_LINKS
+import metrics_store
+from profiler import Profiler
+from rate_limiter import priority, deadline, retry_after, INTERACTIVE, TRANSFER, BACKGROUND
+from turn_engine import PlaywrightBackend, session_get
+from group_roles import group_url, detect_role
+from deadlines import parse_deadline, describe_due
+from submissions import host_upload_keys, player_upload_title, submission_status
 
-class Xintis(threading.Thread):
-    def __init__(self, log_callback, browser_type, browser_path):
-        super().__init__(daemon=True)
-        self.command_queue = queue.Queue()
+# Commands timed into the metrics store (see metrics_store.py)
+MEASURED_COMMANDS = {"host_download", "host_upload", "player_download", "player_upload", "run_host_mode",
+                     "run_player_mode"}
+# Commands nobody is waiting on; their requests queue behind the user's (see rate_limiter.py)
+BACKGROUND_COMMANDS = {"warm_pages", "check_deadlines", "poll_documents", "poll_submissions"}
+
+
+class Xintis:
+    """One PBW3 account's browser session.
+
+    Every command is a coroutine on the shared SessionEngine loop, so several
+    games (and several accounts, each with its own Xintis and browser context)
+    are worked on concurrently without a thread per task. The public methods
+    are thread-safe and return a concurrent.futures.Future, so the Tk UI can
+    call them as before. Commands for the same game still run one at a time.
+
+    The browser context is rebuilt from the cached login state when it gets
+    too old or too big (see SessionLifecycle), and a command that hits a
+    crashed page is retried once on a rebuilt context. Documents listings,
+    logging in and uploads go through backend (see turn_engine.py); with
+    the mock backend there is no browser context at all."""
+
+    def __init__(self, log_callback, browser_type, browser_path, resource_profiles=None, page_pool_settings=None,
+                 engine=None, recorder=None, replayer=None, lifecycle_settings=None, metrics=None, backend=None,
+                 profiler=None, deadlines=None):
+        self.engine = engine or SessionEngine(browser_type, browser_path, log_callback)
         self.log_callback = log_callback
-        self._stop_event = threading.Event()
-        self.browser = None
         self.context = None
         self.page = None
         self.logged_in = False
         self.username = None
         self.password = None
+        self.user_agent = None
         self.running = True
         self.confirm_delete_callback = None  # UI callback for delete confirmation
         self.save_config_callback = None  # UI callback for saving config
+        self.progress_callback = None  # UI callback for byte progress events
         self.browser_type = browser_type
         self.browser_path = browser_path
+        self.resource_policy = ResourcePolicy(resource_profiles, log=self.log)
+        self.page_pool = None
+        self.page_pool_settings = page_pool_settings or {}
+        self.documents_index = DocumentsIndex()
+        self.recorder = recorder  # traffic_replay.TrafficRecorder capturing this session
+        self.replayer = replayer  # traffic_replay.TrafficReplayer standing in for the live site
+        self.lifecycle = SessionLifecycle(lifecycle_settings, log=self.log)
+        self.metrics = metrics  # metrics_store.MetricsStore recording how long each operation takes
+        self.backend = backend or PlaywrightBackend()
+        self.profiler = profiler or Profiler(log=self.log)  # off unless PBW3_PROFILE or the UI turns it on
+        self.deadlines = deadlines  # deadlines.DeadlineCache: games due sooner get their requests served first
+        self._auth_state = None  # storage state (cookies) of the logged-in context, reused on rebuild
+        self._session_future = None
+        self._login_future = None
+        self._game_locks = {}
+        self._background = set()
+        self._active = 0
+        self._open = None  # set while commands may use the context; cleared during a rebuild
+        self._idle = None  # set while no command is using the context
+        self._checking = False
 
     def log(self, message):
         if self.log_callback:
             self.log_callback(message)
 
-    def run(self):
-        with sync_playwright() as p:
-            if self.browser_type == "chrome" or self.browser_type == "edge":
-                self.browser = p.chromium.launch(executable_path=self.browser_path, headless=True)
-            elif self.browser_type == "firefox":
-                self.browser = p.firefox.launch(executable_path=self.browser_path, headless=True)
-            else:
-                raise RuntimeError(f"Unsupported browser type: {self.browser_type}")
-            self.context = self.browser.new_context(accept_downloads=True)
-            self.page = self.context.new_page()
-            while self.running:
+    def start(self):
+        self._session_future = self.engine.submit(self._open_session())
+
+    async def _open_session(self):
+        try:
+            await self.engine.wait_ready()
+        except RuntimeError as e:
+            self.log(f"[Xintis] {e}")
+            return False
+        self._open = asyncio.Event()
+        self._open.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        await self._new_context()
+        self.engine.register(self)
+        if not self.backend.browserless:
+            self._spawn(self._watch_lifecycle())
+        return True
+
+    async def _new_context(self, storage_state=None):
+        if self.backend.browserless:
+            # No context or page pool; every request goes to the replayer's local server
+            if self.replayer.base_url is None:
+                await self.replayer.serve()
+            return
+        options = dict(self.recorder.context_options()) if self.recorder else {}
+        if storage_state:
+            options["storage_state"] = storage_state
+        self.context = await self.engine.browser.new_context(accept_downloads=True, **options)
+        if self.replayer:
+            # Routes run newest first, so the policy sees requests before falling back to the archive
+            await self.replayer.install(self.context)
+            if self.replayer.base_url is None:
+                await self.replayer.serve()
+        await self.resource_policy.install(self.context)
+        self.page = await self.context.new_page()
+        self.page_pool = PagePool(self.context, self.resource_policy, self.log, limiter=self.engine.limiter,
+                                  **self.page_pool_settings)
+        self._spawn(self.page_pool.run(lambda: self.logged_in and self.running))
+
+    async def _close_context(self):
+        try:
+            if self.page_pool:
+                await self.page_pool.close()
+            if self.context:
+                await self.context.close()
+        except Exception:
+            pass  # context or browser already dead
+        self.page_pool = None
+        self.context = None
+
+    async def suspend(self):
+        """Wait for running commands, keep the login state and close the context (see resume())."""
+        self._open.clear()
+        await self._idle.wait()
+        if self.logged_in:
+            try:
+                self._auth_state = await self.context.storage_state()
+            except Exception:
+                pass  # dead context; fall back to the state cached at login
+        await self._close_context()
+
+    async def resume(self):
+        """Open a fresh context with the saved login state and let commands through again."""
+        try:
+            await self._new_context(self._auth_state)
+            if self.logged_in and self._auth_state is None:
+                await self._handle_login(self.username, self.password)
+        except Exception as e:
+            self.log(f"[Xintis] Could not rebuild browser session: {e}")
+        finally:
+            self.lifecycle.reset()
+            self._open.set()
+
+    async def _recycle(self, reason):
+        async with self.engine.recycle_lock:
+            self.log(f"[Xintis] Rebuilding browser context ({reason})...")
+            await self.suspend()
+            await self.resume()
+        await self.engine.context_recycled()
+
+    async def _maybe_recycle(self):
+        if self.recorder or not self.logged_in or self._active or self._checking or self.context is None:
+            return  # a recording must stay in one context; busy contexts are checked later
+        self._checking = True
+        try:
+            reason = await self.lifecycle.recycle_reason(self.context)
+            if reason:
+                await self._recycle(reason)
+        finally:
+            self._checking = False
+
+    async def _recover(self):
+        """Rebuild after a crashed page or browser."""
+        if not self.engine.browser_alive():
+            await self.engine.recycle_browser("browser crashed")
+        else:
+            await self._recycle("page crashed")
+
+    async def _watch_lifecycle(self):
+        # Catches growth while idle: the warm page pool keeps navigating between commands
+        while self.running:
+            await asyncio.sleep(CHECK_INTERVAL)
+            if not self.running or not self._open.is_set():
+                continue
+            try:
+                if not self.engine.browser_alive():
+                    await self._recover()
+                else:
+                    await self._maybe_recycle()
+            except Exception as e:
+                self.log(f"[Xintis] Browser health check failed: {e}")
+
+    @contextlib.asynccontextmanager
+    async def _in_session(self):
+        await self._open.wait()
+        self._active += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._idle.set()
+
+    async def _close_session(self):
+        self.engine.unregister(self)
+        await self._close_context()
+        if self.recorder:
+            self.recorder.save()
+        if self.replayer:
+            await self.replayer.close()
+
+    def _spawn(self, coro):
+        # Keep a reference so background tasks aren't garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def _game_lock(self, game_config):
+        key = game_config.get("name") or game_config.get("document_url")
+        if key not in self._game_locks:
+            self._game_locks[key] = asyncio.Lock()
+        return self._game_locks[key]
+
+    def submit(self, name, handler, *args, game_config=None):
+        """Run handler(*args) as a coroutine on the engine; thread-safe.
+
+        Waits for the session to open and for any pending login first, and
+        holds the game's lock when game_config is given."""
+        return self.engine.submit(self._run_command(name, handler, args, game_config))
+
+    async def _run_command(self, name, handler, args, game_config):
+        if not await asyncio.wrap_future(self._session_future):
+            return None
+        if self._login_future is not None and name != 'login':
+            await asyncio.wrap_future(self._login_future)
+        operation = None
+        if self.metrics and game_config is not None and name in MEASURED_COMMANDS:
+            operation = metrics_store.Operation(name, self._game_label(game_config), account=self.username)
+            token = metrics_store.begin(operation)
+        try:
+            with priority(BACKGROUND if name in BACKGROUND_COMMANDS else INTERACTIVE), deadline(self._due(game_config)):
+                async with self.profiler.command(name, game_config and self._game_label(game_config), self.username):
+                    return await self._attempt_command(name, handler, args, game_config)
+        finally:
+            if operation:
+                metrics_store.end(token)
+                await self._record_metrics(operation.finish(operation.ok))
+
+    async def _attempt_command(self, name, handler, args, game_config):
+        for attempt in (1, 2):
+            dead = None
+            result = None
+            async with self._in_session():
                 try:
-                    cmd, args = self.command_queue.get(timeout=0.2)
-                except queue.Empty:
-                    continue
-                if cmd == 'stop':
-                    self.running = False
-                    break
-                elif cmd == 'login':
-                    self._handle_login(*args)
-                elif cmd == 'host_download':
-                    self._handle_host_download(*args)
-                elif cmd == 'host_upload':
-                    self._handle_host_upload(*args)
-                elif cmd == 'player_download':
-                    self._handle_player_download(*args)
-                elif cmd == 'player_upload':
-                    self._handle_player_upload(*args)
-                elif cmd == 'run_host_mode':
-                    self._handle_run_host_mode(*args)
-                elif cmd == 'run_player_mode':
-                    self._handle_run_player_mode(*args)
-                elif cmd == 'refresh_game_list':
-                    self._handle_refresh_game_list(*args)
-                # Add more commands as needed
-            self.browser.close()
+                    if game_config is None:
+                        result = await handler(*args)
+                    else:
+                        async with self._game_lock(game_config):
+                            result = await handler(*args)
+                except Exception as e:
+                    if attempt == 1 and is_dead_page_error(e):
+                        dead = e
+                    else:
+                        self.log(f"[Xintis] {name} failed: {e}")
+                        metrics_store.mark_failed()
+            if dead is None:
+                self.lifecycle.command_done()
+                await self._maybe_recycle()
+                return result
+            self.log(f"[Xintis] {name}: browser page died ({dead}); rebuilding session and retrying...")
+            await self._recover()
 
-    def stop(self):
-        self.command_queue.put(('stop', ()))
+    def _due(self, game_config):
+        if self.deadlines is None or game_config is None:
+            return None
+        return self.deadlines.due(game_config)
+
+    def _game_label(self, game_config):
+        return game_config.get("display_name") or game_config.get("name", "")
+
+    async def _record_metrics(self, operation):
+        try:
+            await asyncio.to_thread(self.metrics.record, operation)
+        except Exception as e:
+            self.log(f"[Xintis] Could not record metrics: {e}")
+
+    def busy(self):
+        """True while a command is using the browser session."""
+        return self._active > 0
+
+    def close(self):
+        """Close this session, leaving the shared engine running for the others."""
         self.running = False
+        return self.engine.submit(self._close_session())
+
+    def stop(self):
+        future = self.close()
+        future.add_done_callback(lambda _: self.engine.stop())
+        return future
 
     def login(self, username, password):
-        self.command_queue.put(('login', (username, password)))
+        self._login_future = self.submit('login', self._handle_login, username, password)
+        return self._login_future
 
     def host_download(self, game_config):
-        self.command_queue.put(('host_download', (game_config,)))
+        return self.submit('host_download', self._handle_host_download, game_config, game_config=game_config)
 
-    def host_upload(self, game_config):
-        self.command_queue.put(('host_upload', (game_config,)))
+    def host_upload(self, game_config, include_players=True):
+        return self.submit('host_upload', self._handle_host_upload, game_config, include_players,
+                           game_config=game_config)
 
     def player_download(self, game_config):
-        self.command_queue.put(('player_download', (game_config,)))
+        return self.submit('player_download', self._handle_player_download, game_config, game_config=game_config)
 
     def player_upload(self, game_config):
-        self.command_queue.put(('player_upload', (game_config,)))
+        return self.submit('player_upload', self._handle_player_upload, game_config, game_config=game_config)
 
     def run_host_mode(self, game_config):
-        self.command_queue.put(('run_host_mode', (game_config,)))
+        return self.submit('run_host_mode', self._handle_run_host_mode, game_config, game_config=game_config)
+
+    def run_host_pipeline(self, game_configs):
+        """Queue several host games; their download, process, validate, zip and upload stages overlap."""
+        return self.submit('host_pipeline', self._handle_host_pipeline, list(game_configs))
 
     def run_player_mode(self, game_config):
-        self.command_queue.put(('run_player_mode', (game_config,)))
+        return self.submit('run_player_mode', self._handle_run_player_mode, game_config, game_config=game_config)
 
     def refresh_game_list(self, callback):
-        self.command_queue.put(('refresh_game_list', (callback,)))
+        return self.submit('refresh_game_list', self._handle_refresh_game_list, callback)
+
+    def detect_roles(self, game_configs, callback):
+        """Read each game's group page, all at once, and callback({game name: "host", "player" or None})."""
+        return self.submit('detect_roles', self._handle_detect_roles, list(game_configs), callback)
+
+    def check_deadlines(self, game_configs, callback=None):
+        """Read each game's turn deadline from its group page into the deadline cache; callback({name: due})."""
+        return self.submit('check_deadlines', self._handle_check_deadlines, list(game_configs), callback)
+
+    def poll_documents(self, game_config, callback=None):
+        """check_documents at background priority and without logging, for scheduled polls."""
+        return self.submit('poll_documents', self._handle_check_documents, game_config, callback, True)
+
+    def check_documents(self, game_config, callback=None):
+        """Diff the game's documents listing against its snapshot without downloading; callback(diff)."""
+        return self.submit('check_documents', self._handle_check_documents, game_config, callback)
+
+    def track_submissions(self, game_config, callback):
+        """Read the host game's documents listing and callback(submission_status) (see submissions.py)."""
+        return self.submit('track_submissions', self._handle_track_submissions, game_config, callback)
+
+    def poll_submissions(self, game_config, callback):
+        """track_submissions at background priority, for the submission tracker's polls."""
+        return self.submit('poll_submissions', self._handle_track_submissions, game_config, callback)
+
+    def warm_pages(self, urls):
+        return self.submit('warm_pages', self._handle_warm_pages, list(urls))
 
     def set_confirm_delete_callback(self, callback):
         self.confirm_delete_callback = callback
@@ -98,215 +375,365 @@ class Xintis(threading.Thread):
     def set_save_config_callback(self, callback):
         self.save_config_callback = callback
 
-    def _handle_login(self, username, password):
+    def set_progress_callback(self, callback):
+        self.progress_callback = callback
+
+    def _progress(self, game_config):
+        """Tracker factory for one game's transfers, or None when nobody is listening."""
+        return tracker_factory(self.progress_callback, game_config.get("display_name") or game_config.get("name"))
+
+    async def _ask_ui(self, callback, *args):
+        # The UI answers on its own thread; hand the result back to the engine loop
+        loop = asyncio.get_running_loop()
+        answer = loop.create_future()
+        callback(*args, lambda result: loop.call_soon_threadsafe(lambda: answer.done() or answer.set_result(result)))
+        # An unanswered dialog must not run a pipeline stage out of time
+        with waiting_on_user():
+            return await answer
+
+    async def _handle_login(self, username, password):
         self.log(f"[Xintis] Logging in as {username}...")
-        self.page.goto("https://www.pbw3.net/wp-login.php")
-        self.page.fill("input#user_login", username)
-        self.page.fill("input#user_pass", password)
-        self.page.click("input[type='submit']")
-        self.page.wait_for_load_state("networkidle")
+        for capture in (self.recorder, self.replayer):
+            if capture:
+                capture.add_secret(username)
+                capture.add_secret(password)
+        self.user_agent, self._auth_state = await self.backend.login(self, username, password)
         self.logged_in = True
         self.username = username
         self.password = password
         self.log("[Xintis] Login complete.")
 
-    def _handle_host_download(self, game_config):
+    def _absolute(self, href):
+        if not href.startswith("http"):
+            if not href.startswith("/"):
+                href = "/" + href
+            href = "https://www.pbw3.net" + href
+        return href
+
+    async def _download(self, href, download_path, progress=None):
+        # Fetch outside the browser so an interrupted transfer can resume from its .part file
+        href = self._absolute(href)
+        headers = {"User-Agent": self.user_agent} if self.user_agent else {}
+        cookies = await self.context.cookies(href) if self.context else []
+        if self.replayer:
+            href = self.replayer.local_url(href)
+        async with self.engine.download_slot(), self.engine.limiter.slot(href, TRANSFER):
+            tracker = progress(os.path.basename(download_path), "download") if progress else None
+            path = await download_file(href, download_path, cookies=cookies, headers=headers, log=self.log,
+                                       progress=tracker, recorder=self.recorder, on_throttle=self._throttled)
+        metrics_store.add_bytes(os.path.getsize(path))
+        return path
+
+    def _throttled(self, code, headers):
+        self.engine.limiter.backoff(retry_after(headers), f"download answered {code}")
+
+    async def _scan_documents(self, game_config, view=None, quiet=False):
+        """Read the game's documents listing and diff it against the stored snapshot; quiet skips the log lines."""
+        if view is None:
+            async with self.backend.documents(self, game_config["document_url"]) as view:
+                documents = await self._read_listing(game_config, view)
+        else:
+            documents = await self._read_listing(game_config, view)
+        diff = self.documents_index.diff(game_config, documents)
+        if quiet:
+            return documents, diff
+        self.log(f"[Xintis] {game_config.get('display_name', 'Unknown Game')}: {describe_diff(diff)}.")
+        for old, new in diff["renamed"]:
+            self.log(f"[Xintis] Renamed on server: '{old['title']}' -> '{new['title']}'")
+        return documents, diff
+
+    async def _read_listing(self, game_config, view):
+        """The game's whole documents listing, newest upload first, following the listing's pages.
+
+        view is the backend's view of the listing (turn_engine.py). When the
+        pages run newest first, reading stops at the first page holding a
+        document from the last snapshot; older documents are taken from that
+        snapshot (merge_partial())."""
+        old = self.documents_index.load(game_config) or []
+        known = {d["key"] for d in old}
+        url, html = await view.first()
+        collected, seen = [], set()
+        ordered = True
+        stopped_early = False
+        for number in range(1, MAX_PAGES + 1):
+            with metrics_store.step("parse"):
+                documents, next_url = parse_listing_page(html, url)
+            if collected and documents and None not in (document_id(collected[-1]), document_id(documents[0])):
+                ordered = ordered and document_id(documents[0]) < document_id(collected[-1])
+            ordered = ordered and newest_first(documents)
+            collected.extend(d for d in documents if d["key"] not in seen)
+            seen.update(d["key"] for d in documents)
+            if not next_url:
+                break
+            if ordered and known.intersection(d["key"] for d in documents):
+                stopped_early = True  # everything past this page was in the snapshot already
+                break
+            if number == MAX_PAGES:
+                self.log(f"[Xintis] Documents listing has more than {MAX_PAGES} pages; reading stopped there.")
+                stopped_early = ordered
+                break
+            url, html = await view.fetch(next_url)
+        if number > 1:
+            self.log(f"[Xintis] Read {number} listing page(s){' (stopped at synced documents)' if stopped_early else ''}.")
+        return by_upload_date(merge_partial(old, collected) if stopped_early else collected)
+
+    async def _handle_check_documents(self, game_config, callback, quiet=False):
+        if not self.logged_in:
+            self.log("[Xintis] Not logged in. Please login first.")
+            return
+        documents, diff = await self._scan_documents(game_config, quiet=quiet)
+        if callback:
+            callback(diff)
+        return diff
+
+    async def _handle_track_submissions(self, game_config, callback):
+        if not self.logged_in:
+            self.log("[Xintis] Not logged in. Please login first.")
+            return
+        documents, diff = await self._scan_documents(game_config, quiet=True)
+        status = submission_status(game_config, documents, self.username,
+                                   self.documents_index.load_host_upload(game_config))
+        if callback:
+            callback(status)
+        return status
+
+    async def _handle_host_download(self, game_config):
         if not self.logged_in:
             self.log("[Xintis] Not logged in. Please login first.")
             return
         self.log(f"[Xintis] Starting host download for {game_config.get('display_name', 'Unknown Game')}...")
         BASE_TURN_DIR = game_config["savegame_folder"]
         DOC_URL = game_config["document_url"]
-        self.page.goto(DOC_URL)
-        self.page.wait_for_timeout(2000)
-        self.log("[Xintis] Scraping and identifying downloadable files...")
-        links = self.page.query_selector_all("a[href*='get_group_doc']")
-        downloadables = []
-        for link in links:
-            href = link.get_attribute("href")
-            text = link.inner_text().strip()
-            if any(ext in href.lower() for ext in [".zip", ".plr", ".emp", ".txt"]):
-                downloadables.append((href, text))
-        if not downloadables:
-            self.log("[Xintis] No downloadable files found.")
-            return
-        # For now, auto-confirm download and delete (could add callbacks for UI confirmation)
-        downloaded_files = []
-        zip_turn_number = None
-        def extract_turn_number(filename):
-            import re
-            match = re.search(r"(\d+)\.zip$", filename.lower())
-            return int(match.group(1)) if match else None
-        for href, text in downloadables:
-            if not href.startswith("http"):
-                if not href.startswith("/"):
-                    href = "/" + href
-                href = "https://www.pbw3.net" + href
-            filename = href.split("/")[-1]
-            cleaned_filename = filename.split("-", 1)[-1]
-            download_path = os.path.join(BASE_TURN_DIR, cleaned_filename)
-            self.log(f"[Xintis] Downloading {cleaned_filename} ({text})...")
-            try:
-                link = self.page.locator(f"a[href*='{filename}']")
-                with self.page.expect_download() as dl_info:
-                    link.click()
-                download = dl_info.value
-                download.save_as(download_path)
-                downloaded_files.append(download_path)
-                if cleaned_filename.lower().endswith(".zip") and zip_turn_number is None:
-                    zip_turn_number = extract_turn_number(cleaned_filename)
-            except Exception as e:
-                self.log(f"[Xintis] Failed to download {filename}: {e}")
-        if zip_turn_number is None:
-            self.log("[Xintis] Could not extract turn number from .zip filename.")
-            return
-        # Prompt for delete confirmation
-        should_delete = True
-        delete_files = [text for _, text in downloadables]
-        if self.confirm_delete_callback:
-            import threading
-            event = threading.Event()
-            result_holder = {"result": True}
-            def on_confirm(result):
-                result_holder["result"] = result
-                event.set()
-            self.confirm_delete_callback(delete_files, on_confirm)
-            event.wait()
-            should_delete = result_holder["result"]
-        if should_delete:
-            self.log("[Xintis] Attempting to delete files from PBW3 server...")
-            try:
-                while True:
-                    self.page.goto(DOC_URL)
-                    self.page.wait_for_timeout(2000)
-                    delete_links = self.page.locator("a.bp-group-documents-delete")
-                    count = delete_links.count()
-                    if count == 0:
-                        break
-                    link = delete_links.first
-                    link.scroll_into_view_if_needed()
-                    href = link.get_attribute("href")
-                    if href and "delete" in href:
-                        self.log(f"[Xintis] Deleting file at: {href}")
-                        self.page.evaluate(f"window.location.href='{href}'")
-                        self.page.wait_for_timeout(2000)
-                    else:
-                        break
-                self.log("[Xintis] All deletions completed.")
-            except Exception as e:
-                self.log(f"[Xintis] Error during deletion: {e}")
-        else:
-            self.log("[Xintis] User declined to delete files from PBW3 server.")
-        TURNS_DIR = os.path.join(BASE_TURN_DIR, "Turns")
-        os.makedirs(TURNS_DIR, exist_ok=True)
-        turn_folder = os.path.join(TURNS_DIR, f"Turn_{zip_turn_number}")
-        os.makedirs(turn_folder, exist_ok=True)
-        for file in downloaded_files:
-            shutil.move(file, os.path.join(turn_folder, os.path.basename(file)))
-        self.log(f"[Xintis] Saved turn files to: {turn_folder}")
-        for file in os.listdir(turn_folder):
-            if file.lower().endswith(".plr"):
-                shutil.copy(os.path.join(turn_folder, file), BASE_TURN_DIR)
+        progress = self._progress(game_config)
+        failed = set()
+        async with self.backend.documents(self, DOC_URL) as view:
+            self.log("[Xintis] Scraping and identifying downloadable files...")
+            with metrics_store.step("scan"):
+                documents, diff = await self._scan_documents(game_config, view)
+            # Only documents added since the last sync; anything older was already handled
+            downloadables = [d for d in diff["added"]
+                             if d["file"].lower().endswith((".zip", ".plr", ".emp", ".txt"))]
+            if not downloadables:
+                self.log("[Xintis] No new downloadable files since last check.")
+                self.documents_index.save(game_config, documents)
+                metrics_store.discard()
+                return
+            downloaded = []
+            zip_turn_number = turn_from_documents(documents)
+            metrics_store.set_turn(zip_turn_number)
+
+            # Download straight into the turn's archive folder so nothing has to be moved afterwards
+            target_dir = BASE_TURN_DIR if zip_turn_number is None else turn_folder(game_config, zip_turn_number)
+            os.makedirs(target_dir, exist_ok=True)
+
+            async def fetch(doc):
+                download_path = os.path.join(target_dir, doc["file"])
+                self.log(f"[Xintis] Downloading {doc['file']} ({doc['title']})...")
+                try:
+                    await self._download(doc["href"], download_path, progress)
+                    return download_path
+                except Exception as e:
+                    self.log(f"[Xintis] Failed to download {doc['key']}: {e}")
+                    return None
+
+            # All files download concurrently (bounded by the engine's download slots)
+            with metrics_store.step("download"):
+                paths = await asyncio.gather(*(fetch(d) for d in downloadables))
+            for doc, download_path in zip(downloadables, paths):
+                if download_path is None:
+                    failed.add(doc["key"])
+                else:
+                    downloaded.append((doc, download_path))
+            if zip_turn_number is None:
+                self.log("[Xintis] Could not extract turn number from .zip filename.")
+                return
+            # Prompt for delete confirmation
+            should_delete = True
+            delete_files = [doc["title"] or doc["file"] for doc, _ in downloaded]
+            if self.confirm_delete_callback and delete_files:
+                with metrics_store.step("confirm"):  # time spent waiting on the user, not the server
+                    should_delete = await self._ask_ui(self.confirm_delete_callback, delete_files)
+            if should_delete and delete_files:
+                self.log("[Xintis] Attempting to delete files from PBW3 server...")
+                try:
+                    with metrics_store.step("delete"):
+                        await self._delete_documents(downloaded, view)
+                    self.log("[Xintis] All deletions completed.")
+                except Exception as e:
+                    self.log(f"[Xintis] Error during deletion: {e}")
+                await view.reload()
+                documents = await self._read_listing(game_config, view)
+            elif delete_files:
+                self.log("[Xintis] User declined to delete files from PBW3 server.")
+            # Failed downloads are saved as pending so the next sync picks them up again
+            self.documents_index.save(game_config, documents, failed)
+        with metrics_store.step("archive"):
+            await self._archive_turn(game_config, zip_turn_number, downloaded)
         self.log(f"[Xintis] Host download complete for turn {zip_turn_number}.")
+        return zip_turn_number
+
+    async def _delete_documents(self, downloaded, view):
+        for doc, _ in downloaded:
+            if not doc["delete_href"] or "delete" not in doc["delete_href"]:
+                self.log(f"[Xintis] No delete link for {doc['file']}; left on server.")
+                continue
+            self.log(f"[Xintis] Deleting file at: {doc['delete_href']}")
+            await view.delete(self._absolute(doc["delete_href"]))
+
+    async def _archive_turn(self, game_config, zip_turn_number, downloaded):
+        """Settle the downloaded files in Turns/Turn_N, record them in its manifest and stage the .plr files.
+
+        Files normally arrive in the turn folder already; anything elsewhere
+        is renamed in. The .plr files go back to the savegame folder as
+        copy-on-write reflinks where the filesystem supports them, copies
+        otherwise; the game's "archive_links" setting can allow hardlinks."""
+        BASE_TURN_DIR = game_config["savegame_folder"]
+        folder = turn_folder(game_config, zip_turn_number)
+        os.makedirs(folder, exist_ok=True)
+        stats = ArchiveStats()
+        for _, file in downloaded:
+            destination = os.path.join(folder, os.path.basename(file))
+            if os.path.abspath(file) != os.path.abspath(destination):
+                place(file, destination, stats)
+        self.log(f"[Xintis] Saved turn files to: {folder}")
+        await self._record_manifest(record_files, folder,
+                                    {doc["file"]: self._absolute(doc["href"]) for doc, _ in downloaded},
+                                    [doc["file"] for doc, _ in downloaded])
+        links = game_config.get("archive_links", DEFAULT_LINKS)
+
+        def stage_players():
+            for file in os.listdir(folder):
+                if file.lower().endswith(".plr"):
+                    stage(os.path.join(folder, file), os.path.join(BASE_TURN_DIR, file), links, stats)
+        await asyncio.to_thread(stage_players)
+        self.log(f"[Xintis] Archive: {stats.describe()}.")
+        return folder
+
+    def _turn_folder(self, game_config, doc):
+        turn = turn_from_documents([doc])
+        return turn_folder(game_config, turn if turn is not None else 0)
 
-    def _handle_host_upload(self, game_config):
+    async def _record_manifest(self, record, folder, *args):
+        """Hash files into folder's manifest.json off the loop; a failure is logged, never fatal to the turn."""
+        try:
+            await asyncio.to_thread(record, folder, *args)
+        except Exception as e:
+            self.log(f"[Xintis] Could not update manifest in {folder}: {e}")
+
+    async def _handle_host_upload(self, game_config, include_players=True):
         if not self.logged_in:
             self.log("[Xintis] Not logged in. Please login first.")
             return
         self.log(f"[Xintis] Starting host upload for {game_config.get('display_name', 'Unknown Game')}...")
-        
-        # Define the callbacks
-        def confirm_upload():
-            return True  # Auto-confirm for now, could add UI callback later
-        
-        def confirm_upload_player():
-            return True  # Auto-confirm for now, could add UI callback later
-        
-        def save_config():
-            # Save the config after turn number update
-            if hasattr(self, 'save_config_callback') and self.save_config_callback:
-                self.save_config_callback()
-        
-        # Call the host_upload function with our page and browser
-        host_upload(
-            game_config=game_config,
-            username=self.username,
-            password=self.password,
-            log=self.log,
-            confirm_upload_fn=confirm_upload,
-            confirm_upload_player_fn=confirm_upload_player,
-            page=self.page,
-            browser=self.browser,
-            save_config_callback=save_config
-        )
-        
+        turn = await self._zip_turn(game_config)
+        await self._upload_turn(game_config, *turn, include_players=include_players)
+
+    async def _zip_turn(self, game_config):
+        """Advance the turn number and zip the turn files; returns (zip_path, zip_turn, next_turn)."""
+        zip_turn_number = current_turn_number(game_config)
+        next_turn_number = zip_turn_number + 1
+        metrics_store.set_turn(zip_turn_number)
+        # Update turn number in config BEFORE creating zip
+        game_config["turn_number"] = next_turn_number
+        if self.save_config_callback:
+            self.save_config_callback()
+        progress = self._progress(game_config)
+        zip_tracker = progress(f"Turn {next_turn_number} zip", "zip") if progress else None
+        with metrics_store.step("zip"):
+            zip_path = await asyncio.to_thread(build_turn_zip, game_config, next_turn_number, self.log, zip_tracker)
+        return zip_path, zip_turn_number, next_turn_number
+
+    async def _upload_turn(self, game_config, zip_path, zip_turn_number, next_turn_number, include_players=True):
+        """Upload the turn zip and .plr files; returns True once the zip is on the server."""
+        DOC_URL = game_config["document_url"]
+        uploads = turn_upload_items(game_config, zip_path, zip_turn_number, next_turn_number, include_players)
+        self.log(f"[Xintis] Uploading ZIP and {len(uploads) - 1} .plr file(s) to PBW...")
+        with metrics_store.step("upload"):
+            results = await self.backend.upload(self, DOC_URL, uploads,
+                                                game_config.get("max_upload_sessions", DEFAULT_MAX_SESSIONS),
+                                                self._progress(game_config))
+        # Hash before finish_turn_upload() removes the zip
+        sent = [r["path"] for r in results if r["ok"]]
+        metrics_store.add_bytes(sum(os.path.getsize(path) for path in sent if os.path.exists(path)))
+        if sent:
+            await self._record_manifest(record_transfers, turn_folder(game_config, next_turn_number), "upload", sent,
+                                        {os.path.basename(path): DOC_URL for path in sent})
+        uploaded = finish_turn_upload(game_config, zip_path, next_turn_number, results, self.log) is not False
+        if uploaded:
+            await self._record_host_upload(game_config, [u for u in uploads if u["path"] in sent])
         self.log(f"[Xintis] Host upload complete for turn {game_config.get('turn_number', 'unknown')}.")
+        return uploaded
+
+    async def _record_host_upload(self, game_config, items):
+        """Note which listing documents this upload batch became, so submission tracking can skip them."""
+        try:
+            documents, _ = await self._scan_documents(game_config, quiet=True)
+            zip_key, keys = host_upload_keys(documents, items)
+            if zip_key is None:
+                self.log("[Xintis] Uploaded turn zip not found in the listing; submissions will be guessed.")
+                return
+            self.documents_index.save_host_upload(game_config, zip_key, keys)
+        except Exception as e:
+            self.log(f"[Xintis] Could not record the host upload: {e}")
 
-    def _handle_player_download(self, game_config):
+    async def _handle_player_download(self, game_config):
         if not self.logged_in:
             self.log("[Xintis] Not logged in. Please login first.")
             return
         self.log(f"[Xintis] Starting player download for {game_config.get('display_name', 'Unknown Game')}...")
-        DOCUMENTS_URL = game_config["document_url"]
         SAVEGAME_FOLDER = game_config["savegame_folder"]
-        self.page.goto(DOCUMENTS_URL)
-        self.page.wait_for_load_state("networkidle")
-        html = self.page.content()
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, "html.parser")
-        links = soup.select("a.bp-group-documents-title")
-        zip_display_name = None
-        zip_href = None
-        for link in links:
-            href = link.get("href")
-            text = link.text.strip()
-            if href and href.lower().endswith(".zip"):
-                zip_display_name = text
-                zip_href = href
-                break
-        if not zip_href:
-            self.log("[Xintis] No .zip file found to download.")
+        with metrics_store.step("scan"):
+            documents, diff = await self._scan_documents(game_config)
+        # The newest turn zip added since the last sync; older turns were already fetched
+        new_zips = [d for d in diff["added"] if d["file"].lower().endswith(".zip")]
+        if not new_zips:
+            self.log("[Xintis] No new .zip file since last check.")
+            self.documents_index.save(game_config, documents)
+            metrics_store.discard()
             return
-        cleaned = zip_href.split("-")[-1] if "-" in zip_href else zip_href
-        import os
-        import zipfile
-        import re
+        newest = max(new_zips, key=lambda d: turn_from_documents([d]) or 0)
+        metrics_store.set_turn(turn_from_documents([newest]))
+        zip_display_name = newest["title"]
+        zip_href = newest["href"]
+        cleaned = newest["file"]
         final_path = os.path.join(SAVEGAME_FOLDER, os.path.basename(cleaned))
+        progress = self._progress(game_config)
         self.log(f"[Xintis] Downloading {cleaned} ({zip_display_name})...")
         try:
-            link = self.page.locator(f"a[href='{zip_href}']")
-            with self.page.expect_download() as dl_info:
-                link.click()
-            download = dl_info.value
-            download.save_as(final_path)
+            with metrics_store.step("download"):
+                await self._download(zip_href, final_path, progress)
             self.log(f"[Xintis] Extracting {cleaned} to savegame folder...")
-            with zipfile.ZipFile(final_path, 'r') as zip_ref:
-                zip_ref.extractall(SAVEGAME_FOLDER)
+            tracker = progress(f"Extract {os.path.basename(cleaned)}", "extract") if progress else None
+            with metrics_store.step("extract"):
+                await asyncio.to_thread(extract_zip, final_path, SAVEGAME_FOLDER, tracker)
             self.log("[Xintis] Download and extraction complete.")
+            await self._record_manifest(record_transfers, self._turn_folder(game_config, newest), "download",
+                                        [final_path], {os.path.basename(final_path): self._absolute(zip_href)})
+            self.documents_index.save(game_config, documents)
         except Exception as e:
             self.log(f"[Xintis] Failed to download or extract: {e}")
+            metrics_store.mark_failed()
             return
         match = re.search(r"(\d+)\.zip$", cleaned)
         turn_number = match.group(1) if match else ""
         self.log(f"[Xintis] Player download complete for turn {turn_number}.")
 
-    def _handle_player_upload(self, game_config):
+    async def _handle_player_upload(self, game_config):
         if not self.logged_in:
             self.log("[Xintis] Not logged in. Please login first.")
             return
         self.log(f"[Xintis] Starting player upload for {game_config.get('display_name', 'Unknown Game')}...")
         DOCUMENTS_URL = game_config["document_url"]
         SAVEGAME_FOLDER = game_config["savegame_folder"]
-        UPLOAD_DISPLAY_BASE = game_config.get("file_naming", {}).get("upload_display_name_player", "Player Turn Upload")
-        import os
-        import re
+        GAME_NAME = game_config.get("name", "")
         plr_file = None
-        for f in os.listdir(SAVEGAME_FOLDER):
-            if f.lower().endswith(".plr"):
+        # The savegame folder may hold several games' files; only this game's name prefix counts
+        for f in sorted(os.listdir(SAVEGAME_FOLDER)):
+            if f.lower().endswith(".plr") and f.lower().startswith(GAME_NAME.lower()):
                 plr_file = os.path.join(SAVEGAME_FOLDER, f)
                 break
         if not plr_file:
-            self.log("[Xintis] No .plr file found in savegame folder.")
+            self.log(f"[Xintis] No {GAME_NAME} .plr file found in savegame folder.")
             return
         # Try to get turn number from config or files
         turn_number = game_config.get("turn_number", "")
@@ -317,27 +744,25 @@ class Xintis(threading.Thread):
                 m = re.search(r"(\d+)\.zip$", latest_zip)
                 if m:
                     turn_number = m.group(1)
-        UPLOAD_DISPLAY_NAME = f"{UPLOAD_DISPLAY_BASE}{turn_number}"
+        UPLOAD_DISPLAY_NAME = player_upload_title(game_config, self.username, turn_number)
+        if str(turn_number).isdigit():
+            metrics_store.set_turn(turn_number)
         self.log("[Xintis] Uploading .plr file...")
+        progress = self._progress(game_config)
+        tracker = progress(os.path.basename(plr_file), "upload", os.path.getsize(plr_file)) if progress else None
         try:
-            self.page.goto(DOCUMENTS_URL)
-            self.page.wait_for_selector("#bp-group-documents-upload-button")
-            self.page.click("#bp-group-documents-upload-button")
-            self.page.wait_for_selector("input[name='bp_group_documents_name']")
-            self.page.set_input_files("input[type='file']", plr_file)
-            self.page.fill("input[name='bp_group_documents_name']", UPLOAD_DISPLAY_NAME)
-            try:
-                category_checkbox = self.page.locator("input#category-138")
-                if category_checkbox.count() > 0 and category_checkbox.first.is_visible():
-                    category_checkbox.first.check()
-                else:
-                    self.page.fill("input[name='bp_group_documents_new_category']", "Player File")
-            except:
-                self.log("[Xintis] Category tagging failed for .plr.")
-            submit_btn = self.page.locator("input[type='submit'][value='Save']")
-            submit_btn.scroll_into_view_if_needed()
-            submit_btn.click()
+            with metrics_store.step("upload"):
+                await self.backend.upload_player(self, DOCUMENTS_URL, plr_file, UPLOAD_DISPLAY_NAME)
+            if tracker:
+                tracker.finish()
+            metrics_store.add_bytes(os.path.getsize(plr_file))
             self.log("[Xintis] Upload complete.")
+            if str(turn_number).isdigit():
+                await self._record_manifest(record_transfers, turn_folder(game_config, turn_number), "upload",
+                                            [plr_file],
+                                            {os.path.basename(plr_file): DOCUMENTS_URL})
+            else:
+                self.log("[Xintis] Turn number unknown; upload not recorded in a turn manifest.")
             # Only increment turn_number if not host
             try:
                 if game_config.get("role", "player") != "host":
@@ -345,20 +770,156 @@ class Xintis(threading.Thread):
             except Exception:
                 pass
         except Exception as e:
+            if tracker:
+                tracker.finish(ok=False)
+            metrics_store.mark_failed()
             self.log(f"[Xintis] Upload failed: {e}")
         self.log(f"[Xintis] Player upload complete for turn {turn_number}.")
 
-    def _handle_run_host_mode(self, game_config):
-        # Full Host Mode: download, prompt for delete, upload zip, upload plr
-        self._handle_host_download(game_config)
-        self._handle_host_upload(game_config)
+    async def _handle_run_host_mode(self, game_config):
+        # Full Host Mode: the host pipeline for one game (download, process if configured, zip, upload)
+        await self._run_host_pipeline([game_config], lock=False)
+
+    async def _handle_host_pipeline(self, game_configs):
+        return await self._run_host_pipeline(game_configs)
+
+    async def _run_host_pipeline(self, game_configs, lock=True):
+        """Run games through HostPipeline, overlapping their stages; returns the finished jobs."""
+        owner = metrics_store.current()  # run_host_mode's own operation, when there is one
 
-    def _handle_run_player_mode(self, game_config):
+        def stage(name, handler):
+            async def run(job):
+                token = metrics_store.begin(job["metrics"]) if job.get("metrics") else None
+                try:
+                    with metrics_store.step(name), deadline(self._due(job["game"])):
+                        if not lock:
+                            return await handler(job)
+                        async with self._game_lock(job["game"]):
+                            return await handler(job)
+                finally:
+                    if token:
+                        metrics_store.end(token)
+            return name, run
+
+        async def download(job):
+            job["turn"] = await self._handle_host_download(job["game"])
+            if job["turn"] is None:
+                self.log(f"[Xintis] {job['name']}: no new turn files; nothing to process.")
+                return False
+
+        async def process(job):
+            game_config = job["game"]
+            processor = game_config.get("processor")
+            job["processed_since"] = time.time()
+            if not processor or not processor.get("command"):
+                self.log(f"[Xintis] {job['name']}: no processor configured; uploading as downloaded.")
+                return
+            log_path = os.path.join(turn_folder(game_config, job["turn"]), "processor.log")
+            job["output"] = await run_processor(processor_command(processor, game_config, job["turn"]),
+                                                game_config["savegame_folder"], job["processor_timeout"],
+                                                log_path, self.log)
+
+        async def validate(job):
+            processor = job["game"].get("processor") or {}
+            if not processor.get("command"):
+                return
+            problems = await asyncio.to_thread(validate_outputs, job["game"], job["processed_since"],
+                                               processor.get("expected_outputs"))
+            if problems:
+                raise StageError("; ".join(problems))
+
+        async def zip_stage(job):
+            job["zip"] = await self._zip_turn(job["game"])
+
+        async def upload(job):
+            if not await self._upload_turn(job["game"], *job["zip"]):
+                raise StageError("turn zip was not uploaded")
+
+        if not self.logged_in:
+            self.log("[Xintis] Not logged in. Please login first.")
+            return []
+        pipeline = HostPipeline([stage("download", download), stage("process", process),
+                                 stage("validate", validate), stage("zip", zip_stage),
+                                 stage("upload", upload)], self.log)
+        if self.deadlines:
+            game_configs = self.deadlines.by_urgency(game_configs)  # the game due soonest starts first
+        jobs = [pipeline_job(g) for g in game_configs]
+        if self.metrics:
+            for job in jobs:
+                job["metrics"] = owner if owner and len(jobs) == 1 else \
+                    metrics_store.Operation("host_pipeline", self._game_label(job["game"]), account=self.username)
+        await pipeline.run(jobs)
+        for job in jobs:
+            operation = job.get("metrics")
+            if operation is None:
+                continue
+            # A game with no new turn files did no work; leave it out of the cycle times
+            operation.discarded = job["status"] == "stopped" and job["stage"] == "download"
+            operation.ok = job["status"] != "failed"
+            if operation is not owner:
+                await self._record_metrics(operation.finish(operation.ok))
+        return jobs
+
+    async def _handle_run_player_mode(self, game_config):
         # Full Player Mode: download, upload plr
-        self._handle_player_download(game_config)
-        self._handle_player_upload(game_config)
+        await self._handle_player_download(game_config)
+        await self._handle_player_upload(game_config)
+
+    async def _handle_warm_pages(self, urls):
+        if not self.logged_in or self.page_pool is None:
+            return
+        try:
+            await self.page_pool.warm(urls)
+        except Exception as e:
+            self.log(f"[Xintis] Could not warm documents pages: {e}")
+
+    async def _handle_detect_roles(self, game_configs, callback):
+        roles = {}
+        try:
+            if not self.logged_in:
+                self.log("[Xintis] Not logged in. Please login first.")
+                return
+
+            async def detect(game_config):
+                url = group_url(game_config)
+                try:
+                    final, html = await session_get(self, url)
+                    roles[game_config["name"]] = detect_role(html, self.username, url)
+                except Exception as e:
+                    self.log(f"[Xintis] Could not read the group page of {game_config['display_name']}: {e}")
+                    roles[game_config["name"]] = None
+
+            # The limiter spaces the requests out; every page is read as soon as it allows
+            await asyncio.gather(*(detect(g) for g in game_configs))
+            found = sum(1 for role in roles.values() if role)
+            self.log(f"[Xintis] Detected the role in {found} of {len(game_configs)} game(s).")
+        finally:
+            callback(roles)
+
+    async def _handle_check_deadlines(self, game_configs, callback):
+        if not self.logged_in or self.deadlines is None:
+            return
+
+        async def check(game_config):
+            try:
+                final, html = await session_get(self, group_url(game_config))
+                due = await asyncio.to_thread(parse_deadline, html, self.deadlines.pattern)
+            except Exception as e:
+                self.log(f"[Xintis] Could not read the deadline of {game_config['display_name']}: {e}")
+                return None
+            if self.deadlines.update(game_config, due) and due is not None:
+                self.log(f"[Xintis] {game_config['display_name']}: turn due in {describe_due(due)}.")
+            return due
+
+        dues = await asyncio.gather(*(check(g) for g in game_configs))
+        try:
+            await asyncio.to_thread(self.deadlines.save)
+        except OSError as e:
+            self.log(f"[Xintis] Could not save deadlines: {e}")
+        if callback:
+            callback({g["name"]: due for g, due in zip(game_configs, dues)})
 
-    def _handle_refresh_game_list(self, callback):
+    async def _handle_refresh_game_list(self, callback):
         if not self.logged_in:
             self.log("[Xintis] Not logged in. Please login first.")
             callback([])
@@ -366,9 +927,7 @@ class Xintis(threading.Thread):
         self.log("[Xintis] Refreshing game list...")
         username = self.username
         GAMES_URL = f"https://www.pbw3.net/members/{username}/groups/my-groups/"
-        self.page.goto(GAMES_URL)
-        self.page.wait_for_timeout(3000)
-        html = self.page.content()
+        html = await self.backend.rendered_page(self, GAMES_URL, 'refresh_game_list')
         soup = BeautifulSoup(html, "html.parser")
         game_links = soup.select("a.bp-group-home-link")
         discovered = []
@@ -380,6 +939,7 @@ class Xintis(threading.Thread):
                 document_url = f"https://www.pbw3.net/games/{slug}/documents/"
                 zip_prefix = slug[:3].lower()
                 game_entry = {
+                    "account": username,
                     "name": slug,
                     "display_name": name,
                     "document_url": document_url,
@@ -394,4 +954,4 @@ class Xintis(threading.Thread):
                 }
                 discovered.append(game_entry)
         self.log(f"[Xintis] Found {len(discovered)} games.")
-        callback(discovered) 
\ No newline at end of file
+        callback(discovered)
@@ -0,0 +1,183 @@
+import json
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app_paths import CONFIG_PATH
+from game_list import StatusCache
+
+DEFAULT_WORKERS = 4
+POLL_MS = 10          # how often the Tk side checks for finished background steps
+BROWSER_TIMEOUT = 60
+
+
+def read_config(path=CONFIG_PATH):
+    """The parsed pbw3_config.json, or None on first run."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def cached_games(config):
+    """The game list saved by the last refresh, with its pending-upload counts read ahead."""
+    games = list((config or {}).get("games", []))
+    status = StatusCache()
+    for game in games:
+        status.pending(game)
+    return games, status
+
+
+def warm_browser(turn_engine, timeout=BROWSER_TIMEOUT):
+    """Launch the shared browser now rather than on the first command; waits until it is up."""
+    turn_engine.warm().result(timeout)
+
+
+class StartupGraph:
+    """Runs the app's start-up steps as a dependency graph instead of one after another.
+
+    Each step names the steps it needs. Background steps (reading the
+    config, opening the metrics store, launching the browser) run on worker
+    threads as soon as their needs are met; Tk steps (fonts, building the
+    window, prompts) run on the Tk thread, one per pump so the splash keeps
+    repainting. on_ready fires once every essential step is done, which is
+    when the window can be shown; the rest carries on behind it. A failed
+    step is logged and the steps that need it are skipped."""
+
+    def __init__(self, log=print, workers=DEFAULT_WORKERS):
+        self.log = log
+        self.workers = workers
+        self.tasks = {}  # name -> step, in the order added (so requirements always come first)
+        self.results = {}
+        self.started = None
+        self.ready_at = None
+        self.done_at = None
+        self._finished = queue.Queue()
+        self._running = 0
+        self._pool = None
+        self._callbacks = (None, None, None)
+
+    def add(self, name, run, requires=(), on_tk=False, essential=False):
+        """Add step name: run() once every step in requires is done; on_tk runs it on the Tk thread."""
+        for required in requires:
+            if required not in self.tasks:
+                raise ValueError(f"Start-up step '{name}' needs '{required}', which has not been added")
+        self.tasks[name] = {"name": name, "run": run, "requires": tuple(requires), "on_tk": on_tk,
+                            "essential": essential, "state": "waiting", "start": None, "end": None, "error": None}
+
+    def start(self, root, on_progress=None, on_ready=None, on_done=None):
+        """Run the graph from the Tk event loop; returns immediately."""
+        self._begin(on_progress, on_ready, on_done)
+
+        def pump():
+            ran = self._step()
+            if self.done_at is None:
+                root.after(1 if ran else POLL_MS, pump)
+        root.after(0, pump)
+
+    def run(self, on_progress=None):
+        """Run the graph to the end on this thread (Tk steps included); for scripts and benchmarks."""
+        self._begin(on_progress, None, None)
+        while self.done_at is None:
+            if self._step():
+                continue
+            if not self._running:
+                break
+            self._settle(*self._finished.get())
+        return self
+
+    def _begin(self, on_progress, on_ready, on_done):
+        self.started = time.perf_counter()
+        self._callbacks = (on_progress, on_ready, on_done)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="startup")
+        self._check()
+
+    def _runnable(self):
+        ready = []
+        for task in self.tasks.values():
+            if task["state"] != "waiting":
+                continue
+            states = [self.tasks[r]["state"] for r in task["requires"]]
+            if any(state in ("failed", "skipped") for state in states):
+                task["state"] = "skipped"
+            elif all(state == "done" for state in states):
+                ready.append(task)
+        return ready
+
+    def _step(self):
+        """Settle finished background steps and start every runnable one; runs at most one Tk step.
+
+        Returns True if a Tk step ran."""
+        while True:
+            try:
+                self._settle(*self._finished.get_nowait())
+            except queue.Empty:
+                break
+        tk_task = None
+        for task in self._runnable():
+            if task["on_tk"]:
+                tk_task = tk_task or task
+                continue
+            task["state"] = "running"
+            self._running += 1
+            self._pool.submit(lambda task=task: self._finished.put((task,) + self._call(task)))
+        if tk_task is None:
+            self._check()  # steps skipped above may have been the last ones
+            return False
+        tk_task["state"] = "running"
+        self._running += 1
+        self._settle(tk_task, *self._call(tk_task))
+        return True
+
+    def _call(self, task):
+        task["start"] = time.perf_counter()
+        try:
+            result, error = task["run"](), None
+        except Exception as e:
+            result, error = None, e
+        return result, error, time.perf_counter()
+
+    def _settle(self, task, result, error, end):
+        self._running -= 1
+        task["end"] = end
+        if error is None:
+            task["state"] = "done"
+            self.results[task["name"]] = result
+        else:
+            task["state"] = "failed"
+            task["error"] = error
+            self.log(f"[!] Start-up step '{task['name']}' failed: {error}")
+        self._check(task)
+
+    def _check(self, task=None):
+        on_progress, on_ready, on_done = self._callbacks
+        settled = [t for t in self.tasks.values() if t["state"] not in ("waiting", "running")]
+        if on_progress and task is not None:
+            on_progress(len(settled), len(self.tasks), task["name"])
+        if self.ready_at is None and all(t["state"] not in ("waiting", "running")
+                                         for t in self.tasks.values() if t["essential"]):
+            self.ready_at = time.perf_counter()
+            if on_ready:
+                on_ready()
+        if self.done_at is None and len(settled) == len(self.tasks) and not self._running:
+            self.done_at = time.perf_counter()
+            self._pool.shutdown(wait=False)
+            if on_done:
+                on_done()
+
+    def timings(self):
+        """[(step, seconds after start it began, seconds it took, state)] in the order steps began."""
+        rows = [(t["name"], t["start"] - self.started, t["end"] - t["start"], t["state"])
+                for t in self.tasks.values() if t["start"] is not None and t["end"] is not None]
+        return sorted(rows, key=lambda row: row[1])
+
+    def describe(self, slowest=3):
+        """One log line: time to the window, time to the end, and the slowest steps."""
+        ready = self.ready_at - self.started if self.ready_at else None
+        done = self.done_at - self.started if self.done_at else None
+        steps = sorted(self.timings(), key=lambda row: -row[2])[:slowest]
+        line = (f"[+] Started in {ready:.2f}s" if ready is not None else "[+] Start-up incomplete") + \
+               (f", all start-up steps done in {done:.2f}s" if done is not None else "")
+        if steps:
+            line += " (slowest: " + ", ".join(f"{name} {seconds:.2f}s" for name, _, seconds, _ in steps) + ")"
+        return line
@@ -0,0 +1,42 @@
+# Stand-in turn processor for testing the host pipeline without the game.
+# Point a game's "processor" setting at it, e.g.
+#   "processor": {"command": ["{python}", "{tool_dir}/stub_processor.py", "--folder", "{savegame_folder}",
+#                             "--game", "{game}"], "timeout": 60}
+import argparse
+import os
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pretend to process a PBW3 turn")
+    parser.add_argument("--folder", required=True, help="savegame folder")
+    parser.add_argument("--game", default="", help="game name prefix of the turn files")
+    parser.add_argument("--seconds", type=float, default=2.0, help="how long processing takes")
+    parser.add_argument("--fail", action="store_true", help="exit with an error instead")
+    parser.add_argument("--no-output", action="store_true", help="succeed without touching any turn file")
+    args = parser.parse_args()
+
+    plrs = [f for f in os.listdir(args.folder) if f.lower().endswith(".plr") and f.lower().startswith(args.game.lower())]
+    print(f"[stub] Processing {len(plrs)} player file(s) in {args.folder}")
+    time.sleep(args.seconds)
+    if args.fail:
+        print("[stub] Simulated processing failure", file=sys.stderr)
+        return 1
+    if args.no_output:
+        return 0
+    turn_files = [f for f in os.listdir(args.folder)
+                  if f.lower().startswith(args.game.lower()) and not f.lower().endswith((".plr", ".emp", ".zip"))
+                  and os.path.isfile(os.path.join(args.folder, f))]
+    if not turn_files:
+        turn_files = [f"{args.game}.gam"]
+    for name in turn_files:
+        with open(os.path.join(args.folder, name), "ab") as f:
+            f.write(f"processed {time.ctime()}\n".encode())
+        print(f"[stub] Wrote {name}")
+    print("[stub] Turn processed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
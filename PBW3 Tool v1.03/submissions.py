@@ -0,0 +1,192 @@
+import os
+import re
+import threading
+import time
+from documents_index import document_id
+
+DEFAULT_POLL_SECONDS = 120
+DEFAULT_PLAYER_NAMING = "Player Turn Upload"
+
+
+def player_upload_title(game_config, username, turn_number):
+    """The title a player's .plr upload gets: upload_display_name_player with {username} filled in, then the turn."""
+    base = game_config.get("file_naming", {}).get("upload_display_name_player", DEFAULT_PLAYER_NAMING)
+    return f"{base.replace('{username}', username or '')}{turn_number}"
+
+
+def title_username(game_config, title):
+    """The username a player_upload_title() names, or None if title doesn't follow the game's naming."""
+    base = game_config.get("file_naming", {}).get("upload_display_name_player", DEFAULT_PLAYER_NAMING)
+    if "{username}" not in base:
+        return None
+    before, after = (re.escape(part) for part in base.strip().split("{username}", 1))
+    match = re.fullmatch(f"{before}(?P<username>.+?){after}\\s*\\d*", title.strip(), re.I)
+    if not match or match.group("username") == "{username}":
+        return None  # the host's copies (and older player uploads) keep the naming unformatted
+    return match.group("username")
+
+
+def expected_empires(game_config):
+    """The .plr file names one submission each is expected for.
+
+    The game's "submissions": {"empires": [...]} when set, otherwise the
+    game's .plr files in the savegame folder (those the host hands out)."""
+    listed = (game_config.get("submissions") or {}).get("empires")
+    if listed:
+        return list(listed)
+    folder = game_config.get("savegame_folder")
+    if not folder or not os.path.isdir(folder):
+        return []
+    prefix = game_config.get("name", "").lower()
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(".plr") and f.lower().startswith(prefix))
+
+
+def host_upload_keys(documents, items):
+    """The turn zip's key and the keys of the documents the host uploaded with it, or (None, []).
+
+    items are the upload_item()s that went up together; each is found in the
+    listing by file name and title. The batch uploads concurrently, so the
+    .plr copies may get lower ids than the zip: these keys are the only
+    reliable way to tell them from the players' own uploads."""
+    wanted = {(os.path.basename(item["path"]).lower(), item["display_name"].strip().lower()) for item in items}
+    batch = [d for d in documents if (d["file"].lower(), (d["title"] or "").strip().lower()) in wanted]
+    zips = [d for d in batch if d["file"].lower().endswith(".zip") and document_id(d) is not None]
+    if not zips:
+        return None, []
+    newest = max(zips, key=document_id)
+    return newest["key"], [d["key"] for d in batch if d is not newest]
+
+
+def submission_status(game_config, documents, host_username=None, host_upload=None):
+    """Who has submitted this turn, from a documents listing.
+
+    Submissions are the .plr documents uploaded after the newest turn zip,
+    minus the host's own copies. host_upload ({"zip": key, "documents":
+    [keys]}, see host_upload_keys()) names them exactly when it was recorded
+    for the newest zip. Otherwise they are those uploaded by host_username
+    when the listing names uploaders, or else the first copy of each
+    empire's file after the zip (the host uploads one with the turn unless
+    the game's "submissions" sets "host_uploads_players": false). Each is matched to
+    an empire by file name, then by the uploader (or the username in its
+    title, see player_upload_title()) through "submissions": {"players":
+    {username: empire file}}."""
+    settings = game_config.get("submissions") or {}
+    players = {name.lower(): empire for name, empire in (settings.get("players") or {}).items()}
+    empires = expected_empires(game_config)
+    by_name = {e.lower(): e for e in empires}
+    zip_ids = [document_id(d) for d in documents if d["file"].lower().endswith(".zip") and document_id(d) is not None]
+    newest_zip = max(zip_ids, default=None)
+    recorded = (host_upload is not None and newest_zip is not None
+                and document_id({"key": host_upload.get("zip") or ""}) == newest_zip)
+    host_keys = set(host_upload.get("documents") or []) if recorded else set()
+    uploads = sorted((d for d in documents if d["file"].lower().endswith(".plr") and document_id(d) is not None
+                      and (newest_zip is None or document_id(d) > newest_zip) and d["key"] not in host_keys),
+                     key=document_id)
+    uploaders_known = bool(host_username) and any(d.get("uploader") for d in uploads)
+    host_copies = (settings.get("host_uploads_players", True) and newest_zip is not None
+                   and not uploaders_known and not recorded)
+    seen = set()
+    submitted, unmatched = {}, []
+    for doc in uploads:
+        if uploaders_known and (doc.get("uploader") or "").lower() == host_username.lower():
+            continue
+        name = doc["file"].lower()
+        if host_copies and name in by_name and name not in seen:
+            seen.add(name)
+            continue  # the host's copy handed out with the turn
+        seen.add(name)
+        username = doc.get("uploader") or title_username(game_config, doc["title"] or "")
+        empire = by_name.get(name) or players.get((username or "").lower())
+        entry = {"document": doc["key"], "title": doc["title"], "by": username or ""}
+        if empire in empires:
+            submitted[empire] = entry  # a later upload replaces an earlier one
+        else:
+            unmatched.append(dict(entry, file=doc["file"]))
+    rows = [dict({"empire": e, "submitted": e in submitted}, **submitted.get(e, {"document": None, "title": "", "by": ""}))
+            for e in empires]
+    return {"turn_zip": newest_zip, "empires": rows, "unmatched": unmatched,
+            "submitted": len(submitted), "expected": len(empires),
+            "complete": bool(empires) and len(submitted) == len(empires)}
+
+
+class SubmissionTracker(threading.Thread):
+    """Polls host games' documents listings for player submissions and reports each change.
+
+    A game is tracked while it is watched (the Submissions window) or when
+    its "submissions" entry has "auto_process": true. Polls read only the
+    listing pages newer than the last sync, at background priority, every
+    poll_seconds. When the last missing empire submits and auto_process is
+    on, the host pipeline is started for that game, once per turn."""
+
+    def __init__(self, get_games, get_worker, on_update, log, label=None):
+        super().__init__(daemon=True)
+        self.get_games = get_games
+        self.get_worker = get_worker
+        self.on_update = on_update  # on_update(game, status), called from the session engine
+        self.log = log
+        self.label = label or (lambda game: game.get("display_name") or game.get("name", ""))
+        self.watched = set()
+        self.polled = {}
+        self.statuses = {}
+        self.triggered = {}  # game key -> turn zip id the pipeline was started for
+        self.stopped = threading.Event()
+        self._wake = threading.Event()
+
+    def _key(self, game):
+        return game.get("account"), game.get("name")
+
+    def watch(self, game):
+        """Track game now (and poll it straight away)."""
+        self.watched.add(self._key(game))
+        self.polled.pop(self._key(game), None)
+        self._wake.set()
+
+    def unwatch(self, game):
+        self.watched.discard(self._key(game))
+
+    def tracked(self):
+        return [g for g in self.get_games() if g.get("role") == "host" and
+                (self._key(g) in self.watched or (g.get("submissions") or {}).get("auto_process"))]
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                self.log(f"[!] Submission tracker: {e}")
+            self._wake.wait(5)
+            self._wake.clear()
+
+    def tick(self, now=None):
+        now = time.time() if now is None else now
+        for game in self.tracked():
+            key = self._key(game)
+            interval = (game.get("submissions") or {}).get("poll_seconds", DEFAULT_POLL_SECONDS)
+            worker = self.get_worker(game)
+            if worker and now - self.polled.get(key, 0) >= interval:
+                self.polled[key] = now
+                worker.poll_submissions(game, lambda status, game=game: self._update(game, status))
+
+    def _update(self, game, status):
+        key = self._key(game)
+        previous = self.statuses.get(key)
+        self.statuses[key] = status
+        if previous and previous["turn_zip"] == status["turn_zip"]:
+            before = {row["empire"] for row in previous["empires"] if row["submitted"]}
+            for row in status["empires"]:
+                if row["submitted"] and row["empire"] not in before:
+                    by = f" by {row['by']}" if row["by"] else ""
+                    self.log(f"[+] {self.label(game)}: {row['empire']} submitted{by} "
+                             f"({status['submitted']}/{status['expected']}).")
+        self.on_update(game, status)
+        auto = (game.get("submissions") or {}).get("auto_process")
+        if status["complete"] and auto and self.triggered.get(key) != status["turn_zip"]:
+            self.triggered[key] = status["turn_zip"]
+            self.log(f"[+] {self.label(game)}: every empire is in; starting the host pipeline.")
+            worker = self.get_worker(game)
+            if worker:
+                worker.run_host_pipeline([game])
+
+    def stop(self):
+        self.stopped.set()
+        self._wake.set()
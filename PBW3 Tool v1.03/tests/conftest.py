@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tool's modules live side by side in the folder above, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,66 @@
+from documents_index import DocumentsIndex, describe_diff, diff_documents, merge_partial, parse_listing
+
+
+def doc(doc_id, file, title=""):
+    return {"key": f"{doc_id}-{file}", "href": f"/get_group_doc/{doc_id}-{file}", "file": file, "title": title,
+            "delete_href": None, "uploader": None}
+
+
+def test_parse_listing_reads_key_file_title_and_delete_link():
+    html = ('<table><tr><td><a href="/get_group_doc=/12-galaxy_5.zip">Galaxy Turn 5</a></td>'
+            '<td><a class="bp-group-documents-delete" href="/documents?delete=12">Delete</a></td></tr></table>')
+    [document] = parse_listing(html)
+    assert document["key"] == "12-galaxy_5.zip"
+    assert document["file"] == "galaxy_5.zip"
+    assert document["title"] == "Galaxy Turn 5"
+    assert document["delete_href"] == "/documents?delete=12"
+
+
+def test_diff_reports_added_removed_and_renamed():
+    old = [doc(1, "galaxy_4.zip", "Turn 4"), doc(2, "galaxy_1.plr", "Player 1")]
+    new = [doc(1, "galaxy_4.zip", "Turn 4 (fixed)"), doc(3, "galaxy_5.zip", "Turn 5")]
+    diff = diff_documents(old, new)
+    assert [d["key"] for d in diff["added"]] == ["3-galaxy_5.zip"]
+    assert [d["key"] for d in diff["removed"]] == ["2-galaxy_1.plr"]
+    assert [(o["title"], n["title"]) for o, n in diff["renamed"]] == [("Turn 4", "Turn 4 (fixed)")]
+    assert describe_diff(diff) == "1 new turn zip, 1 removed, 1 renamed since last check"
+
+
+def test_never_synced_game_sees_everything_as_added(tmp_path):
+    index = DocumentsIndex(str(tmp_path))
+    listing = [doc(1, "galaxy_4.zip"), doc(2, "galaxy_1.plr")]
+    assert len(index.diff({"name": "galaxy"}, listing)["added"]) == 2
+    index.save({"name": "galaxy"}, listing)
+    assert not any(index.diff({"name": "galaxy"}, listing).values())
+
+
+def test_merge_partial_takes_older_documents_from_the_snapshot_and_drops_deleted_ones():
+    old = [doc(5, "galaxy_5.zip"), doc(4, "galaxy_2.plr"), doc(3, "galaxy_1.plr"), doc(2, "galaxy_4.zip")]
+    # Page 1 reaches down to id 4; id 5 was deleted since, ids 3 and below weren't read
+    scanned = [doc(7, "galaxy_1.plr"), doc(6, "galaxy_6.zip"), doc(4, "galaxy_2.plr")]
+    merged = merge_partial(old, scanned)
+    assert [d["key"] for d in merged] == ["7-galaxy_1.plr", "6-galaxy_6.zip", "4-galaxy_2.plr",
+                                          "3-galaxy_1.plr", "2-galaxy_4.zip"]
+
+
+def test_failed_download_on_an_unread_page_is_added_again(tmp_path):
+    index = DocumentsIndex(str(tmp_path))
+    game = {"name": "galaxy"}
+    index.save(game, [doc(3, "galaxy_1.plr"), doc(2, "galaxy_2.plr"), doc(1, "galaxy_5.zip")], {"2-galaxy_2.plr"})
+    # The next scan stops after page 1, which already holds synced documents
+    listing = merge_partial(index.load(game), [doc(4, "galaxy_3.plr"), doc(3, "galaxy_1.plr")])
+    diff = index.diff(game, listing)
+    assert [d["key"] for d in diff["added"]] == ["4-galaxy_3.plr", "2-galaxy_2.plr"]
+    assert not diff["removed"] and not diff["renamed"]
+
+
+def test_pending_flag_survives_other_saves_until_the_download_succeeds(tmp_path):
+    index = DocumentsIndex(str(tmp_path))
+    game = {"name": "galaxy"}
+    listing = [doc(2, "galaxy_2.plr"), doc(1, "galaxy_5.zip")]
+    index.save(game, listing, {"2-galaxy_2.plr"})
+    index.save(game, listing)  # e.g. a player download that didn't try it
+    assert [d["key"] for d in index.load(game) if d.get("pending")] == ["2-galaxy_2.plr"]
+    index.save(game, listing, set())
+    assert not any(d.get("pending") for d in index.load(game))
+    assert not index.diff(game, listing)["added"]
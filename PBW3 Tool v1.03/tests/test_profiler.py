@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+from profiler import Profiler
+
+
+def run_overlapping(folder):
+    profiler = Profiler(enabled=True, folder=folder, log=lambda message: None)
+    first_allocated = asyncio.Event()
+    second_done = asyncio.Event()
+
+    async def first():
+        async with profiler.command("host_download", "Galaxy"):
+            buffer = bytearray(8 * 1024 * 1024)
+            first_allocated.set()
+            await second_done.wait()
+            del buffer
+
+    async def second():
+        await first_allocated.wait()
+        async with profiler.command("check_documents", "Galaxy"):
+            pass
+        second_done.set()
+
+    async def main():
+        await asyncio.gather(first(), second())
+
+    asyncio.run(main())
+    profiles = [json.loads(p.read_text()) for p in folder.glob("*.json")]
+    return {p["command"]: p for p in profiles}
+
+
+def test_overlapping_command_keeps_the_earlier_commands_peak(tmp_path):
+    profiles = run_overlapping(tmp_path)
+    assert profiles["host_download"]["memory_peak"] >= 8 * 1024 * 1024
+    assert profiles["host_download"]["overlapping"]
+    assert profiles["check_documents"]["overlapping"]
+
+
+def test_lone_command_is_not_overlapping(tmp_path):
+    profiler = Profiler(enabled=True, folder=tmp_path, log=lambda message: None)
+
+    async def main():
+        async with profiler.command("player_upload", "Galaxy"):
+            bytearray(1024)
+
+    asyncio.run(main())
+    [profile] = [json.loads(p.read_text()) for p in tmp_path.glob("*.json")]
+    assert not profile["overlapping"]
@@ -0,0 +1,53 @@
+import os
+import time
+
+from retention import PART_MAX_AGE_DAYS, plan_prune
+
+
+def make_turns(tmp_path, count):
+    for turn in range(1, count + 1):
+        folder = tmp_path / "Turns" / f"Turn_{turn}"
+        folder.mkdir(parents=True)
+        (folder / f"galaxy_{turn}.plr").write_bytes(b"x" * 100)
+    return {"name": "Galaxy", "savegame_folder": str(tmp_path)}
+
+
+def age(path, days):
+    stamp = time.time() - days * 86400
+    os.utime(path, (stamp, stamp))
+
+
+def pruned(report, root):
+    return {os.path.relpath(p["path"], root) for p in report["prune"]}
+
+
+def test_keep_every_alone_keeps_milestones_and_the_newest(tmp_path):
+    game = make_turns(tmp_path, 12)
+    report = plan_prune(game, {"keep_every": 5})
+    kept = sorted(os.path.basename(k["path"]) for k in report["keep"])
+    assert kept == ["Turn_10", "Turn_12", "Turn_5"]
+    assert all("None" not in p["reason"] for p in report["prune"])
+
+
+def test_old_part_files_in_turn_folders_are_pruned(tmp_path):
+    game = make_turns(tmp_path, 2)
+    old = tmp_path / "Turns" / "Turn_2" / "galaxy_2.zip.part"
+    old.write_bytes(b"x" * 50)
+    age(old, PART_MAX_AGE_DAYS + 1)
+    fresh = tmp_path / "Turns" / "Turn_2" / "galaxy_3.zip.part"
+    fresh.write_bytes(b"x" * 50)
+    top = tmp_path / "galaxy_1.zip.part"
+    top.write_bytes(b"x" * 50)
+    age(top, PART_MAX_AGE_DAYS + 1)
+    report = plan_prune(game)
+    assert pruned(report, tmp_path) == {os.path.join("Turns", "Turn_2", "galaxy_2.zip.part"), "galaxy_1.zip.part"}
+    assert report["kept_bytes"] == 100 + 100 + 50
+
+
+def test_part_files_in_pruned_turn_folders_are_not_listed_twice(tmp_path):
+    game = make_turns(tmp_path, 3)
+    old = tmp_path / "Turns" / "Turn_1" / "galaxy_1.zip.part"
+    old.write_bytes(b"x")
+    age(old, PART_MAX_AGE_DAYS + 1)
+    report = plan_prune(game, {"keep_last": 2})
+    assert pruned(report, tmp_path) == {os.path.join("Turns", "Turn_1")}
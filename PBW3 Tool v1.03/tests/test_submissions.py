@@ -0,0 +1,53 @@
+from submissions import host_upload_keys, submission_status
+from upload_batch import upload_item
+
+GAME = {"name": "Galaxy", "savegame_folder": "",
+        "file_naming": {"upload_display_name_player": "Turn from {username} "},
+        "submissions": {"empires": ["Galaxy_1.plr", "Galaxy_2.plr"]}}
+
+
+def doc(doc_id, file, title=""):
+    return {"key": f"{doc_id}-{file}", "href": f"/get_group_doc/{doc_id}-{file}", "file": file, "title": title,
+            "delete_href": None, "uploader": None}
+
+
+def host_batch_listing():
+    # The .plr copies finished uploading before the zip, so they got lower ids
+    return [doc(100, "Galaxy_1.plr", "Turn from {username} 4"), doc(101, "Galaxy_2.plr", "Turn from {username} 4"),
+            doc(102, "Galaxy_5.zip", "Galaxy Turn 5")]
+
+
+def test_host_upload_keys_finds_the_batch_whatever_the_id_order():
+    items = [upload_item("/games/Galaxy_5.zip", "Galaxy Turn 5", featured=True),
+             upload_item("/games/Galaxy_1.plr", "Turn from {username} 4"),
+             upload_item("/games/Galaxy_2.plr", "Turn from {username} 4")]
+    zip_key, keys = host_upload_keys(host_batch_listing() + [doc(90, "Galaxy_4.zip", "Galaxy Turn 4")], items)
+    assert zip_key == "102-Galaxy_5.zip"
+    assert sorted(keys) == ["100-Galaxy_1.plr", "101-Galaxy_2.plr"]
+
+
+def test_recorded_host_upload_with_interleaved_ids_counts_every_player():
+    listing = host_batch_listing() + [doc(103, "Galaxy_1.plr", "Turn from alice 5"),
+                                      doc(104, "Galaxy_2.plr", "Turn from bob 5")]
+    host_upload = {"zip": "102-Galaxy_5.zip", "documents": ["100-Galaxy_1.plr", "101-Galaxy_2.plr"]}
+    status = submission_status(GAME, listing, "host", host_upload)
+    assert status["complete"]
+    assert [row["by"] for row in status["empires"]] == ["alice", "bob"]
+
+
+def test_recorded_host_copies_after_the_zip_are_not_submissions():
+    listing = [doc(102, "Galaxy_5.zip", "Galaxy Turn 5"), doc(103, "Galaxy_1.plr", "Turn from {username} 4"),
+               doc(104, "Galaxy_2.plr", "Turn from {username} 4"), doc(105, "Galaxy_2.plr", "Turn from bob 5")]
+    host_upload = {"zip": "102-Galaxy_5.zip", "documents": ["103-Galaxy_1.plr", "104-Galaxy_2.plr"]}
+    status = submission_status(GAME, listing, "host", host_upload)
+    assert status["submitted"] == 1
+    assert not status["complete"]
+
+
+def test_host_upload_for_an_older_zip_falls_back_to_guessing():
+    listing = [doc(102, "Galaxy_5.zip"), doc(103, "Galaxy_1.plr"), doc(104, "Galaxy_2.plr"),
+               doc(105, "Galaxy_1.plr", "Turn from alice 5")]
+    stale = {"zip": "90-Galaxy_4.zip", "documents": ["91-Galaxy_1.plr"]}
+    status = submission_status(GAME, listing, "host", stale)
+    assert status["submitted"] == 1
+    assert status["empires"][0]["by"] == "alice"
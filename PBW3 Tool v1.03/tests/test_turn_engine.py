@@ -0,0 +1,47 @@
+import io
+import json
+import sys
+import zipfile
+
+from documents_index import DocumentsIndex
+from traffic_replay import http_entry
+from turn_engine import TurnEngine
+
+DOC_URL = "https://www.pbw3.net/games/galaxy/documents/"
+ZIP_HREF = "https://www.pbw3.net/get_group_doc=/101-galaxy_5.zip"
+
+
+def write_archive(path):
+    turn_zip = io.BytesIO()
+    with zipfile.ZipFile(turn_zip, "w") as z:
+        z.writestr("galaxy.gam", "turn 5")
+    listing = f'<ul><li><a href="{ZIP_HREF}">Galaxy Turn 5</a></li></ul>'.encode()
+    entries = [http_entry("GET", DOC_URL, {}, 200, {"content-type": "text/html; charset=utf-8"}, listing, 0.01),
+               http_entry("GET", ZIP_HREF, {}, 200, {"content-type": "application/zip"}, turn_zip.getvalue(), 0.01),
+               http_entry("POST", DOC_URL, {}, 302, {}, b"", 0.01)]
+    path.write_text(json.dumps({"log": {"entries": entries}}))
+
+
+def test_mock_backend_runs_a_player_turn_without_a_browser(tmp_path):
+    write_archive(tmp_path / "galaxy.har")
+    savegame = tmp_path / "savegame"
+    savegame.mkdir()
+    (savegame / "andromeda_emp1.plr").write_text("another game's orders")
+    (savegame / "galaxy_emp1.plr").write_text("orders")
+    game = {"name": "galaxy", "display_name": "Galaxy", "document_url": DOC_URL, "savegame_folder": str(savegame),
+            "role": "player", "file_naming": {"upload_display_name_player": "Turn from {username} "}}
+    log = []
+    engine = TurnEngine({"transport": {"backend": "mock", "archive": str(tmp_path / "galaxy.har"),
+                                       "latency_scale": 0}}, log=log.append)
+    try:
+        worker = engine.session("benchuser", "bench-password")
+        worker.documents_index = DocumentsIndex(str(tmp_path / "documents"))
+        worker.player_download(game).result(timeout=30)
+        worker.player_upload(game).result(timeout=30)
+        assert (savegame / "galaxy.gam").read_text() == "turn 5"
+        assert game["turn_number"] == 6
+        assert "[+] galaxy_emp1.plr: uploaded as 'Turn from benchuser 5' (replayed)" in log
+        assert worker.replayer.stats() == {"served": 3, "misses": 0}
+        assert "playwright.async_api" not in sys.modules
+    finally:
+        engine.close()
@@ -0,0 +1,279 @@
+import asyncio
+import base64
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+REDACTED = "REDACTED"
+SECRET_HEADERS = {"cookie", "set-cookie", "authorization", "proxy-authorization"}
+SECRET_FIELDS = {"log", "pwd", "user_login", "user_pass", "password", "_wpnonce", "_wp_http_referer"}
+# Transfer-level headers that no longer describe a body once it has been decoded into the archive
+HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def scrub_url(url, secrets=()):
+    """Redact secret query parameters (login names, nonces) and any literal secrets from url."""
+    parts = urlsplit(url)
+    query = urlencode([(k, REDACTED if k.lower() in SECRET_FIELDS else v)
+                       for k, v in parse_qsl(parts.query, keep_blank_values=True)])
+    url = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+    return scrub_text(url, secrets)
+
+
+def scrub_text(text, secrets=()):
+    for secret in secrets:
+        text = text.replace(secret, REDACTED)
+    return text
+
+
+def _scrub_headers(headers, secrets):
+    return [{"name": h["name"], "value": REDACTED if h["name"].lower() in SECRET_HEADERS
+             else scrub_text(h["value"], secrets)} for h in headers]
+
+
+def scrub_entry(entry, secrets=()):
+    """Strip credentials from one HAR entry: auth headers, login form fields, nonces and known secrets."""
+    request = entry["request"]
+    response = entry["response"]
+    request["url"] = scrub_url(request["url"], secrets)
+    request["headers"] = _scrub_headers(request.get("headers", []), secrets)
+    request["cookies"] = []
+    request["queryString"] = [{"name": q["name"], "value": REDACTED if q["name"].lower() in SECRET_FIELDS
+                               else scrub_text(q["value"], secrets)} for q in request.get("queryString", [])]
+    post = request.get("postData")
+    if post:
+        if "params" in post:
+            post["params"] = [{"name": p["name"], "value": REDACTED if p["name"].lower() in SECRET_FIELDS
+                               else scrub_text(p.get("value", ""), secrets)} for p in post["params"]]
+        if post.get("text"):
+            if "x-www-form-urlencoded" in post.get("mimeType", ""):
+                post["text"] = urlencode([(k, REDACTED if k.lower() in SECRET_FIELDS else v)
+                                          for k, v in parse_qsl(post["text"], keep_blank_values=True)])
+            post["text"] = scrub_text(post["text"], secrets)
+    response["headers"] = _scrub_headers(response.get("headers", []), secrets)
+    response["cookies"] = []
+    if response.get("redirectURL"):
+        response["redirectURL"] = scrub_url(response["redirectURL"], secrets)
+    content = response.get("content", {})
+    mime = content.get("mimeType", "")
+    if content.get("text") and (mime.startswith("text/") or "json" in mime or "javascript" in mime):
+        # Pages echo the username and carry nonces in links and forms
+        encoded = content.get("encoding") == "base64"
+        text = base64.b64decode(content["text"]).decode("utf-8", "replace") if encoded else content["text"]
+        text = re.sub(r"(_wpnonce=)[0-9a-f]+", r"\1" + REDACTED, scrub_text(text, secrets))
+        content["text"] = text
+        content.pop("encoding", None)
+    return entry
+
+
+def http_entry(method, url, request_headers, status, response_headers, body, seconds, started=None):
+    """A HAR entry for a request made outside the browser (download_manager)."""
+    return {
+        "startedDateTime": started or _now_iso(),
+        "time": seconds * 1000,
+        "request": {"method": method, "url": url, "httpVersion": "HTTP/1.1",
+                    "headers": [{"name": k, "value": v} for k, v in request_headers.items()],
+                    "queryString": [], "cookies": [], "headersSize": -1, "bodySize": 0},
+        "response": {"status": status, "statusText": "", "httpVersion": "HTTP/1.1",
+                     "headers": [{"name": k, "value": v} for k, v in response_headers.items()],
+                     "cookies": [], "redirectURL": "", "headersSize": -1, "bodySize": len(body),
+                     "content": {"size": len(body), "mimeType": response_headers.get("content-type", ""),
+                                 "text": base64.b64encode(body).decode("ascii"), "encoding": "base64"}},
+        "cache": {},
+        "timings": {"send": 0, "wait": seconds * 1000, "receive": 0},
+        "_source": "http",
+    }
+
+
+class TrafficRecorder:
+    """Captures a session's traffic into one HAR archive with credentials scrubbed.
+
+    Browser traffic is recorded by Playwright (context_options()); downloads
+    made by download_manager are added through record_file(). save() merges
+    both, scrubs them and writes the archive."""
+
+    def __init__(self, path, log=print):
+        self.path = path
+        self.log = log
+        self.browser_har = path + ".browser.har"
+        self.entries = []
+        self.secrets = set()
+
+    def context_options(self):
+        return {"record_har_path": self.browser_har, "record_har_content": "embed"}
+
+    def add_secret(self, value):
+        if value:
+            self.secrets.add(value)
+
+    def record_file(self, url, request_headers, path, seconds):
+        with open(path, "rb") as f:
+            body = f.read()
+        headers = {"Content-Type": "application/octet-stream", "Content-Length": str(len(body))}
+        started = datetime.fromtimestamp(time.time() - seconds, timezone.utc).isoformat()
+        self.entries.append(http_entry("GET", url, request_headers, 200, headers, body, seconds, started))
+
+    def save(self):
+        """Write the archive; call after the recorded browser context has closed."""
+        entries = list(self.entries)
+        if os.path.exists(self.browser_har):
+            with open(self.browser_har, "r", encoding="utf-8") as f:
+                entries.extend(json.load(f)["log"]["entries"])
+            os.remove(self.browser_har)
+        entries.sort(key=lambda e: e["startedDateTime"])
+        # Longest first, so a password containing the username is still fully redacted
+        secrets = sorted(self.secrets, key=len, reverse=True)
+        for entry in entries:
+            scrub_entry(entry, secrets)
+        archive = {"log": {"version": "1.2", "creator": {"name": "PBW3 Tool", "version": "1.03"},
+                           "entries": entries}}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(archive, f)
+        self.log(f"[+] Recorded {len(entries)} requests to {self.path}")
+
+
+def load_archive(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["log"]["entries"]
+
+
+def entry_body(entry):
+    content = entry["response"].get("content", {})
+    text = content.get("text") or ""
+    if content.get("encoding") == "base64":
+        return base64.b64decode(text)
+    return text.encode("utf-8")
+
+
+class TrafficReplayer:
+    """Serves a recorded archive instead of the live site.
+
+    install() answers a browser context's requests from the archive; serve()
+    starts a local HTTP server for download_manager, reached via local_url();
+    respond() answers one request directly (the mock backend's uploads).
+    Each response is delayed by its recorded time times latency_scale (0
+    replays as fast as possible). A URL requested repeatedly gets its
+    recordings in order, then the last one again."""
+
+    def __init__(self, archive_path, latency_scale=1.0, log=print):
+        self.latency_scale = latency_scale
+        self.log = log
+        self.recordings = {}
+        for entry in load_archive(archive_path):
+            key = (entry["request"]["method"], scrub_url(entry["request"]["url"]))
+            self.recordings.setdefault(key, []).append(entry)
+        self.secrets = set()
+        self.cursors = {}
+        self.served = 0
+        self.misses = []
+        self.server = None
+        self.base_url = None
+
+    def add_secret(self, value):
+        """Redact value from looked-up URLs too, so they match the scrubbed archive (e.g. /members/<user>/)."""
+        if value:
+            self.secrets.add(value)
+
+    def lookup(self, method, url):
+        key = (method, scrub_url(url, sorted(self.secrets, key=len, reverse=True)))
+        entries = self.recordings.get(key)
+        if not entries:
+            self.misses.append(f"{method} {url}")
+            return None
+        index = self.cursors.get(key, 0)
+        self.cursors[key] = index + 1
+        self.served += 1
+        return entries[min(index, len(entries) - 1)]
+
+    async def _delay(self, entry):
+        if self.latency_scale > 0:
+            await asyncio.sleep(max(entry.get("time", 0), 0) / 1000 * self.latency_scale)
+
+    async def respond(self, method, url):
+        """The recorded entry for a request, after its recorded delay; None when the archive has none."""
+        entry = self.lookup(method, url)
+        if entry is not None:
+            await self._delay(entry)
+        return entry
+
+    async def install(self, context):
+        """Answer every request in context from the archive. Install before other routes."""
+        await context.route("**/*", self._route)
+
+    async def _route(self, route):
+        request = route.request
+        entry = self.lookup(request.method, request.url)
+        if entry is None:
+            await route.abort()
+            return
+        await self._delay(entry)
+        response = entry["response"]
+        headers = {h["name"]: h["value"] for h in response.get("headers", [])
+                   if h["name"].lower() not in HOP_HEADERS and h["value"] != REDACTED}
+        await route.fulfill(status=response["status"], headers=headers, body=entry_body(entry))
+
+    async def serve(self, host="127.0.0.1", port=0):
+        self.server = await asyncio.start_server(self._serve_client, host, port)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    def local_url(self, url):
+        """Where download_manager should fetch url from while replaying."""
+        parts = urlsplit(url)
+        return f"{self.base_url}/{parts.scheme}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+    async def _serve_client(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            method, target = request_line[0], request_line[1]
+            scheme, _, rest = target.lstrip("/").partition("/")
+            entry = self.lookup(method, f"{scheme}://{rest}")
+            if entry is None:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+            await self._delay(entry)
+            body = entry_body(entry)
+            status, reason = entry["response"]["status"], "OK"
+            extra = ""
+            # Honour Range so download_manager's resume path is exercised too
+            match = re.match(r"bytes=(\d+)-", headers.get("range", ""))
+            if match and status == 200:
+                offset = int(match.group(1))
+                if offset >= len(body):
+                    writer.write(f"HTTP/1.1 416 Range Not Satisfiable\r\nContent-Range: bytes */{len(body)}\r\n"
+                                 f"Content-Length: 0\r\nConnection: close\r\n\r\n".encode("latin-1"))
+                    return
+                extra = f"Content-Range: bytes {offset}-{len(body) - 1}/{len(body)}\r\n"
+                body = body[offset:]
+                status, reason = 206, "Partial Content"
+            writer.write(f"HTTP/1.1 {status} {reason}\r\n{extra}Content-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+        except (ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def stats(self):
+        return {"served": self.served, "misses": len(self.misses)}
@@ -0,0 +1,100 @@
+import errno
+import os
+import shutil
+
+# Tried in order before falling back to a copy. Hardlinks are opt-in ("archive_links"): the staged
+# .plr and the archived one would be the same file, so rewriting the working copy changes the archive.
+DEFAULT_LINKS = ("reflink",)
+FICLONE = 0x40049409                     # Linux ioctl: share extents copy-on-write (Btrfs, XFS, ...)
+
+
+def turn_folder(game_config, turn_number):
+    return os.path.join(game_config["savegame_folder"], "Turns", f"Turn_{turn_number}")
+
+
+def _reflink(src, dst):
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+class ArchiveStats:
+    """Bytes placed by each method, so a turn can report how much was really copied."""
+
+    METHODS = ("moved", "reflink", "hardlink", "copy")
+
+    def __init__(self):
+        self.bytes = dict.fromkeys(self.METHODS, 0)
+        self.files = dict.fromkeys(self.METHODS, 0)
+
+    def add(self, method, size):
+        self.bytes[method] += size
+        self.files[method] += 1
+
+    def describe(self):
+        parts = [f"{self.files[m]} {m if m != 'copy' else 'copied'} ({self.bytes[m] / 1048576:.1f} MB)"
+                 for m in self.METHODS if self.files[m]]
+        return ", ".join(parts) or "nothing to place"
+
+
+def place(src, dst, stats=None):
+    """Move src to dst: a rename on the same filesystem, a copy and delete across filesystems."""
+    size = os.path.getsize(src)
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+        if stats:
+            stats.add("copy", size)
+        return "copy"
+    if stats:
+        stats.add("moved", size)
+    return "moved"
+
+
+def stage(src, dst, links=DEFAULT_LINKS, stats=None):
+    """Put a copy of src at dst without duplicating its data where the filesystem allows.
+
+    Tries each method in links ("reflink": copy-on-write clone, "hardlink":
+    the same file under two names), then falls back to a plain copy.
+    dst is replaced atomically; returns the method used. A hardlinked copy
+    shares its contents with src, so it must be replaced rather than edited
+    in place (manifest verify will spot it if it is)."""
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        if "hardlink" in links:
+            return "hardlink"  # already staged by an earlier run
+        # An earlier run hardlinked it; replacing dst below gives the archive its own file again
+    tmp = dst + ".staging"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    method = None
+    for candidate in links:
+        try:
+            if candidate == "reflink":
+                _reflink(src, tmp)
+            elif candidate == "hardlink":
+                os.link(src, tmp)
+            else:
+                continue
+            method = candidate
+            break
+        except OSError:
+            continue  # unsupported here (FAT/exFAT, other filesystem, no reflink support): try the next one
+    if method is None:
+        shutil.copy2(src, tmp)
+        method = "copy"
+    os.replace(tmp, dst)
+    if stats:
+        stats.add(method, os.path.getsize(dst))
+    return method
@@ -0,0 +1,390 @@
+import asyncio
+import contextlib
+import os
+import re
+import threading
+import time
+from download_manager import open_url, cookie_header, HttpStatusError
+from rate_limiter import THROTTLE_STATUSES, TRANSFER, retry_after
+from upload_batch import upload_documents_async, upload_item, DEFAULT_MAX_SESSIONS
+from session_engine import SessionEngine
+from session_lifecycle import DEFAULT_BROWSER_RECYCLE_EVERY
+from profiler import Profiler
+from deadlines import DeadlineCache
+
+BACKENDS = ("playwright", "http", "mock")  # see BACKEND_CLASSES
+DEFAULT_BACKEND = "playwright"
+PAGE_TIMEOUT = 60
+LOGIN_PAGE = "wp-login.php"
+LOGIN_URL = "https://www.pbw3.net/wp-login.php"
+RENDER_WAIT = 3000  # ms for a page's scripts to fill it in before it is read
+
+
+def transport_settings(config, backend=None):
+    """The config's "transport" entry: backend (playwright, http or mock), plus archive and latency_scale for mock."""
+    settings = dict((config or {}).get("transport") or {})
+    if backend:
+        settings["backend"] = backend
+    settings.setdefault("backend", DEFAULT_BACKEND)
+    if settings["backend"] not in BACKENDS:
+        raise ValueError(f"Unknown transport backend '{settings['backend']}' (choose from {', '.join(BACKENDS)})")
+    if settings["backend"] == "mock" and not settings.get("archive"):
+        raise ValueError("The mock backend needs an \"archive\": a traffic recording made with pbw3_benchmark.py record")
+    return settings
+
+
+async def fetch_text(url, headers, timeout=PAGE_TIMEOUT):
+    """GET url and return (final url after redirects, decoded body)."""
+    response = await open_url(url, headers, timeout)
+    try:
+        body = b"".join([chunk async for chunk in response.iter_chunks()])
+    finally:
+        response.close()
+    charset = re.search(r"charset=([\w-]+)", response.headers.get("content-type", ""))
+    return response.url, body.decode(charset.group(1) if charset else "utf-8", "replace")
+
+
+async def session_get(session, url):
+    """GET url as the session's logged-in user (its cookies and user agent): (final url, html).
+
+    Goes through the rate limiter and the mock replayer like browser
+    traffic; raises if PBW3 redirects to the login page."""
+    headers = {"User-Agent": session.user_agent} if session.user_agent else {}
+    cookies = await session.context.cookies(url) if session.context else []
+    if cookies:
+        headers["Cookie"] = cookie_header(cookies)
+    target = session.replayer.local_url(url) if session.replayer else url
+    try:
+        async with session.engine.limiter.slot(target):
+            final, html = await fetch_text(target, headers)
+    except HttpStatusError as e:
+        if e.code in THROTTLE_STATUSES:
+            session.engine.limiter.backoff(retry_after(e.headers), f"{url} answered {e.code}")
+        raise
+    if session.replayer:
+        final = url  # links on the page are relative to the site, not the replay server
+    if LOGIN_PAGE in final:
+        raise RuntimeError("PBW3 sent the request to the login page; the session has expired")
+    return final, html
+
+
+class PageView:
+    """A game's documents listing seen through a warm browser page from the session's PagePool.
+
+    Pages after the first are read in a second page, so the warm one stays
+    on the listing for deletes and the re-read after them."""
+
+    def __init__(self, session, url):
+        self.session = session
+        self.url = url
+        self.page = None
+        self.extra = None
+        self.modified = False
+
+    async def open(self):
+        self.page = await self.session.page_pool.acquire(self.url)
+
+    async def first(self):
+        return self.page.url, await self.page.content()
+
+    async def fetch(self, url):
+        if self.extra is None:
+            self.extra = await self.session.context.new_page()
+            self.session.resource_policy.assign(self.extra, "listing")
+        async with self.session.engine.limiter.slot(url):
+            await self.extra.goto(url, wait_until="domcontentloaded")
+        return url, await self.extra.content()
+
+    async def delete(self, href):
+        self.modified = True
+        async with self.session.engine.limiter.slot(href):
+            await self.page.goto(href)
+
+    async def reload(self):
+        async with self.session.engine.limiter.slot(self.url):
+            await self.page.goto(self.url)
+
+    async def close(self):
+        if self.extra is not None:
+            try:
+                await self.extra.close()
+            except Exception:
+                pass  # context rebuilt underneath us
+        self.session.page_pool.release(self.url, modified=self.modified)
+
+
+class HttpView(PageView):
+    """The same listing fetched as plain HTML with the session's cookies; nothing is rendered."""
+
+    async def open(self):
+        pass
+
+    async def _get(self, url):
+        return await session_get(self.session, url)
+
+    async def first(self):
+        return await self._get(self.url)
+
+    async def fetch(self, url):
+        return await self._get(url)
+
+    async def delete(self, href):
+        self.modified = True
+        await self._get(href)
+
+    async def reload(self):
+        pass  # first() always fetches afresh
+
+    async def close(self):
+        if self.modified and self.session.page_pool:
+            self.session.page_pool.invalidate(self.url)
+
+
+class PlaywrightBackend:
+    """Reads and changes documents listings, logs in and uploads through the browser, as the tool always has."""
+
+    name = "playwright"
+    view = PageView
+    browserless = False  # True: the session opens no browser context and has no page pool
+
+    @contextlib.asynccontextmanager
+    async def documents(self, session, url):
+        """async with backend.documents(session, url) as view: first(), fetch(url), delete(href), reload()."""
+        view = self.view(session, url)
+        await view.open()
+        try:
+            yield view
+        finally:
+            await view.close()
+
+    async def login(self, session, username, password):
+        """Log the session's context in; returns (user agent, storage state) for later requests and rebuilds."""
+        page = session.page
+        session.resource_policy.use('login', page)
+        async with session.engine.limiter.slot(LOGIN_URL):
+            await page.goto(LOGIN_URL)
+        await page.fill("input#user_login", username)
+        await page.fill("input#user_pass", password)
+        async with session.engine.limiter.slot(LOGIN_URL):
+            await page.click("input[type='submit']")
+            await page.wait_for_load_state("networkidle")
+        return await page.evaluate("navigator.userAgent"), await session.context.storage_state()
+
+    async def upload(self, session, url, items, max_sessions=DEFAULT_MAX_SESSIONS, progress=None):
+        """Upload items (upload_item()s) to the documents page at url; returns upload_documents_async()'s results."""
+        page = await session.page_pool.acquire(url)
+        try:
+            return await upload_documents_async(session.context, url, items, session.log, max_sessions=max_sessions,
+                                                ready_pages=[page], progress=progress, limiter=session.engine.limiter)
+        finally:
+            session.page_pool.release(url, modified=True)
+
+    async def upload_player(self, session, url, path, title):
+        """Upload a player's .plr file, tagged with the "Player File" category; raises if it fails."""
+        page = await session.page_pool.acquire(url)
+        try:
+            await page.wait_for_selector("#bp-group-documents-upload-button")
+            await page.click("#bp-group-documents-upload-button")
+            await page.wait_for_selector("input[name='bp_group_documents_name']")
+            await page.set_input_files("input[type='file']", path)
+            await page.fill("input[name='bp_group_documents_name']", title)
+            try:
+                category_checkbox = page.locator("input#category-138")
+                if await category_checkbox.count() > 0 and await category_checkbox.first.is_visible():
+                    await category_checkbox.first.check()
+                else:
+                    await page.fill("input[name='bp_group_documents_new_category']", "Player File")
+            except:
+                session.log("[Xintis] Category tagging failed for .plr.")
+            submit_btn = page.locator("input[type='submit'][value='Save']")
+            await submit_btn.scroll_into_view_if_needed()
+            async with session.engine.limiter.slot(url, TRANSFER):
+                await submit_btn.click()
+        finally:
+            session.page_pool.release(url, modified=True)
+
+    async def rendered_page(self, session, url, profile):
+        """The HTML of url once its scripts have run, read in a fresh page with the resource profile applied."""
+        page = await session.context.new_page()
+        session.resource_policy.use(profile, page)
+        try:
+            async with session.engine.limiter.slot(url):
+                await page.goto(url)
+            await page.wait_for_timeout(RENDER_WAIT)
+            return await page.content()
+        finally:
+            await page.close()
+
+
+class HttpBackend(PlaywrightBackend):
+    """Listings and deletes over plain HTTP with the browser's login cookies.
+
+    Logging in and uploading still go through the browser: those are forms
+    driven by the site's scripts."""
+
+    name = "http"
+    view = HttpView
+
+
+class MockBackend(HttpBackend):
+    """Everything answered from a traffic recording (the session's TrafficReplayer); no browser is launched.
+
+    Listings, deletes, group pages and downloads are plain GETs to the
+    replayer's local server, as with the http backend. Logging in is
+    skipped, and each upload gets the recorded answer to a form post to the
+    documents page, after its recorded time times the latency scale."""
+
+    name = "mock"
+    browserless = True
+
+    async def login(self, session, username, password):
+        return None, None
+
+    async def upload(self, session, url, items, max_sessions=DEFAULT_MAX_SESSIONS, progress=None):
+        batch_start = time.monotonic()
+
+        async def run(item):
+            name = os.path.basename(item["path"])
+            tracker = progress(name, "upload", os.path.getsize(item["path"])) if progress else None
+            started = time.monotonic()
+            entry = await session.replayer.respond("POST", url)
+            status = entry["response"]["status"] if entry else None
+            error = None
+            if entry is None:
+                error = f"no recorded upload to {url}"
+            elif status >= 400:
+                error = f"server responded {status}"
+            if tracker:
+                tracker.finish(ok=error is None)
+            if error is None:
+                session.log(f"[+] {name}: uploaded as '{item['display_name']}' (replayed)")
+            else:
+                session.log(f"[!] {name}: upload failed: {error}")
+            return {"name": name, "path": item["path"], "ok": error is None, "status": status,
+                    "seconds": time.monotonic() - started, "error": error}
+
+        results = await asyncio.gather(*(run(item) for item in items))
+        session.log(f"[+] Upload summary: {sum(r['ok'] for r in results)}/{len(items)} files uploaded in "
+                    f"{time.monotonic() - batch_start:.1f}s")
+        return list(results)
+
+    async def upload_player(self, session, url, path, title):
+        [result] = await self.upload(session, url, [upload_item(path, title)])
+        if not result["ok"]:
+            raise RuntimeError(result["error"])
+
+    async def rendered_page(self, session, url, profile):
+        final, html = await session_get(session, url)
+        return html
+
+
+BACKEND_CLASSES = {"playwright": PlaywrightBackend, "http": HttpBackend, "mock": MockBackend}
+
+
+def make_backend(name):
+    return BACKEND_CLASSES[name]()
+
+
+class TurnEngine:
+    """One SessionEngine and one logged-in Xintis per account, shared by every entry point.
+
+    The Tk UI, pbw3_cli.py and the old pbw3_host_mode / pbw3_player_mode
+    functions all run their turn commands through here, so they share one
+    warm browser, page pool, rate limiter and metrics store instead of each
+    launching and logging into a browser of its own. The backend ("transport"
+    in the config) decides how listings are read: playwright, http, or mock
+    (a recorded archive replayed instead of the live site, with no browser)."""
+
+    def __init__(self, config=None, log=print, browser_type="chrome", browser_path=None, backend=None, metrics=None,
+                 profiler=None):
+        self.config = config or {}
+        self.settings = transport_settings(self.config, backend)
+        self.log = log
+        self.browser_type = browser_type
+        self.browser_path = browser_path  # None: Playwright's own browser
+        self.metrics = metrics
+        self.profiler = profiler or Profiler(log=log)  # one for every session: cProfile profiles one command at a time
+        self.deadlines = DeadlineCache(pattern=(self.config.get("deadlines") or {}).get("pattern"))
+        self.engine = None
+        self.sessions = {}  # username -> Xintis
+        self._lock = threading.RLock()  # session() holds it while _engine() takes it again
+
+    def _engine(self):
+        with self._lock:
+            if self.engine is None:
+                lifecycle = self.config.get("browser_lifecycle", {})
+                self.engine = SessionEngine(self.browser_type, self.browser_path, self.log,
+                                            browser_recycle_every=lifecycle.get("browser_recycle_every",
+                                                                                DEFAULT_BROWSER_RECYCLE_EVERY),
+                                            rate_limit=self.config.get("rate_limit"),
+                                            launch_browser=not BACKEND_CLASSES[self.settings["backend"]].browserless)
+            return self.engine
+
+    def warm(self):
+        """Launch the shared browser now instead of at the first command; a Future that resolves once it is up."""
+        engine = self._engine()
+        return engine.submit(engine.wait_ready())
+
+    def _replayer(self, log):
+        if self.settings["backend"] != "mock":
+            return None
+        from traffic_replay import TrafficReplayer
+        return TrafficReplayer(self.settings["archive"], latency_scale=self.settings.get("latency_scale", 0), log=log)
+
+    def session(self, username, password, log=None):
+        """The account's session, started and logged in on first use; later calls get the same one."""
+        from session_worker import Xintis  # session_worker imports the backends from here
+        with self._lock:
+            worker = self.sessions.get(username)
+            if worker is None:
+                log = log or self.log
+                worker = Xintis(log, self.browser_type, self.browser_path,
+                                resource_profiles=self.config.get("resource_profiles"),
+                                page_pool_settings=self.config.get("page_pool"),
+                                engine=self._engine(),
+                                lifecycle_settings=self.config.get("browser_lifecycle"),
+                                metrics=self.metrics,
+                                replayer=self._replayer(log),
+                                backend=make_backend(self.settings["backend"]),
+                                profiler=self.profiler,
+                                deadlines=self.deadlines)
+                worker.start()
+                worker.login(username, password)
+                self.sessions[username] = worker
+            return worker
+
+    def run(self, username, password, command, game_config, *args):
+        """Run one Xintis command (host_download, player_upload, ...) for game_config and wait for its result."""
+        return getattr(self.session(username, password), command)(game_config, *args).result()
+
+    def close(self):
+        """Close every session, then the shared browser."""
+        with self._lock:
+            workers = list(self.sessions.values())
+            self.sessions.clear()
+        for worker in workers:
+            try:
+                worker.close().result()
+            except Exception as e:
+                self.log(f"[!] Could not close session: {e}")
+        if self.engine:
+            self.engine.stop()
+            self.engine = None
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_engine(config=None, log=print, **options):
+    """The process-wide TurnEngine; the first caller's config, log and options set it up."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TurnEngine(config, log, **options)
+        return _shared
+
+
+def account_session(username, password, log=print):
+    """The account's session on the shared engine, for callers that only have credentials."""
+    return shared_engine(log=log).session(username, password)
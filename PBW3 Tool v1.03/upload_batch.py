@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from rate_limiter import RateLimiter, TRANSFER, THROTTLE_STATUSES, THROTTLE_PAUSE
+
+UPLOAD_BUTTON = "#bp-group-documents-upload-button"
+NAME_INPUT = "input[name='bp_group_documents_name']"
+FILE_INPUT = "input[type='file']"
+FEATURED_CHECKBOX = "input[name='bp_group_documents_featured']"
+SUBMIT_BUTTON = "input[type='submit'][value='Save']"
+DEFAULT_MAX_SESSIONS = 16
+DEFAULT_TIMEOUT = 300  # seconds allowed per file, from opening the page to the server's reply
+
+
+def upload_item(path, display_name, featured=False):
+    """Describe one file for upload_documents_async()."""
+    return {"path": path, "display_name": display_name, "featured": featured}
+
+
+def _log_summary(results, total, elapsed, log):
+    uploaded = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    summary = f"[+] Upload summary: {len(uploaded)}/{total} files uploaded in {elapsed:.1f}s"
+    if results:
+        slowest = max(results, key=lambda r: r["seconds"])
+        summary += f" (slowest: {slowest['name']} {slowest['seconds']:.1f}s)"
+    log(summary)
+    if failed:
+        log(f"[!] Failed uploads: {', '.join(r['name'] for r in failed)}")
+
+
+async def _upload_one_async(context, doc_url, item, log, timeout, page=None, limiter=None):
+    limiter = limiter or RateLimiter({"enabled": False})
+    borrowed = page is not None
+    if not borrowed:
+        page = await context.new_page()
+    try:
+        if not borrowed:
+            async with limiter.slot(doc_url, TRANSFER):
+                await page.goto(doc_url, wait_until="domcontentloaded")
+        await page.wait_for_selector(UPLOAD_BUTTON, timeout=10000)
+        await page.click(UPLOAD_BUTTON)
+        await page.wait_for_selector(NAME_INPUT, timeout=10000)
+        await page.set_input_files(FILE_INPUT, item["path"])
+        await page.fill(NAME_INPUT, item["display_name"])
+        if item.get("featured"):
+            try:
+                await page.check(FEATURED_CHECKBOX)
+            except Exception:
+                log(f"[!] Could not check 'Featured Document' box for {os.path.basename(item['path'])}.")
+        submit_btn = page.locator(SUBMIT_BUTTON)
+        await submit_btn.scroll_into_view_if_needed()
+        is_form_post = lambda r: r.request.method == "POST" and r.request.resource_type == "document"
+        async with page.expect_response(is_form_post, timeout=timeout * 1000) as response_info:
+            # The slot paces starting the post, not the transfer; holding it for the whole upload
+            # would cap the batch at max_concurrent_per_host files at a time
+            async with limiter.slot(doc_url, TRANSFER):
+                await submit_btn.click(no_wait_after=True)
+        response = await response_info.value
+        if response.status in THROTTLE_STATUSES:
+            limiter.backoff(THROTTLE_PAUSE, f"upload answered {response.status}")
+        return response.status
+    finally:
+        if not borrowed:
+            await page.close()
+
+
+async def upload_documents_async(context, doc_url, items, log, max_sessions=DEFAULT_MAX_SESSIONS,
+                                 timeout=DEFAULT_TIMEOUT, ready_pages=None, progress=None, limiter=None):
+    """Upload every item to the documents page, running up to max_sessions uploads at once.
+
+    Every item is its own coroutine on its own page in the given browser
+    context, so the batch takes roughly as long as the slowest file; a
+    semaphore caps how many pages are open at once. Pages in ready_pages are
+    already on doc_url and are used first; they are left open for the
+    caller. Returns one result dict per item with name, ok, status, seconds
+    and error, in completion order.
+    progress is an optional make(name, kind, total) tracker factory; the
+    browser doesn't expose bytes sent, so each file reports start and finish.
+    limiter (a shared RateLimiter) paces page loads and the start of each
+    form post; the transfers themselves run side by side."""
+    ready_pages = list(ready_pages or [])
+    total = len(items)
+    results = []
+    slots = asyncio.Semaphore(max(1, int(max_sessions)))
+    batch_start = time.monotonic()
+
+    async def run(item):
+        name = os.path.basename(item["path"])
+        async with slots:
+            page = ready_pages.pop(0) if ready_pages else None
+            started = time.monotonic()
+            status = None
+            error = None
+            size = os.path.getsize(item["path"]) if os.path.exists(item["path"]) else None
+            tracker = progress(name, "upload", size) if progress else None
+            try:
+                status = await _upload_one_async(context, doc_url, item, log, timeout, page, limiter)
+                if status >= 400:
+                    error = f"server responded {status}"
+            except Exception as e:
+                error = str(e)
+            seconds = time.monotonic() - started
+            if tracker:
+                tracker.finish(ok=error is None)
+            index = len(results) + 1
+            if error is None:
+                log(f"[+] [{index}/{total}] {name}: uploaded as '{item['display_name']}' in {seconds:.1f}s")
+            else:
+                log(f"[!] [{index}/{total}] {name}: upload failed: {error}")
+            results.append({"name": name, "path": item["path"], "ok": error is None,
+                            "status": status, "seconds": seconds, "error": error})
+
+    for item in items:
+        log(f"[+] Queued upload: {os.path.basename(item['path'])}")
+    await asyncio.gather(*(run(item) for item in items))
+    _log_summary(results, total, time.monotonic() - batch_start, log)
+    return results
@@ -0,0 +1,222 @@
+import os
+import struct
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+ENGINES = ("stored", "deflate", "parallel")
+DEFAULT_ENGINE = "stored"   # what build_turn_zip() always did
+DEFAULT_LEVEL = 6
+DEFAULT_CHUNK_MB = 4
+DEFAULT_WORKERS = min(8, os.cpu_count() or 2)
+READ_SIZE = 1024 * 1024
+WINDOW = 32 * 1024          # deflate history carried from one chunk into the next
+ZIP64_LIMIT = (1 << 32) - 1  # sizes and offsets from here on need Zip64 records
+ZIP64_MARKER = 0xFFFFFFFF     # "see the Zip64 extra field" in a 32-bit header field
+
+
+def zip_settings(game_config):
+    """The game's "zip" entry: engine (stored, deflate or parallel), level, workers and chunk_mb."""
+    settings = dict(game_config.get("zip") or {})
+    settings.setdefault("engine", DEFAULT_ENGINE)
+    if settings["engine"] not in ENGINES:
+        raise ValueError(f"Unknown zip engine '{settings['engine']}' (choose from {', '.join(ENGINES)})")
+    return settings
+
+
+def write_zip(zip_path, members, settings=None, progress=None):
+    """Write members [(path, name in archive)] to zip_path with the configured engine.
+
+    progress is an optional ProgressTracker fed with bytes read from the members."""
+    settings = settings or {}
+    engine = settings.get("engine", DEFAULT_ENGINE)
+    level = settings.get("level", DEFAULT_LEVEL)
+    if progress:
+        progress.set_total(sum(os.path.getsize(path) for path, _ in members))
+    try:
+        if engine == "parallel":
+            ParallelZipWriter(level, settings.get("workers", DEFAULT_WORKERS),
+                              settings.get("chunk_mb", DEFAULT_CHUNK_MB)).write(zip_path, members, progress)
+        else:
+            compression = zipfile.ZIP_DEFLATED if engine == "deflate" else zipfile.ZIP_STORED
+            _write_zipfile(zip_path, members, compression, level, progress)
+    except Exception:
+        if progress:
+            progress.finish(ok=False)
+        raise
+    if progress:
+        progress.finish()
+    return zip_path
+
+
+def _write_zipfile(zip_path, members, compression, level, progress):
+    # The single-threaded builder: zipfile does everything
+    with zipfile.ZipFile(zip_path, 'w', compression=compression,
+                         compresslevel=level if compression == zipfile.ZIP_DEFLATED else None) as zipf:
+        for filepath, filename in members:
+            if progress is None:
+                zipf.write(filepath, filename)
+                continue
+            # Stream the file in so progress moves within large files too
+            with open(filepath, 'rb') as src, zipf.open(_zip_info(filepath, filename, compression), 'w') as dst:
+                while True:
+                    chunk = src.read(READ_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    progress.advance(len(chunk))
+
+
+def _zip_info(filepath, filename, compression):
+    info = zipfile.ZipInfo.from_file(filepath, filename)
+    info.compress_type = compression
+    return info
+
+
+def _compress_chunk(data, level, history, last):
+    """Raw deflate of one chunk, primed with the previous chunk's tail.
+
+    Chunks end on a sync flush (byte aligned, not final), so the pieces of a
+    member concatenate into one valid deflate stream; only the last chunk
+    finishes it."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY,
+                                  **({"zdict": history} if history else {}))
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _dos_time(timestamp):
+    t = time.localtime(timestamp)
+    if t.tm_year < 1980:
+        return 0, (0 << 9) | (1 << 5) | 1
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+class ParallelZipWriter:
+    """Builds a deflated zip with the compression spread over worker threads.
+
+    Every member is cut into chunk_mb pieces that are deflated
+    independently (zlib releases the GIL, so they run in parallel) and
+    written back in order; a large member is spread over all workers and
+    many small ones are compressed side by side. Each piece is primed with
+    the 32 KB before it, so the ratio stays close to a single-threaded
+    deflate. Memory is bounded to about two chunks per worker. Zip64
+    records are written when sizes or offsets need them."""
+
+    def __init__(self, level=DEFAULT_LEVEL, workers=DEFAULT_WORKERS, chunk_mb=DEFAULT_CHUNK_MB):
+        self.level = level
+        self.workers = max(1, int(workers))
+        self.chunk_size = max(64 * 1024, int(chunk_mb * 1024 * 1024))
+
+    def _chunks(self, members):
+        """(member index, data, history, last) for every chunk of every member, in order."""
+        for index, (path, _) in enumerate(members):
+            history = b""
+            with open(path, "rb") as f:
+                data = f.read(self.chunk_size)
+                while True:
+                    following = f.read(self.chunk_size) if data else b""
+                    last = not following
+                    yield index, data, history, last
+                    if last:
+                        break
+                    history = data[-WINDOW:]
+                    data = following
+
+    def write(self, zip_path, members, progress=None):
+        entries = []
+        with open(zip_path, "wb") as out, ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            current = None
+
+            def drain_one():
+                nonlocal current
+                index, data, future, last = pending.popleft()
+                if current is None or current["index"] != index:
+                    current = self._start_member(out, index, members[index])
+                    entries.append(current)
+                compressed = future.result()
+                out.write(compressed)
+                current["crc"] = zlib.crc32(data, current["crc"])
+                current["size"] += len(data)
+                current["compressed"] += len(compressed)
+                if progress:
+                    progress.advance(len(data))
+                if last:
+                    self._finish_member(out, current)
+
+            for index, data, history, last in self._chunks(members):
+                pending.append((index, data, pool.submit(_compress_chunk, data, self.level, history, last), last))
+                while len(pending) >= self.workers * 2:
+                    drain_one()
+            while pending:
+                drain_one()
+            self._write_central_directory(out, entries)
+        return zip_path
+
+    def _start_member(self, out, index, member):
+        path, name = member
+        stat = os.stat(path)
+        entry = {"index": index, "name": name.replace(os.sep, "/").encode("utf-8"), "offset": out.tell(),
+                 "crc": 0, "size": 0, "compressed": 0, "mode": stat.st_mode,
+                 "zip64": stat.st_size * 1.05 > ZIP64_LIMIT or out.tell() > ZIP64_LIMIT}
+        entry["time"], entry["date"] = _dos_time(stat.st_mtime)
+        out.write(self._local_header(entry))
+        entry["data_offset"] = out.tell()
+        return entry
+
+    def _flags(self, entry):
+        try:
+            entry["name"].decode("ascii")
+            return 0
+        except UnicodeDecodeError:
+            return 0x800  # name is UTF-8
+
+    def _local_header(self, entry):
+        extra = b""
+        sizes = (entry["compressed"], entry["size"])
+        if entry["zip64"]:
+            extra = struct.pack("<HHQQ", 0x0001, 16, entry["size"], entry["compressed"])
+            sizes = (ZIP64_MARKER, ZIP64_MARKER)
+        return struct.pack("<IHHHHHIIIHH", 0x04034b50, 45 if entry["zip64"] else 20, self._flags(entry), 8,
+                           entry["time"], entry["date"], entry["crc"], sizes[0], sizes[1],
+                           len(entry["name"]), len(extra)) + entry["name"] + extra
+
+    def _finish_member(self, out, entry):
+        # Sizes and CRC are only known now; patch them into the local header
+        if not entry["zip64"] and max(entry["size"], entry["compressed"]) > ZIP64_LIMIT:
+            raise ValueError(f"{entry['name'].decode('utf-8')} grew past 4 GB while being zipped")
+        end = out.tell()
+        out.seek(entry["offset"])
+        out.write(self._local_header(entry))
+        out.seek(end)
+
+    def _write_central_directory(self, out, entries):
+        start = out.tell()
+        for entry in entries:
+            extra_values = []
+            size, compressed, offset = entry["size"], entry["compressed"], entry["offset"]
+            if size >= ZIP64_LIMIT or entry["zip64"]:
+                extra_values += [size, compressed]
+                size = compressed = ZIP64_MARKER
+            if offset >= ZIP64_LIMIT:
+                extra_values.append(offset)
+                offset = ZIP64_MARKER
+            extra = struct.pack(f"<HH{len(extra_values)}Q", 0x0001, 8 * len(extra_values), *extra_values) \
+                if extra_values else b""
+            version = 45 if extra else 20
+            out.write(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, (3 << 8) | version, version,
+                                  self._flags(entry), 8, entry["time"], entry["date"], entry["crc"],
+                                  compressed, size, len(entry["name"]), len(extra), 0, 0, 0,
+                                  (entry["mode"] & 0xFFFF) << 16, offset) + entry["name"] + extra)
+        end = out.tell()
+        count, cd_size = len(entries), end - start
+        if count >= 0xFFFF or cd_size >= ZIP64_LIMIT or start >= ZIP64_LIMIT:
+            out.write(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, 45, 45, 0, 0, count, count, cd_size, start))
+            out.write(struct.pack("<IIQI", 0x07064b50, 0, end, 1))
+            count = min(count, 0xFFFF)
+            cd_size = ZIP64_MARKER if cd_size >= ZIP64_LIMIT else cd_size
+            start = ZIP64_MARKER if start >= ZIP64_LIMIT else start
+        out.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, count, count, cd_size, start, 0))